@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def artifactDefault(obj: Any) -> Any:
+    """json.dumps fallback for raw model objects (Docling results are plain object graphs)"""
+    if hasattr(obj, "__dict__"):
+        return obj.__dict__
+    return str(obj)
+
+
+def serializeArtifact(payload: Any) -> str:
+    if isinstance(payload, str):
+        return payload
+    try:
+        return json.dumps(payload, default=artifactDefault, indent=2, ensure_ascii=False)
+    except Exception:
+        return str(payload)
+
+
+class ArtifactSink:
+    """Default sink: debug artifacts are discarded"""
+
+    enabled = False
+
+    def save(self, requestId: str, name: str, payload: Any):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class DiskArtifactSink(ArtifactSink):
+    """
+    Writes debug artifacts to <root>/<request id>/<name> on a background thread.
+
+    Only the newest `retention` request directories are kept.
+    """
+
+    enabled = True
+
+    def __init__(self, root: str, retention: int = 50):
+        self.root = root
+        self.retention = max(retention, 1)
+        # One writer thread: keeps writes ordered and off the request path
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-sink")
+        os.makedirs(self.root, exist_ok=True)
+
+    def save(self, requestId: str, name: str, payload: Any):
+        self.writer.submit(self._write, requestId, name, payload)
+
+    def _write(self, requestId: str, name: str, payload: Any):
+        # Request ids and names come from our own code, but never let them escape root
+        safeId = re.sub(r"[^A-Za-z0-9_.-]", "_", requestId) or "unknown"
+        safeName = os.path.basename(name)
+        requestDir = os.path.join(self.root, safeId)
+        try:
+            os.makedirs(requestDir, exist_ok=True)
+            with open(os.path.join(requestDir, safeName), "w", encoding="utf-8") as f:
+                f.write(serializeArtifact(payload))
+            self._prune()
+        except OSError as e:
+            logger.warning("Could not write artifact", extra={"artifact": safeName, "request_id": safeId,
+                                                               "error": str(e)})
+
+    def _prune(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.is_dir():
+                entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort()
+        for _, path in entries[:-self.retention]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def shutdown(self):
+        self.writer.shutdown(wait=True)
+
+
+def createArtifactSink() -> ArtifactSink:
+    """Disk sink when ARTIFACT_DIR is set, otherwise the no-op sink"""
+    if config.ARTIFACT_DIR:
+        return DiskArtifactSink(config.ARTIFACT_DIR, config.ARTIFACT_RETENTION)
+    return ArtifactSink()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def hashFile(file_path: str, chunkSize: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks so large PDFs are never fully loaded"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunkSize), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cacheKey(fileHash: str, model: str, normalizerVersion: str, variant: str = "") -> str:
+    """
+    Content-addressed key: same bytes + model + normalizer => same result.
+
+    variant distinguishes partial extractions (e.g. a page range) of the same file.
+    """
+    raw = f"{fileHash}:{model.lower()}:{normalizerVersion}"
+    if variant:
+        raw += f":{variant}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache for normalized extraction results.
+
+    Memory tier is an LRU bounded by entry count; disk tier stores one JSON
+    file per key and evicts the least recently used files once the directory
+    grows past maxDiskBytes.
+    """
+
+    def __init__(self,
+                 cacheDir: Optional[str] = config.CACHE_DIR,
+                 maxMemoryEntries: int = config.CACHE_MEMORY_ENTRIES,
+                 maxDiskBytes: int = config.CACHE_DISK_MAX_BYTES):
+        self.cacheDir = cacheDir
+        self.maxMemoryEntries = maxMemoryEntries
+        self.maxDiskBytes = maxDiskBytes
+        self.memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self.diskIndex: "OrderedDict[str, int]" = OrderedDict()
+        self.diskBytes = 0
+        self.lock = Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+        if self.cacheDir:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            self._loadDiskIndex()
+
+    def _loadDiskIndex(self):
+        """Rebuild the disk LRU order from file mtimes left by a previous run"""
+        entries = []
+        for name in os.listdir(self.cacheDir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cacheDir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self.diskIndex[key] = size
+            self.diskBytes += size
+
+    def _diskPath(self, key: str) -> str:
+        return os.path.join(self.cacheDir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self.memory[key]
+            onDisk = self.cacheDir is not None and key in self.diskIndex
+
+        if onDisk:
+            path = self._diskPath(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path, None)
+            except (OSError, ValueError):
+                value = None
+
+            with self.lock:
+                if value is not None:
+                    self.counters["disk_hits"] += 1
+                    if key in self.diskIndex:
+                        self.diskIndex.move_to_end(key)
+                    self._putMemory(key, value)
+                    return value
+                self._dropDisk(key)
+
+        with self.lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Dict):
+        with self.lock:
+            self._putMemory(key, value)
+            self.counters["stores"] += 1
+
+        if self.cacheDir:
+            self._putDisk(key, value)
+
+    def _putMemory(self, key: str, value: Dict):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxMemoryEntries:
+            self.memory.popitem(last=False)
+
+    def _putDisk(self, key: str, value: Dict):
+        path = self._diskPath(key)
+        tmpPath = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False, default=str)
+            os.replace(tmpPath, path)
+            size = os.path.getsize(path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not write cache entry", extra={"key": key, "error": str(e)})
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            return
+
+        with self.lock:
+            self.diskBytes -= self.diskIndex.pop(key, 0)
+            self.diskIndex[key] = size
+            self.diskBytes += size
+            while self.diskBytes > self.maxDiskBytes and len(self.diskIndex) > 1:
+                oldest = next(iter(self.diskIndex))
+                self._dropDisk(oldest)
+                self.counters["evictions"] += 1
+
+    def _dropDisk(self, key: str):
+        """Forget a disk entry; caller holds the lock"""
+        self.diskBytes -= self.diskIndex.pop(key, 0)
+        try:
+            os.remove(self._diskPath(key))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_entries": len(self.diskIndex),
+                "disk_bytes": self.diskBytes,
+            }
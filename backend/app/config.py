@@ -0,0 +1,189 @@
+import os
+
+
+def envInt(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back to default"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be an integer, got {value!r}")
+
+
+def envStr(name: str, default: str) -> str:
+    """Read a string setting from the environment, falling back to default"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+# --- Extraction executor ---
+# Pool kind per model: "thread" or "process"
+EXECUTOR_KIND = {
+    "docling": envStr("EXECUTOR_KIND_DOCLING", "thread").lower(),
+    "omnidocs": envStr("EXECUTOR_KIND_OMNIDOCS", "thread").lower(),
+}
+
+# Number of documents a model may extract concurrently
+EXECUTOR_WORKERS = {
+    "docling": envInt("EXECUTOR_WORKERS_DOCLING", 1),
+    "omnidocs": envInt("EXECUTOR_WORKERS_OMNIDOCS", 2),
+}
+
+# Requests allowed to wait for a busy pool before /extract answers 503
+EXECUTOR_MAX_QUEUE = envInt("EXECUTOR_MAX_QUEUE", 8)
+
+# Seconds clients are told to wait before retrying a saturated pool
+EXECUTOR_RETRY_AFTER = envInt("EXECUTOR_RETRY_AFTER", 5)
+
+# Process pools only: documents a worker process extracts before it is replaced; 0 never
+EXECUTOR_RECYCLE_DOCS = {
+    "docling": envInt("EXECUTOR_RECYCLE_DOCS_DOCLING", 0),
+    "omnidocs": envInt("EXECUTOR_RECYCLE_DOCS_OMNIDOCS", 0),
+}
+
+# Process pools only: memory cap (MB) per worker, its child processes included. A worker past it mid-document
+# is killed; one that finishes a document past it has the pool's workers replaced. 0 no cap
+EXECUTOR_MAX_RSS_MB = {
+    "docling": envInt("EXECUTOR_MAX_RSS_MB_DOCLING", 0),
+    "omnidocs": envInt("EXECUTOR_MAX_RSS_MB_OMNIDOCS", 0),
+}
+
+# Process pools only: how often (ms) each capped worker samples its RSS
+EXECUTOR_RSS_POLL_MS = envInt("EXECUTOR_RSS_POLL_MS", 500)
+
+# --- Result cache ---
+CACHE_ENABLED = envStr("CACHE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+# Directory for the on-disk tier; empty string keeps the cache memory-only
+CACHE_DIR = os.environ.get("CACHE_DIR", "./cache/results") or None
+
+CACHE_MEMORY_ENTRIES = envInt("CACHE_MEMORY_ENTRIES", 128)
+CACHE_DISK_MAX_BYTES = envInt("CACHE_DISK_MAX_BYTES", 512 * 1024 * 1024)
+
+# Page-level cache: unchanged pages of a revised document are reused instead of re-extracted
+PAGE_CACHE_ENABLED = envStr("PAGE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+# Page records kept in memory; the disk tier lives under CACHE_DIR/pages
+PAGE_CACHE_MEMORY_ENTRIES = envInt("PAGE_CACHE_MEMORY_ENTRIES", 2048)
+
+# Runs of changed pages extracted separately before falling back to one run spanning them all
+PAGE_CACHE_MAX_RUNS = envInt("PAGE_CACHE_MAX_RUNS", 4)
+
+# --- Full-text search store ---
+# SQLite file completed extractions are indexed into for GET /search; unset disables indexing and search
+STORE_PATH = envStr("STORE_PATH", "")
+
+# Most hits one /search request returns
+STORE_MAX_HITS = envInt("STORE_MAX_HITS", 100)
+
+# --- Asynchronous jobs ---
+JOBS_WORKERS = envInt("JOBS_WORKERS", 2)
+JOBS_MAX_PENDING = envInt("JOBS_MAX_PENDING", 100)
+JOBS_TTL_SECONDS = envInt("JOBS_TTL_SECONDS", 3600)
+
+# --- Batch extraction ---
+# Documents accepted by /extract/batch, counted after expanding zip archives
+BATCH_MAX_FILES = envInt("BATCH_MAX_FILES", 100)
+
+# --- OmniDocs page-parallel extraction ---
+OMNIDOCS_PARALLEL = envStr("OMNIDOCS_PARALLEL", "1").lower() not in ("0", "false", "no", "off")
+
+# Pages per chunk fanned out to the page pool
+OMNIDOCS_CHUNK_PAGES = envInt("OMNIDOCS_CHUNK_PAGES", 10)
+
+# Processes in the page pool; 0 uses every core
+OMNIDOCS_PAGE_WORKERS = envInt("OMNIDOCS_PAGE_WORKERS", 0)
+
+# --- Table pre-filter (OmniDocs): Camelot only runs on pages that look like they hold a table ---
+TABLE_PREFILTER_ENABLED = envStr("TABLE_PREFILTER_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+# Horizontal gap (points) between words that splits a text row into separate cells
+TABLE_COLUMN_GAP_PT = envInt("TABLE_COLUMN_GAP_PT", 12)
+
+# Cells per row, and consecutive aligned rows, that make an unruled table candidate
+TABLE_MIN_COLUMNS = envInt("TABLE_MIN_COLUMNS", 3)
+TABLE_MIN_ROWS = envInt("TABLE_MIN_ROWS", 3)
+
+# --- Docling pipeline profiles ---
+# Profile used when a request does not pick one: "fast", "balanced" or "accurate" (Docling's defaults)
+DOCLING_PROFILE = envStr("DOCLING_PROFILE", "accurate").lower()
+
+# Profiles whose converters are built and loaded with the handler; others are built on first use
+DOCLING_PRELOAD_PROFILES = [p.strip().lower() for p in envStr("DOCLING_PRELOAD_PROFILES", DOCLING_PROFILE).split(",")
+                            if p.strip()]
+
+# Intra-op threads (torch / onnxruntime). Docling applies this process-wide, so every profile shares it
+DOCLING_THREADS = envInt("DOCLING_THREADS", 4)
+
+# --- Windowed extraction of large documents (Docling) ---
+# Pages converted and normalized at a time; each window's raw result is freed before the next. 0 disables
+DOCLING_WINDOW_PAGES = envInt("DOCLING_WINDOW_PAGES", 50)
+
+# Pages per window of a streamed request, for both models: the first records go out after one window. 0 disables
+STREAM_WINDOW_PAGES = envInt("STREAM_WINDOW_PAGES", 10)
+
+# --- OCR fallback for pages without a text layer (OmniDocs) ---
+OCR_ENABLED = envStr("OCR_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+# Resolution textless pages are rendered at before OCR
+OCR_DPI = envInt("OCR_DPI", 200)
+
+# Rendered pages held in memory and sent to EasyOCR together
+OCR_BATCH_PAGES = envInt("OCR_BATCH_PAGES", 8)
+
+# EasyOCR language codes, comma separated
+OCR_LANGUAGES = [lang.strip() for lang in envStr("OCR_LANGUAGES", "en").split(",") if lang.strip()]
+
+# Recognized text below this confidence (percent) is dropped
+OCR_MIN_CONFIDENCE_PCT = envInt("OCR_MIN_CONFIDENCE_PCT", 30)
+
+# --- Debug artifacts ---
+# Set to a directory to keep raw and normalized outputs per request; unset disables them
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR") or None
+
+# Number of request directories kept under ARTIFACT_DIR
+ARTIFACT_RETENTION = envInt("ARTIFACT_RETENTION", 50)
+
+# --- Startup preload ---
+# Comma-separated models loaded when the API starts; empty keeps loading lazy
+PRELOAD_MODELS = [m.strip().lower() for m in os.environ.get("PRELOAD_MODELS", "docling,omnidocs").split(",") if m.strip()]
+
+# Run a one-page generated PDF through each preloaded model before reporting ready
+MODEL_WARMUP = envStr("MODEL_WARMUP", "0").lower() not in ("0", "false", "no", "off")
+
+# --- Uploads ---
+UPLOAD_DIR = envStr("UPLOAD_DIR", "./uploads")
+UPLOAD_MAX_BYTES = envInt("UPLOAD_MAX_BYTES", 100 * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = envInt("UPLOAD_CHUNK_BYTES", 1024 * 1024)
+
+# Uploads up to this size are handed to extractors that accept bytes (Docling) without touching disk
+UPLOAD_MEMORY_MAX_BYTES = envInt("UPLOAD_MEMORY_MAX_BYTES", 8 * 1024 * 1024)
+
+# --- Logging ---
+LOG_LEVEL = envStr("LOG_LEVEL", "INFO").upper()
+
+# "text" for key=value lines, "json" for one JSON object per line
+LOG_FORMAT = envStr("LOG_FORMAT", "text").lower()
+
+# --- Adaptive routing (model="auto") ---
+# Characters of text layer below which a page counts as having none
+ROUTER_MIN_PAGE_CHARS = envInt("ROUTER_MIN_PAGE_CHARS", 50)
+
+# Percent of the page covered by images above which a page without text is a scan
+ROUTER_IMAGE_COVERAGE_PCT = envInt("ROUTER_IMAGE_COVERAGE_PCT", 50)
+
+# A page mostly covered by images needs at least this percent of text coverage to skip Docling
+ROUTER_MIN_TEXT_COVERAGE_PCT = envInt("ROUTER_MIN_TEXT_COVERAGE_PCT", 10)
+
+# Horizontal and vertical ruling lines (each) that mark a ruled table
+ROUTER_MIN_RULINGS = envInt("ROUTER_MIN_RULINGS", 3)
+
+# Documents shorter than this are routed whole, to the heaviest model any page needs
+ROUTER_SPLIT_MIN_PAGES = envInt("ROUTER_SPLIT_MIN_PAGES", 8)
+
+# More page segments than this and the whole document goes to Docling instead
+ROUTER_MAX_SEGMENTS = envInt("ROUTER_MAX_SEGMENTS", 4)
@@ -0,0 +1,285 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import psutil
+
+from . import config
+from .extractor_factory import ExtractorFactory
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a model pool has no free worker and its wait queue is full"""
+
+    def __init__(self, model: str, capacity: int, retryAfter: int):
+        super().__init__(f"Extraction queue for '{model}' is full ({capacity} requests in flight)")
+        self.model = model
+        self.capacity = capacity
+        self.retryAfter = retryAfter
+
+
+def processTreeRssBytes() -> Optional[int]:
+    """
+    Resident set size of this process and all of its descendants.
+
+    A worker's children (the OmniDocs page pool) count against its budget.
+    """
+    try:
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        children = proc.children(recursive=True)
+    except psutil.Error:
+        return None
+    for child in children:
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            # Exited since it was listed
+            pass
+    return total
+
+
+def watchMemory(maxRssBytes: int, intervalSeconds: float):
+    """Worker watchdog: past maxRssBytes, kill the worker and its children mid-document"""
+    while True:
+        time.sleep(intervalSeconds)
+        rss = processTreeRssBytes()
+        if rss is None or rss <= maxRssBytes:
+            continue
+        logger.error("Worker over its memory cap, exiting", extra={
+            "pid": os.getpid(),
+            "worker_rss_mb": round(rss / 1e6, 1),
+            "max_rss_mb": round(maxRssBytes / 1e6, 1),
+        })
+        for child in psutil.Process().children(recursive=True):
+            try:
+                child.kill()
+            except psutil.Error:
+                pass
+        os._exit(1)
+
+
+def initWorker(model: str, preload: bool, maxRssBytes: int, intervalSeconds: float):
+    """
+    Process worker initializer: start the memory watchdog and load the model.
+
+    The cap is enforced by sampling RSS rather than with RLIMIT_AS: torch
+    and CUDA reserve far more address space than they ever touch.
+    """
+    if maxRssBytes:
+        threading.Thread(target=watchMemory, args=(maxRssBytes, intervalSeconds),
+                         name="memory-watchdog", daemon=True).start()
+    if preload:
+        ExtractorFactory.getExtractor(model)
+
+
+def runMeasured(fn: Callable, *args: Any) -> Tuple[Any, Optional[int]]:
+    """Process worker entry point: fn(*args) and the worker's RSS (children included) once it returns"""
+    return fn(*args), processTreeRssBytes()
+
+
+class ModelPool:
+    """
+    Bounded worker pool for a single extraction model.
+
+    Admission is counted on the event loop: at most `workers` jobs run and
+    at most `maxQueue` more wait; anything beyond that is rejected up front
+    instead of piling up behind a busy model.
+
+    Process pools isolate the model from the API process and can be kept
+    within a memory budget of maxRssMb per worker, its child processes
+    included. Each worker samples its own RSS and kills itself if it goes
+    past the budget mid-document; that document (and any other running on
+    the pool) fails, and the pool is replaced. A worker that finishes a
+    document above the budget has the pool's workers replaced too, and
+    each worker is replaced after recycleDocs documents. Replacement
+    drains first: new documents wait until the old workers have finished
+    theirs and exited, so two generations never hold memory at once.
+    """
+
+    def __init__(self, model: str, kind: str, workers: int, maxQueue: int,
+                 retryAfter: int = config.EXECUTOR_RETRY_AFTER,
+                 recycleDocs: int = 0, maxRssMb: int = 0,
+                 rssPollMs: int = config.EXECUTOR_RSS_POLL_MS):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind for {model}: {kind}")
+        if workers < 1:
+            raise ValueError(f"Executor for {model} needs at least one worker")
+
+        self.model = model
+        self.kind = kind
+        self.workers = workers
+        self.maxQueue = max(maxQueue, 0)
+        self.retryAfter = retryAfter
+        self.recycleDocs = max(recycleDocs, 0)
+        self.maxRssBytes = max(maxRssMb, 0) * 1024 * 1024
+        self.rssPollSeconds = max(rssPollMs, 1) / 1000
+        self.inFlight = 0
+        self.recycles = 0
+        self.workerRssBytes: Optional[int] = None
+        self.slotFreed: Optional[asyncio.Condition] = None
+        # Set while a replaced generation of workers drains
+        self.draining: Optional[asyncio.Future] = None
+        self.executor = self._createExecutor()
+
+    def _createExecutor(self) -> Executor:
+        if self.kind == "process":
+            # spawn, not fork: the API process runs threads that must not be forked mid-lock
+            options = {"max_workers": self.workers, "mp_context": multiprocessing.get_context("spawn")}
+            if self.recycleDocs:
+                options["max_tasks_per_child"] = self.recycleDocs
+            # Preloading workers load their model as they start, not on their first document
+            preload = self.model in config.PRELOAD_MODELS
+            if preload or self.maxRssBytes:
+                options["initializer"] = initWorker
+                options["initargs"] = (self.model, preload, self.maxRssBytes, self.rssPollSeconds)
+            return ProcessPoolExecutor(**options)
+        return ThreadPoolExecutor(max_workers=self.workers,
+                                  thread_name_prefix=f"extract-{self.model}")
+
+    def recycle(self, executor: Executor, reason: str):
+        """Replace the workers of executor, unless they already have been"""
+        if executor is not self.executor or self.draining is not None:
+            return
+        self.recycles += 1
+        logger.info("Recycling worker processes", extra={
+            "model": self.model,
+            "reason": reason,
+            "worker_rss_mb": round(self.workerRssBytes / 1e6, 1) if self.workerRssBytes else None,
+        })
+        self.draining = asyncio.get_running_loop().run_in_executor(None, executor.shutdown, True)
+
+    async def currentExecutor(self) -> Executor:
+        """The executor new work goes to, once any replaced generation has drained"""
+        while self.draining is not None:
+            draining = self.draining
+            await asyncio.shield(draining)
+            # The first waiter to wake starts the new generation
+            if self.draining is draining:
+                self.draining = None
+                self.executor = self._createExecutor()
+        return self.executor
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.maxQueue
+
+    def checkAdmission(self):
+        """Raise ExecutorSaturatedError if a new job would be rejected right now"""
+        if self.inFlight >= self.capacity:
+            raise ExecutorSaturatedError(self.model, self.capacity, self.retryAfter)
+
+    async def waitForSlot(self):
+        """Block until a new job would be admitted"""
+        if self.slotFreed is None:
+            self.slotFreed = asyncio.Condition()
+        async with self.slotFreed:
+            await self.slotFreed.wait_for(lambda: self.inFlight < self.capacity)
+
+    async def run(self, fn: Callable, *args: Any, wait: bool = False) -> Any:
+        """
+        Run fn(*args) on the pool.
+
+        On a process pool, fn, its arguments and its result are pickled, so
+        fn must return plain data (normalized results, timings), never raw
+        model objects such as Docling's ConversionResult.
+
+        When the pool is full this raises ExecutorSaturatedError, or with
+        wait=True (background work such as jobs and batches) waits for a slot.
+        """
+        if wait:
+            await self.waitForSlot()
+        self.checkAdmission()
+
+        self.inFlight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if self.kind == "thread":
+                return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
+
+            executor = await self.currentExecutor()
+            try:
+                result, rss = await loop.run_in_executor(executor, functools.partial(runMeasured, fn, *args))
+            except BrokenProcessPool:
+                # A worker died mid-document: over its memory cap, or killed by the OS
+                self.recycle(executor, "worker_exited")
+                raise
+            if rss is not None:
+                self.workerRssBytes = rss
+                if self.maxRssBytes and rss > self.maxRssBytes:
+                    self.recycle(executor, "rss")
+            return result
+        finally:
+            self.inFlight -= 1
+            if self.slotFreed is not None:
+                async with self.slotFreed:
+                    self.slotFreed.notify()
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.maxQueue,
+            "in_flight": self.inFlight,
+            "queued": max(self.inFlight - self.workers, 0),
+            "recycles": self.recycles,
+            "worker_rss_bytes": self.workerRssBytes,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+
+class ExtractionExecutor:
+    """Routes each model's work to its own ModelPool, created on first use"""
+
+    def __init__(self,
+                 kinds: Optional[Dict[str, str]] = None,
+                 workers: Optional[Dict[str, int]] = None,
+                 maxQueue: int = config.EXECUTOR_MAX_QUEUE,
+                 recycleDocs: Optional[Dict[str, int]] = None,
+                 maxRssMb: Optional[Dict[str, int]] = None):
+        self.kinds = kinds if kinds is not None else dict(config.EXECUTOR_KIND)
+        self.workers = workers if workers is not None else dict(config.EXECUTOR_WORKERS)
+        self.maxQueue = maxQueue
+        self.recycleDocs = recycleDocs if recycleDocs is not None else dict(config.EXECUTOR_RECYCLE_DOCS)
+        self.maxRssMb = maxRssMb if maxRssMb is not None else dict(config.EXECUTOR_MAX_RSS_MB)
+        self.pools: Dict[str, ModelPool] = {}
+
+    def getPool(self, model: str) -> ModelPool:
+        model = model.lower()
+        pool = self.pools.get(model)
+        if pool is None:
+            if model not in self.workers:
+                raise ValueError(f"Unknown model: {model}")
+            pool = ModelPool(model,
+                             kind=self.kinds.get(model, "thread"),
+                             workers=self.workers[model],
+                             maxQueue=self.maxQueue,
+                             recycleDocs=self.recycleDocs.get(model, 0),
+                             maxRssMb=self.maxRssMb.get(model, 0))
+            self.pools[model] = pool
+        return pool
+
+    async def run(self, model: str, fn: Callable, *args: Any, wait: bool = False) -> Any:
+        return await self.getPool(model).run(fn, *args, wait=wait)
+
+    def checkAdmission(self, model: str):
+        self.getPool(model).checkAdmission()
+
+    def stats(self) -> Dict:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self, wait: bool = True):
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
+        self.pools.clear()
@@ -1,13 +1,26 @@
-from app.models.docling.docling_handler import SingletonDocling
-from app.models.OmniDocs.OmniDocs_handler import SingletonOmniDocs
+import importlib
+from typing import Dict, Tuple
+
+# model -> (handler module, singleton class). Modules are imported on first
+# use, so starting the API never pulls in docling, PyMuPDF, Camelot or torch.
+HANDLERS: Dict[str, Tuple[str, str]] = {
+    "docling": ("app.models.docling.docling_handler", "SingletonDocling"),
+    "omnidocs": ("app.models.OmniDocs.OmniDocs_handler", "SingletonOmniDocs"),
+}
 
 class ExtractorFactory:
     @staticmethod
-    def getExtractor(model: str):
+    def register(model: str, module: str, className: str):
+        HANDLERS[model.lower()] = (module, className)
+
+    @staticmethod
+    def getHandlerClass(model: str):
         model = model.lower()
-        if model == "docling":
-            return SingletonDocling()
-        elif model == "omnidocs":
-            return SingletonOmniDocs()
-        else:
-            raise ValueError(f"Unknown model: {model}")
\ No newline at end of file
+        if model not in HANDLERS:
+            raise ValueError(f"Unknown model: {model}")
+        module, className = HANDLERS[model]
+        return getattr(importlib.import_module(module), className)
+
+    @staticmethod
+    def getExtractor(model: str):
+        return ExtractorFactory.getHandlerClass(model)()
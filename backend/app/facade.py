@@ -1,78 +1,509 @@
 from .extractor_factory import ExtractorFactory
-from .utils.normalizerDoc import normalizeResultEnhanced
-from .utils.normalizerOmin import normalizeOmnidocsResult
-import json
+from .utils.normalizerDoc import normalizeDoclingDocument, doclingPages, NORMALIZER_VERSION as DOCLING_NORMALIZER_VERSION
+from .utils.normalizerOmin import normalizeOmnidocsDocument, NORMALIZER_VERSION as OMNIDOCS_NORMALIZER_VERSION
+from .utils.document import Document
+from .utils.streaming import pagesFromNormalized
+from .executor import ExtractionExecutor, ExecutorSaturatedError
+from .cache import ResultCache, cacheKey, hashFile
+from .utils.uploads import PdfSource, hashSource
+from .schemas.options import ExtractOptions
+from .artifacts import ArtifactSink, createArtifactSink, serializeArtifact
+from .timing import StageTimer, currentTimer
+from .router import AUTO_MODEL, mergeSegments, planRoute
+from .page_cache import PageCache, assemblePages, changedRuns, pageHashes, splitPages
+from .windows import documentWindows, streamWindows
+from .store import DocumentStore, createDocumentStore
+from . import config, metrics
+import asyncio
+import gc
+import logging
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+NORMALIZER_VERSIONS = {
+    "docling": DOCLING_NORMALIZER_VERSION,
+    "omnidocs": OMNIDOCS_NORMALIZER_VERSION,
+}
+
+RAW_ARTIFACT_NAMES = {
+    "docling": "raw_docling_output.txt",
+    "omnidocs": "raw_omnidocs_output.json",
+}
+
+
+def runRawExtraction(model: str, source: PdfSource, options: ExtractOptions = None):
+    """
+    Blocking extraction for one document, returning the model's raw result.
+
+    source is a file path or the PDF bytes. The options' page range and
+    content types are pushed down so unrequested work is never done. Kept
+    at module level so it can be shipped to a process pool worker.
+    """
+    options = options or ExtractOptions()
+    extractorModel = ExtractorFactory.getExtractor(model)
+    model_lower = model.lower()
+
+    if model_lower == "docling":
+        # --- Docling part ---
+        return extractorModel.convert(source, pageRange=options.pages, profile=options.doclingProfile)
+
+    elif model_lower == "omnidocs":
+        # --- OmniDocs part ---
+        # Extract text and tables (concurrently, fanned out over page ranges)
+        stages = tuple(stage for stage, needed in (("text", options.needsText), ("tables", options.needsTables))
+                       if needed)
+        return extractorModel.extract_document(source, pageRange=options.pages, stages=stages)
+
+    else:
+        raise ValueError(f"Unsupported model: {model}")
+
+
+def normalizeRaw(model: str, rawResult, options: ExtractOptions = None) -> Document:
+    """Normalize a raw result from runRawExtraction into a Document; toDict gives the standard dict"""
+    if model.lower() == "docling":
+        return normalizeDoclingDocument(model, rawResult, firstPage=firstPageOf(options))
+    return normalizeOmnidocsDocument(rawResult)
+
+
+def firstPageOf(options: ExtractOptions = None) -> int:
+    # Docling numbers converted pages from the start of the requested range
+    return options.pages[0] if options is not None and options.pages else 1
+
+
+def runExtraction(model: str, source: PdfSource, keepRaw: bool = False, options: ExtractOptions = None):
+    """
+    Blocking extraction + normalization for one document.
+
+    Kept at module level so it can be shipped to a process pool worker.
+    Returns (normalized, raw_json, stage seconds). raw_json is None unless
+    keepRaw; it is serialized here, before normalization touches the raw
+    result, so raw model objects never have to cross a process boundary.
+    Large Docling requests are converted in windows of DOCLING_WINDOW_PAGES.
+    """
+    options = options or ExtractOptions()
+    timer = StageTimer()
+    token = currentTimer.set(timer)
+    try:
+        windows = documentWindows(model, source, options)
+        if windows:
+            normalized, rawArtifact = runWindowedExtraction(model, source, windows, keepRaw, options, timer)
+            return normalized, rawArtifact, timer.stages
+        with timer.stage("extract"):
+            rawResult = runRawExtraction(model, source, options)
+        rawArtifact = None
+        if keepRaw:
+            with timer.stage("artifact"):
+                rawArtifact = serializeArtifact(rawResult)
+        with timer.stage("normalize"):
+            normalized = normalizeRaw(model, rawResult, options).toDict()
+    finally:
+        currentTimer.reset(token)
+    return normalized, rawArtifact, timer.stages
+
+
+def runWindowedExtraction(model: str, source: PdfSource, windows: List[Tuple[int, int]], keepRaw: bool,
+                          options: ExtractOptions, timer: StageTimer):
+    """
+    Convert and normalize a large document one window of pages at a time.
+
+    Each window's raw result is released before the next one is converted,
+    so peak memory follows the window size instead of the document. Only
+    the much smaller typed blocks accumulate, and the normalized dict is
+    built from them once at the end. Returns (normalized, raw_json) like runExtraction.
+    """
+    document = Document(model)
+    totalPages = 0
+    rawArtifacts = []
+    for first, last in windows:
+        windowOptions = options.forPages(first, last)
+        with timer.stage("extract"):
+            rawResult = runRawExtraction(model, source, windowOptions)
+        if keepRaw:
+            with timer.stage("artifact"):
+                rawArtifacts.append(serializeArtifact(rawResult))
+        with timer.stage("normalize"):
+            # Windows are only used for Docling
+            for _, textBlocks, tables in doclingPages(rawResult, firstPage=firstPageOf(windowOptions)):
+                totalPages += 1
+                document.textBlocks.extend(textBlocks)
+                document.tables.extend(tables)
+        # Docling's page objects hold reference cycles; free them before the next window allocates
+        del rawResult
+        gc.collect()
+
+    document.metadata = {
+        "total_pages": totalPages,
+        "total_text_blocks": len(document.textBlocks),
+        "total_tables": len(document.tables),
+    }
+    with timer.stage("normalize"):
+        normalized = document.toDict()
+    return normalized, "\n".join(rawArtifacts) if keepRaw else None
 
 
 class PDFExtractorFacade:
-    def __init__(self):
-        pass
+    def __init__(self, executor: ExtractionExecutor = None, cache: ResultCache = None,
+                 artifacts: ArtifactSink = None, pageCache: PageCache = None, store: DocumentStore = None):
+        self.executor = executor or ExtractionExecutor()
+        if cache is None and config.CACHE_ENABLED:
+            cache = ResultCache()
+        self.cache = cache
+        if pageCache is None and config.CACHE_ENABLED and config.PAGE_CACHE_ENABLED:
+            pageCache = PageCache()
+        self.pageCache = pageCache
+        self.artifacts = artifacts or createArtifactSink()
+        self.store = store or createDocumentStore()
+
+    async def _cacheLookup(self, model_lower: str, source: PdfSource, fileHash: str = None,
+                           options: ExtractOptions = None):
+        """Return (key, cached result); key is None when caching does not apply"""
+        if self.cache is None or model_lower not in NORMALIZER_VERSIONS:
+            return None, None
+        if fileHash is None:
+            hasher = hashFile if isinstance(source, str) else hashSource
+            fileHash = await asyncio.to_thread(hasher, source)
+        variant = (options or ExtractOptions()).cacheVariant(model_lower)
+        key = cacheKey(fileHash, model_lower, NORMALIZER_VERSIONS[model_lower], variant)
+        return key, await asyncio.to_thread(self.cache.get, key)
+
+    async def extract(self, model: str, source: PdfSource, requestId: str = None, fileHash: str = None,
+                      wait: bool = False, options: ExtractOptions = None, timer: StageTimer = None):
+        """
+        Extract and normalize one document.
+
+        source is a file path or the PDF bytes; pass fileHash when the
+        caller already hashed the upload. With wait, a saturated pool is
+        waited on instead of raising ExecutorSaturatedError. options limit
+        the pages and content extracted and can drop bboxes. Stage timings
+        (cache, queue, extract, normalize, ...) are added to timer.
+        """
+        if model.lower() == AUTO_MODEL:
+            return await self.extractAuto(source, requestId, fileHash, wait, options, timer)
 
-    async def extract(self, model: str, file_path: str):
-        extractorModel = ExtractorFactory.getExtractor(model)
         model_lower = model.lower()
+        requestId = requestId or uuid.uuid4().hex
+        options = options or ExtractOptions()
+        # Unknown models fail here, before any metric is labelled with them
+        self.executor.getPool(model)
+        docTimer = StageTimer()
 
-        if model_lower == "docling":
-            # --- Docling part ---
-            rawResultObj = extractorModel.convert(file_path) 
-            
-            # Save raw Docling output
-            try:
-                raw_str = json.dumps(rawResultObj, default=lambda o: o.__dict__, indent=2)
-            except Exception:
-                raw_str = str(rawResultObj)
-            
-            with open("raw_docling_output.txt", "w", encoding="utf-8") as f:
-                f.write(raw_str)
-            print("Raw Docling result written to raw_docling_output.txt")
-
-            # Normalize Docling output
-            normalized = normalizeResultEnhanced(model, rawResultObj)
-            return normalized
+        with docTimer.stage("cache"):
+            key, cached = await self._cacheLookup(model_lower, source, fileHash, options)
+        if cached is not None:
+            self._finish(model_lower, cached, docTimer, timer, cached=True)
+            return options.apply(cached)
 
-        elif model_lower == "omnidocs":
-            # --- OmniDocs part ---
-            # Extract text and tables
-            text_output = extractorModel.extract_text(file_path)
-            tables_output = extractorModel.extract_tables(file_path)
-            
-            # Convert Pydantic models to dictionaries
-            # TextOutput likely has attributes like 'text_blocks', 'metadata', etc.
-            if hasattr(text_output, 'model_dump'):
-                # Pydantic v2
-                text_dict = text_output.model_dump()
-            elif hasattr(text_output, 'dict'):
-                # Pydantic v1
-                text_dict = text_output.dict()
-            else:
-                # Fallback: try to convert to dict manually
-                text_dict = text_output.__dict__
-            
-            if hasattr(tables_output, 'model_dump'):
-                tables_dict = tables_output.model_dump()
-            elif hasattr(tables_output, 'dict'):
-                tables_dict = tables_output.dict()
-            else:
-                tables_dict = tables_output.__dict__
-            
-            # Build raw result structure
-            rawResult = {
-                "text": text_dict,
-                "tables": tables_dict
-            }
-            
-            # Save raw OmniDocs output
-            try:
-                raw_str = json.dumps(rawResult, indent=2, ensure_ascii=False)
-                with open("raw_omnidocs_output.json", "w", encoding="utf-8") as f:
-                    f.write(raw_str)
-                print("Raw OmniDocs result written to raw_omnidocs_output.json")
-            except Exception as e:
-                print(f"Warning: Could not save raw output: {e}")
-            
-            # Normalize OmniDocs output
-            normalized = normalizeOmnidocsResult(rawResult)
+        if self.pageCache is not None and model_lower in NORMALIZER_VERSIONS:
+            normalized = await self._extractChangedPages(model, source, requestId, wait, options, docTimer)
+        else:
+            normalized = await self._runModel(model, source, requestId, wait, options, docTimer)
+
+        if key is not None:
+            # Persist in the background; the response does not wait on disk I/O
+            asyncio.get_running_loop().run_in_executor(None, self.cache.put, key, normalized)
+        self._finish(model_lower, normalized, docTimer, timer, cached=False)
+        return options.apply(normalized)
+
+    async def _runModel(self, model: str, source: PdfSource, requestId: str, wait: bool,
+                        options: ExtractOptions, docTimer: StageTimer) -> dict:
+        """One extraction on the model's pool, with its stages, errors and artifacts recorded"""
+        model_lower = model.lower()
+        # Run the blocking pipeline on the model's pool so the event loop stays free
+        start = time.perf_counter()
+        try:
+            normalized, rawArtifact, workerStages = await self.executor.run(
+                model, runExtraction, model, source, self.artifacts.enabled, options, wait=wait
+            )
+        except ExecutorSaturatedError:
+            metrics.REJECTED.labels(model_lower).inc()
+            raise
+        except Exception as e:
+            metrics.MODEL_ERRORS.labels(model_lower, type(e).__name__).inc()
+            raise
+        # Whatever the worker did not account for was spent waiting for it
+        docTimer.record("queue", max(time.perf_counter() - start - sum(workerStages.values()), 0.0))
+        docTimer.merge(workerStages)
+
+        if rawArtifact is not None:
+            self.artifacts.save(requestId, RAW_ARTIFACT_NAMES[model_lower], rawArtifact)
+            self.artifacts.save(requestId, f"normalized_{model_lower}_output.json", normalized)
+        return normalized
+
+    async def _extractChangedPages(self, model: str, source: PdfSource, requestId: str, wait: bool,
+                                   options: ExtractOptions, docTimer: StageTimer) -> dict:
+        """
+        Extract only the pages the page cache has not seen, and splice the
+        cached records of the others in at their new page numbers.
+
+        Pages are matched by content hash, so a revised document reuses every
+        unchanged page even when pages were inserted or removed before it.
+        """
+        model_lower = model.lower()
+        version = NORMALIZER_VERSIONS[model_lower]
+        with docTimer.stage("page_cache"):
+            hashes = await asyncio.to_thread(pageHashes, source, options.pages)
+            found = await asyncio.to_thread(self.pageCache.getMany, hashes, model_lower, version, options)
+
+        if not found:
+            # Nothing to reuse: one ordinary extraction of the whole request
+            normalized = await self._runModel(model, source, requestId, wait, options, docTimer)
+            fresh = splitPages(normalized, list(hashes))
+        else:
+            normalized = None
+            fresh = {}
+            detectSeconds = 0.0
+            runs = changedRuns([page for page in hashes if page not in found], config.PAGE_CACHE_MAX_RUNS)
+            # One run at a time: a request holds at most one slot of the model's pool
+            for first, last in runs:
+                part = await self._runModel(model, source, f"{requestId}-p{first}", wait,
+                                            options.forPages(first, last), docTimer)
+                fresh.update(splitPages(part, [page for page in range(first, last + 1) if page in hashes]))
+                detectSeconds += part.get("metadata", {}).get("table_detection", {}).get("detect_ms", 0.0) / 1000
+
+        metrics.PAGE_CACHE_PAGES.labels(model_lower, "reused").inc(len(found.keys() - fresh.keys()))
+        metrics.PAGE_CACHE_PAGES.labels(model_lower, "extracted").inc(len(fresh))
+        if fresh:
+            asyncio.get_running_loop().run_in_executor(None, self.pageCache.putMany, hashes, fresh,
+                                                       model_lower, version, options)
+        if normalized is not None:
             return normalized
+        return assemblePages(model_lower, {**found, **fresh}, detectSeconds)
+
+    def _finish(self, model_lower: str, normalized: dict, docTimer: StageTimer, timer: StageTimer, cached: bool):
+        """Record per-document metrics and hand the stage timings to the caller"""
+        metrics.observeStages(model_lower, docTimer.stages)
+        metrics.observeResult(model_lower, normalized, cached)
+        if timer is not None:
+            timer.merge(docTimer.stages)
+
+    async def extractAuto(self, source: PdfSource, requestId: str = None, fileHash: str = None,
+                          wait: bool = False, options: ExtractOptions = None, timer: StageTimer = None):
+        """
+        model="auto": inspect the PDF, then extract each run of pages with
+        the cheapest model that handles it.
+
+        Segments go through extract() as ordinary requests for their model,
+        so they share its pool, cache entries and metrics. The plan is
+        reported in metadata["route"].
+        """
+        requestId = requestId or uuid.uuid4().hex
+        options = options or ExtractOptions()
+
+        start = time.perf_counter()
+        plan = await asyncio.to_thread(planRoute, source, options)
+        routeSeconds = time.perf_counter() - start
+        metrics.observeStages(AUTO_MODEL, {"route": routeSeconds})
+        if timer is not None:
+            timer.record("route", routeSeconds)
+        for segment in plan.segments:
+            for reason, pages in segment.reasons.items():
+                metrics.ROUTED_PAGES.labels(segment.model, reason).inc(pages)
+
+        if plan.mode == "document":
+            # The caller's own options, so the result is shared with explicit-model requests
+            model = plan.segments[0].model if plan.segments else "omnidocs"
+            parts = [await self.extract(model, source, requestId=requestId, fileHash=fileHash,
+                                        wait=wait, options=options, timer=timer)]
+        else:
+            parts = await asyncio.gather(*(
+                self.extract(segment.model, source, requestId=f"{requestId}-{index}", fileHash=fileHash,
+                             wait=wait, options=options.forPages(segment.firstPage, segment.lastPage), timer=timer)
+                for index, segment in enumerate(plan.segments)
+            ))
+        return mergeSegments(parts, plan)
+
+    def checkModel(self, model: str):
+        """Raise ValueError for a model name that is neither a pool nor "auto" """
+        if model.lower() != AUTO_MODEL:
+            self.executor.getPool(model)
 
+    def checkAdmission(self, model: str):
+        """
+        Raise ExecutorSaturatedError if the model's pool is full right now.
+
+        "auto" is not checked: which pools it needs is only known once the
+        document has been inspected.
+        """
+        if model.lower() != AUTO_MODEL:
+            self.executor.checkAdmission(model)
+
+    async def extractBatch(self, model: str, documents: List[Tuple[PdfSource, str]], requestId: str = None,
+                           options: ExtractOptions = None):
+        """
+        Extract many documents given as (source, fileHash) pairs.
+
+        Identical documents (same hash) are extracted once. At most one
+        document per pool worker is in flight, so a batch keeps every worker
+        busy without filling the queue that interactive /extract calls rely
+        on. Returns one entry per input, in order: the normalized result or
+        the exception that document raised.
+        """
+        requestId = requestId or uuid.uuid4().hex
+        if model.lower() == AUTO_MODEL:
+            workers = max(self.executor.workers.values())
         else:
-            raise ValueError(f"Unsupported model: {model}")
\ No newline at end of file
+            workers = self.executor.getPool(model).workers
+        slots = asyncio.Semaphore(workers)
+
+        async def extractOne(index: int, source: PdfSource, fileHash: str):
+            async with slots:
+                return await self.extract(model, source, requestId=f"{requestId}-{index}",
+                                          fileHash=fileHash, wait=True, options=options)
+
+        unique: Dict[str, int] = {}
+        tasks = []
+        for index, (source, fileHash) in enumerate(documents):
+            dedupeKey = fileHash or f"#{index}"
+            if dedupeKey not in unique:
+                unique[dedupeKey] = len(tasks)
+                tasks.append(extractOne(index, source, fileHash))
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [results[unique[fileHash or f"#{index}"]]
+                for index, (_, fileHash) in enumerate(documents)]
+
+    async def extractStream(self, model: str, source: PdfSource, requestId: str = None, fileHash: str = None,
+                            options: ExtractOptions = None):
+        """
+        Yield {"type": "page"} records window by window, then a final
+        {"type": "metadata"} record.
+
+        Documents are extracted in windows of STREAM_WINDOW_PAGES pages, each
+        a normalized extraction of its own on the model's pool, so the first
+        pages go out once the first window is done rather than after the
+        whole document. Streamed results are not written back to the cache,
+        since that would mean holding the whole document again.
+        """
+        model_lower = model.lower()
+        requestId = requestId or uuid.uuid4().hex
+        options = options or ExtractOptions()
+
+        if model_lower == AUTO_MODEL:
+            # Segments may come from different models, so the routed result is split afterwards
+            routed = await self.extractAuto(source, requestId, fileHash, options=options)
+            for pageRecord in pagesFromNormalized(routed):
+                yield {"type": "page", **pageRecord}
+            yield {"type": "metadata", "metadata": routed.get("metadata", {})}
+            return
+
+        # Unknown models fail here, before any metric is labelled with them
+        self.executor.getPool(model)
+
+        key, cached = await self._cacheLookup(model_lower, source, fileHash, options)
+        if cached is not None:
+            cached = options.apply(cached)
+            for pageRecord in pagesFromNormalized(cached):
+                yield {"type": "page", **pageRecord}
+            self._finish(model_lower, cached, StageTimer(), None, cached=True)
+            yield {"type": "metadata", "metadata": cached.get("metadata", {})}
+            return
+
+        docTimer = StageTimer()
+        windows = await asyncio.to_thread(streamWindows, model, source, options)
+        if windows:
+            pages = self._streamWindows(model, source, requestId, windows, options, docTimer)
+        else:
+            pages = self._streamDocument(model, source, requestId, options, docTimer)
+
+        metadata = {
+            "total_pages": 0,
+            "total_text_blocks": 0,
+            "total_tables": 0,
+            "total_lines": 0
+        }
+        async for pageRecord in pages:
+            pageRecord = options.applyToPage(pageRecord)
+            metadata["total_pages"] += 1
+            metadata["total_text_blocks"] += len(pageRecord["text_blocks"])
+            metadata["total_tables"] += len(pageRecord["tables"])
+            metadata["total_lines"] += len(pageRecord["lines"])
+            yield {"type": "page", **pageRecord}
+
+        if model_lower == "omnidocs":
+            # Same rule as normalizeOmnidocsResult: an empty document still counts one page
+            metadata["total_pages"] = metadata["total_pages"] or 1
+        self._finish(model_lower, {"metadata": metadata}, docTimer, None, cached=False)
+        yield {"type": "metadata", "metadata": metadata}
+
+    async def _streamDocument(self, model: str, source: PdfSource, requestId: str, options: ExtractOptions,
+                              docTimer: StageTimer):
+        """
+        Page records of one normalized extraction.
+
+        The worker returns the normalized result, never the raw model
+        output: a ConversionResult still holds its PDF backend and cannot
+        cross a process pool.
+        """
+        normalized = await self._runModel(model, source, requestId, False, options, docTimer)
+        if model.lower() == "docling":
+            # Docling reports every converted page, with or without content
+            first = firstPageOf(options)
+            pages = list(range(first, first + normalized.get("metadata", {}).get("total_pages", 0)))
+            pageRecords = splitPages(normalized, pages)
+            del normalized
+            for page in pages:
+                yield pageRecords.pop(page)
+        else:
+            for pageRecord in pagesFromNormalized(normalized):
+                yield pageRecord
+
+    async def _streamWindows(self, model: str, source: PdfSource, requestId: str, windows: List[Tuple[int, int]],
+                             options: ExtractOptions, docTimer: StageTimer):
+        """
+        Page records of a document, one window of pages at a time.
+
+        Each window is a normalized extraction of its own on the model's
+        pool, so neither the worker nor this process ever holds more than
+        one window, and the first pages go out before the last are extracted.
+        Pages come out as _streamDocument sends them: every page for Docling,
+        pages with content for OmniDocs.
+        """
+        for first, last in windows:
+            part = await self._runModel(model, source, f"{requestId}-w{first}", False,
+                                        options.forPages(first, last), docTimer)
+            if model.lower() == "docling":
+                pageRecords = splitPages(part, list(range(first, last + 1)))
+            else:
+                pageRecords = {record["page"]: record for record in pagesFromNormalized(part)}
+            del part
+            for page in sorted(pageRecords):
+                yield pageRecords.pop(page)
+
+    def indexResults(self, documents: List[Tuple[str, str, str, dict]]):
+        """
+        Index (sha256, model, filename, normalized) results for /search in
+        the background, when the store is enabled.
+        """
+        if self.store is None or not documents:
+            return
+        asyncio.get_running_loop().run_in_executor(None, self._ingest, documents)
+
+    def _ingest(self, documents: List[Tuple[str, str, str, dict]]):
+        try:
+            start = time.perf_counter()
+            blocks = self.store.ingest(documents)
+            logger.info("Indexed documents", extra={
+                "documents": len(documents),
+                "blocks": blocks,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+            })
+        except Exception:
+            # The response already went out; a failed index only costs searchability
+            logger.exception("Indexing failed", extra={"documents": [doc[0] for doc in documents]})
+
+    def cacheStats(self):
+        if self.cache is None:
+            return {"enabled": False}
+        stats = self.cache.stats()
+        if self.pageCache is not None:
+            stats["pages"] = self.pageCache.stats()
+        return stats
+
+    def shutdown(self):
+        self.executor.shutdown()
+        self.artifacts.shutdown()
+        from .models.OmniDocs.omnidocs_parallel import shutdownPagePool
+        shutdownPagePool()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import config
+from .schemas.options import ExtractOptions
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many jobs are waiting to be picked up"""
+
+    def __init__(self, limit: int, retryAfter: int = config.EXECUTOR_RETRY_AFTER):
+        super().__init__(f"Job queue is full ({limit} jobs pending)")
+        self.limit = limit
+        self.retryAfter = retryAfter
+
+
+class Job:
+    def __init__(self, model: str, filename: str, file_path: str, file_hash: Optional[str] = None,
+                 options: Optional[ExtractOptions] = None):
+        self.id = uuid.uuid4().hex
+        self.model = model
+        self.filename = filename
+        self.file_path = file_path
+        self.file_hash = file_hash
+        self.options = options
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.result: Optional[Dict] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.timings: Optional[Dict[str, float]] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def setStage(self, stage: str, progress: float):
+        self.stage = stage
+        self.progress = progress
+
+    def toDict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "model": self.model,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings_ms": self.timings,
+        }
+
+
+class JobStore:
+    """In-process registry of jobs; finished jobs expire after ttlSeconds"""
+
+    def __init__(self, ttlSeconds: int = config.JOBS_TTL_SECONDS):
+        self.ttlSeconds = ttlSeconds
+        self.jobs: Dict[str, Job] = {}
+
+    def add(self, job: Job):
+        self.prune()
+        self.jobs[job.id] = job
+
+    def get(self, jobId: str) -> Optional[Job]:
+        return self.jobs.get(jobId)
+
+    def pending(self) -> List[Job]:
+        return [job for job in self.jobs.values() if not job.done]
+
+    def prune(self):
+        cutoff = time.time() - self.ttlSeconds
+        expired = [jobId for jobId, job in self.jobs.items()
+                   if job.done and job.finished_at is not None and job.finished_at < cutoff]
+        for jobId in expired:
+            del self.jobs[jobId]
+
+
+class JobRunner:
+    """
+    Local worker loop for asynchronous extractions.
+
+    Jobs are queued on an asyncio.Queue and drained by `workers` coroutines
+    that call `handler(job)`; the handler's return value becomes the result.
+    """
+
+    def __init__(self,
+                 handler: Callable[[Job], Awaitable[Dict]],
+                 store: Optional[JobStore] = None,
+                 workers: int = config.JOBS_WORKERS,
+                 maxPending: int = config.JOBS_MAX_PENDING,
+                 onFinished: Optional[Callable[[Job], Any]] = None):
+        self.handler = handler
+        self.store = store or JobStore()
+        self.workers = workers
+        self.maxPending = maxPending
+        self.onFinished = onFinished
+        self.queue: Optional[asyncio.Queue] = None
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self._workerLoop()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, job: Job) -> Job:
+        if self.queue is None:
+            raise RuntimeError("JobRunner has not been started")
+        if len(self.store.pending()) >= self.maxPending:
+            raise JobQueueFullError(self.maxPending)
+        self.store.add(job)
+        self.queue.put_nowait(job)
+        return job
+
+    def get(self, jobId: str) -> Optional[Job]:
+        return self.store.get(jobId)
+
+    async def _workerLoop(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        job.setStage("running", 0.05)
+        try:
+            job.result = await self.handler(job)
+            job.status = "succeeded"
+            job.setStage("done", 1.0)
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Job cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            job.stage = "failed"
+            logger.error("Job failed", extra={"job_id": job.id, "model": job.model, "error": job.error})
+        finally:
+            job.finished_at = time.time()
+            if self.onFinished is not None:
+                try:
+                    self.onFinished(job)
+                except Exception as e:
+                    logger.warning("Job cleanup failed", extra={"job_id": job.id, "error": str(e)})
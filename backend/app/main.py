@@ -1,52 +1,428 @@
-from fastapi import FastAPI, Depends, UploadFile, File, Form
-from fastapi.responses import JSONResponse
-from app.schemas.extract import ExtractRequest
+from fastapi import FastAPI, Depends, UploadFile, File, Form, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.schemas.extract import ExtractRequest, BatchExtractRequest, buildExtractResponse
+from app.schemas.options import ExtractOptions, InvalidOptionsError
+from app.store import InvalidQueryError
 from app.facade import PDFExtractorFacade
+from app.executor import ExecutorSaturatedError
+from app.jobs import Job, JobRunner, JobQueueFullError
+from app.utils.streaming import STREAM_FORMATS, STREAM_MEDIA_TYPES, encodeRecord
+from app.utils.formats import OutputFormat, UnsupportedFormatError, columnarContent
+from app.warmup import ModelReadiness
+from app.utils.uploads import (SpooledUpload, UploadTooLargeError, ArchiveError, BodyLimitMiddleware,
+                               SpoolingRoute, spoolUpload, expandArchive)
+from app.timing import StageTimer
+from app.logging_config import configureLogging
+from app import config, metrics
+from fastapi.responses import Response
+from typing import Optional
+import asyncio
+import logging
 import os
+import uuid
 import uvicorn
 
+configureLogging()
+logger = logging.getLogger("app.main")
+
 app = FastAPI()
+# Uploaded files are hashed and spooled once, while the form is parsed
+app.router.route_class = SpoolingRoute
 facade = PDFExtractorFacade()
+metrics.registerExecutor(facade.executor.stats)
+
+async def runJob(job: Job):
+    job.setStage("extracting", 0.1)
+    timer = StageTimer()
+    # Jobs wait for capacity instead of failing like /extract does
+    normalized = await facade.extract(job.model, job.file_path, requestId=job.id,
+                                      fileHash=job.file_hash, wait=True, options=job.options, timer=timer)
+
+    if job.options is None or job.options.isComplete:
+        facade.indexResults([(job.file_hash, job.model, job.filename, normalized)])
+    job.setStage("building_response", 0.9)
+    job.timings = timer.toDict()
+    metrics.observeRequest(job.model, "jobs", timer)
+    return buildExtractResponse(normalized, job.model, job.filename)
+
+def removeJobUpload(job: Job):
+    if os.path.exists(job.file_path):
+        os.remove(job.file_path)
+
+jobRunner = JobRunner(runJob, onFinished=removeJobUpload)
+
+readiness = ModelReadiness(config.PRELOAD_MODELS)
+preloadTasks = []
+
+@app.on_event("startup")
+async def startJobRunner():
+    jobRunner.start()
+
+@app.on_event("startup")
+async def preloadModels():
+    # In the background: /health answers immediately, /ready once models are loaded
+    preloadTasks.append(asyncio.create_task(readiness.preload(facade.executor, config.MODEL_WARMUP)))
+
+@app.on_event("shutdown")
+async def shutdownExecutor():
+    await jobRunner.stop()
+    facade.shutdown()
+
+@app.exception_handler(ExecutorSaturatedError)
+async def executorSaturated(request: Request, exc: ExecutorSaturatedError):
+    return JSONResponse(
+        content={
+            "success": False,
+            "error": "queue_full",
+            "message": str(exc),
+            "model": exc.model
+        },
+        status_code=503,
+        headers={"Retry-After": str(exc.retryAfter)}
+    )
+
+@app.exception_handler(JobQueueFullError)
+async def jobQueueFull(request: Request, exc: JobQueueFullError):
+    return JSONResponse(
+        content={
+            "success": False,
+            "error": "queue_full",
+            "message": str(exc)
+        },
+        status_code=503,
+        headers={"Retry-After": str(exc.retryAfter)}
+    )
+
+@app.exception_handler(UploadTooLargeError)
+async def uploadTooLarge(request: Request, exc: UploadTooLargeError):
+    return JSONResponse(
+        content={"success": False, "error": "upload_too_large", "message": str(exc)},
+        status_code=413
+    )
+
+@app.exception_handler(ArchiveError)
+async def invalidArchive(request: Request, exc: ArchiveError):
+    return JSONResponse(
+        content={"success": False, "error": "invalid_archive", "message": str(exc)},
+        status_code=400
+    )
+
+@app.exception_handler(InvalidOptionsError)
+async def invalidOptions(request: Request, exc: InvalidOptionsError):
+    return JSONResponse(
+        content={"success": False, "error": "invalid_options", "message": str(exc)},
+        status_code=400
+    )
+
+@app.exception_handler(InvalidQueryError)
+async def invalidQuery(request: Request, exc: InvalidQueryError):
+    return JSONResponse(
+        content={"success": False, "error": "invalid_query", "message": str(exc)},
+        status_code=400
+    )
+
+@app.exception_handler(UnsupportedFormatError)
+async def unsupportedFormat(request: Request, exc: UnsupportedFormatError):
+    return JSONResponse(
+        content={"success": False, "error": "unsupported_format", "message": str(exc)},
+        status_code=400
+    )
+
+@app.middleware("http")
+async def startRequestTimer(request: Request, call_next):
+    # Started before the body is read, so "upload" covers receiving it too
+    request.state.timer = StageTimer()
+    return await call_next(request)
+
+# Added last so it runs first: oversized bodies are refused while they are received, before form parsing
+app.add_middleware(BodyLimitMiddleware, maxBytes=config.UPLOAD_MAX_BYTES, onTooLarge=uploadTooLarge)
 
 @app.get("/health")
 async def healthCheck():
     return {"message": "I'm alive"}
 
+@app.get("/ready")
+async def readyCheck():
+    report = readiness.report()
+    return JSONResponse(content=report, status_code=200 if report["ready"] else 503)
+
+@app.get("/cache/stats")
+async def cacheStats():
+    return facade.cacheStats()
+
+@app.get("/search")
+async def search(q: str, phrase: bool = False, document: Optional[str] = None, filename: Optional[str] = None,
+                 model: Optional[str] = None, limit: int = 20, offset: int = 0):
+    if facade.store is None:
+        return JSONResponse(
+            content={"success": False, "error": "search_disabled", "message": "Set STORE_PATH to index and search documents"},
+            status_code=404
+        )
+    limit = max(1, min(limit, config.STORE_MAX_HITS))
+    timer = StageTimer()
+    hits = await asyncio.to_thread(facade.store.search, q, phrase, document, filename, model, limit, max(offset, 0))
+    return {
+        "success": True,
+        "query": q,
+        "phrase": phrase,
+        "hits": hits,
+        "took_ms": round(timer.total * 1000, 2)
+    }
+
+@app.get("/metrics")
+async def metricsEndpoint():
+    body, contentType = metrics.renderMetrics()
+    # Passed as a header so Starlette doesn't append a second charset
+    return Response(content=body, headers={"Content-Type": contentType})
+
+def negotiateOutput(request: Request, fmt: Optional[str], layout: Optional[str]) -> OutputFormat:
+    return OutputFormat.negotiate(fmt, layout, request.headers.get("accept"), request.headers.get("accept-encoding"))
+
 @app.post("/extract")
-async def processJson(req: ExtractRequest = Depends(ExtractRequest.from_form)):
+async def processJson(request: Request, req: ExtractRequest = Depends(ExtractRequest.from_form)):
     model = req.model
     file = req.file
-    
-    uploadDir = "./uploads"
-    os.makedirs(uploadDir, exist_ok=True)
-    
-    filePath = os.path.join(uploadDir, file.filename)
-    pdfBytes = await file.read()
-    with open(filePath, "wb") as f:
-        f.write(pdfBytes)
-    
-    normalized = await facade.extract(model, filePath)
-
-    response = {
-        "success": True,
-        "data": {
-            "model": normalized.get("model", model),
-            "filename": file.filename,
-            "metadata": normalized.get("metadata", {
-                "total_pages": normalized.get("metadata", {}).get("total_pages", 0),
-                "total_text_blocks": normalized.get("metadata", {}).get("total_text_blocks", 0),
-                "total_tables": normalized.get("metadata", {}).get("total_tables", 0),
-                "total_lines": len(normalized.get("lines", []))
-            }),
-            "content": {
-                "text_blocks": normalized.get("text_blocks", []),
-                "lines": normalized.get("lines", []),
-                "tables": normalized.get("tables", [])
-            }
+    requestId = uuid.uuid4().hex
+    output = negotiateOutput(request, req.format, req.layout)
+
+    if req.stream and req.stream not in STREAM_FORMATS:
+        return JSONResponse(
+            content={"success": False, "message": f"Unsupported stream format: {req.stream}"},
+            status_code=400
+        )
+
+    timer = request.state.timer
+    # Docling reads bytes directly, so small uploads for it never touch disk
+    memoryMax = config.UPLOAD_MEMORY_MAX_BYTES if model.lower() == "docling" else 0
+    upload = await spoolUpload(file, memoryMaxBytes=memoryMax)
+    timer.record("upload", timer.total)
+
+    if req.stream:
+        try:
+            # Reject up front: once streaming starts the status code is already 200
+            facade.checkAdmission(model)
+        except Exception:
+            upload.cleanup()
+            raise
+        return StreamingResponse(
+            streamExtraction(model, upload, req.stream, requestId, req.options, timer),
+            media_type=STREAM_MEDIA_TYPES[req.stream],
+            headers={"X-Request-ID": requestId}
+        )
+
+    try:
+        normalized = await facade.extract(model, upload.source, requestId=requestId, fileHash=upload.sha256,
+                                          options=req.options, timer=timer)
+    finally:
+        upload.cleanup()
+    if req.options.isComplete:
+        # Partial extractions are not indexed: they would replace the whole document's blocks
+        facade.indexResults([(upload.sha256, model, file.filename, normalized)])
+
+    with timer.stage("serialize"):
+        response = buildExtractResponse(normalized, model, file.filename, output.layout)
+        rendered = await output.render(response, status_code=200, headers={"X-Request-ID": requestId})
+    rendered.headers["Server-Timing"] = timer.serverTiming()
+
+    metrics.observeRequest(model, "extract", timer, ownStages=("upload", "serialize"))
+    logger.info("Extraction finished", extra={
+        "request_id": requestId,
+        "model": model.lower(),
+        "document": file.filename,
+        "pages": normalized.get("metadata", {}).get("total_pages"),
+        "timings_ms": timer.toDict()
+    })
+    return rendered
+
+async def streamExtraction(model: str, upload: SpooledUpload, fmt: str, requestId: str,
+                           options: ExtractOptions = None, timer: StageTimer = None):
+    # Headers are already sent, so stream timings go to /metrics and the log only
+    timer = timer or StageTimer()
+    try:
+        yield encodeRecord({"type": "header", "model": model.lower(), "filename": upload.filename, "request_id": requestId}, fmt)
+        async for record in facade.extractStream(model, upload.source, requestId=requestId, fileHash=upload.sha256,
+                                                 options=options):
+            yield encodeRecord(record, fmt)
+    except Exception as e:
+        yield encodeRecord({"type": "error", "message": f"{type(e).__name__}: {e}"}, fmt)
+    finally:
+        upload.cleanup()
+        metrics.observeRequest(model, "stream", timer, ownStages=("upload",))
+        logger.info("Stream finished", extra={
+            "request_id": requestId,
+            "model": model.lower(),
+            "document": upload.filename,
+            "duration_ms": round(timer.total * 1000, 2)
+        })
+
+@app.post("/extract/batch")
+async def processBatch(request: Request, req: BatchExtractRequest = Depends(BatchExtractRequest.from_form)):
+    model = req.model
+    requestId = uuid.uuid4().hex
+    output = negotiateOutput(request, req.format, req.layout)
+
+    if not req.files and req.archive is None:
+        return JSONResponse(
+            content={"success": False, "message": "Upload one or more files or a zip archive"},
+            status_code=400
+        )
+    if len(req.files) > config.BATCH_MAX_FILES:
+        return JSONResponse(
+            content={"success": False, "message": f"At most {config.BATCH_MAX_FILES} documents per batch"},
+            status_code=400
+        )
+    try:
+        facade.checkModel(model)
+    except ValueError:
+        return JSONResponse(content={"success": False, "message": f"Unsupported model: {model}"}, status_code=400)
+
+    timer = request.state.timer
+    memoryMax = config.UPLOAD_MEMORY_MAX_BYTES if model.lower() == "docling" else 0
+    uploads = []
+    try:
+        # UPLOAD_MAX_BYTES bounds the whole batch, not each file
+        for file in req.files:
+            remaining = config.UPLOAD_MAX_BYTES - sum(upload.size for upload in uploads)
+            uploads.append(await spoolUpload(file, maxBytes=remaining, memoryMaxBytes=memoryMax))
+
+        if req.archive is not None:
+            archive = await spoolUpload(req.archive)
+            try:
+                uploads.extend(await asyncio.to_thread(
+                    expandArchive, archive,
+                    config.BATCH_MAX_FILES - len(uploads),
+                    config.UPLOAD_MAX_BYTES - sum(upload.size for upload in uploads),
+                    memoryMax
+                ))
+            finally:
+                archive.cleanup()
+    except BaseException as e:
+        for upload in uploads:
+            upload.cleanup()
+        if isinstance(e, UploadTooLargeError):
+            raise UploadTooLargeError(config.UPLOAD_MAX_BYTES) from e
+        raise
+    timer.record("upload", timer.total)
+
+    try:
+        # Per-document stages are recorded by the facade; this is the batch's wall time
+        with timer.stage("extract"):
+            results = await facade.extractBatch(model, [(upload.source, upload.sha256) for upload in uploads],
+                                                requestId=requestId, options=req.options)
+    finally:
+        for upload in uploads:
+            upload.cleanup()
+
+    byFile = {}
+    firstByHash = {}
+    toIndex = []
+    for upload, result in zip(uploads, results):
+        # Keep every entry even when two uploads share a filename
+        name = upload.filename or "document.pdf"
+        suffix = 2
+        while name in byFile:
+            name = f"{upload.filename} ({suffix})"
+            suffix += 1
+
+        if isinstance(result, BaseException):
+            entry = {"success": False, "error": type(result).__name__, "message": str(result)}
+        else:
+            entry = buildExtractResponse(result, model, upload.filename, output.layout)
+        if upload.sha256 in firstByHash:
+            entry["duplicate_of"] = firstByHash[upload.sha256]
+        else:
+            firstByHash[upload.sha256] = name
+            if entry["success"] and req.options.isComplete:
+                toIndex.append((upload.sha256, model, upload.filename, result))
+        byFile[name] = entry
+
+    # One transaction for the whole batch
+    facade.indexResults(toIndex)
+
+    succeeded = sum(1 for entry in byFile.values() if entry["success"])
+    with timer.stage("serialize"):
+        rendered = await output.render(
+            {
+                "success": True,
+                "data": {
+                    "model": model.lower(),
+                    "results": byFile,
+                    "summary": {
+                        "total": len(byFile),
+                        "succeeded": succeeded,
+                        "failed": len(byFile) - succeeded,
+                        "unique_documents": len(firstByHash)
+                    }
+                },
+                "message": f"Extracted {succeeded} of {len(byFile)} documents"
+            },
+            status_code=200,
+            headers={"X-Request-ID": requestId}
+        )
+    rendered.headers["Server-Timing"] = timer.serverTiming()
+
+    metrics.observeRequest(model, "batch", timer, ownStages=("upload", "serialize"))
+    logger.info("Batch finished", extra={
+        "request_id": requestId,
+        "model": model.lower(),
+        "documents": len(byFile),
+        "succeeded": succeeded,
+        "timings_ms": timer.toDict()
+    })
+    return rendered
+
+@app.post("/jobs")
+async def submitJob(req: ExtractRequest = Depends(ExtractRequest.from_form)):
+    file = req.file
+    try:
+        facade.checkModel(req.model)
+    except ValueError:
+        return JSONResponse(content={"success": False, "message": f"Unsupported model: {req.model}"}, status_code=400)
+
+    # Jobs outlive the request, so the upload always goes to its own temp file
+    upload = await spoolUpload(file)
+    job = Job(req.model, file.filename, upload.path, file_hash=upload.sha256, options=req.options)
+
+    try:
+        jobRunner.submit(job)
+    except JobQueueFullError:
+        removeJobUpload(job)
+        raise
+
+    return JSONResponse(
+        content={
+            "success": True,
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}",
+            "result_url": f"/jobs/{job.id}/result"
         },
-        "message": f"Successfully extracted content from {file.filename}"
-    }
-    return JSONResponse(content=response, status_code=200)
+        status_code=202
+    )
+
+@app.get("/jobs/{jobId}")
+async def jobStatus(jobId: str):
+    job = jobRunner.get(jobId)
+    if job is None:
+        return JSONResponse(content={"success": False, "message": f"Unknown job: {jobId}"}, status_code=404)
+    return JSONResponse(content={"success": True, **job.toDict()}, status_code=200)
+
+@app.get("/jobs/{jobId}/result")
+async def jobResult(jobId: str, request: Request, format: Optional[str] = None, layout: Optional[str] = None):
+    job = jobRunner.get(jobId)
+    if job is None:
+        return JSONResponse(content={"success": False, "message": f"Unknown job: {jobId}"}, status_code=404)
+    if job.status == "failed":
+        return JSONResponse(content={"success": False, **job.toDict()}, status_code=500)
+    if not job.done:
+        # Not ready yet: same body as the status endpoint, 202 so clients keep polling
+        return JSONResponse(content={"success": True, **job.toDict()}, status_code=202)
+    output = negotiateOutput(request, format, layout)
+    result = job.result
+    if output.layout == "columnar":
+        result = {**result, "data": {**result["data"], "layout": "columnar",
+                                     "content": columnarContent(result["data"]["content"])}}
+    return await output.render(result, status_code=200)
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8080)
\ No newline at end of file
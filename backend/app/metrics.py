@@ -0,0 +1,102 @@
+from typing import Callable, Dict, Iterable
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+
+from .timing import StageTimer
+
+# Extraction runs from milliseconds (cache hits) to minutes (long scans)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+STAGE_SECONDS = Histogram(
+    "pdf_extract_stage_seconds",
+    "Time spent per request stage (upload, cache, queue, extract, normalize, serialize, ...)",
+    ["model", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "pdf_extract_request_seconds",
+    "End-to-end time per request",
+    ["model", "endpoint"],
+    buckets=STAGE_BUCKETS,
+)
+PAGES_PROCESSED = Counter("pdf_pages_processed_total", "Pages in successfully extracted documents", ["model"])
+TABLES_FOUND = Counter("pdf_tables_found_total", "Tables in successfully extracted documents", ["model"])
+DOCUMENTS = Counter("pdf_documents_total", "Documents extracted, by whether the result came from the cache",
+                    ["model", "cached"])
+MODEL_ERRORS = Counter("pdf_model_errors_total", "Extractions that raised, by exception type", ["model", "error"])
+REJECTED = Counter("pdf_requests_rejected_total", "Requests turned away because a model pool was full", ["model"])
+PAGE_CACHE_PAGES = Counter("pdf_page_cache_pages_total", "Pages reused from the page cache or extracted",
+                           ["model", "result"])
+TABLE_PREFILTER_PAGES = Counter("pdf_table_prefilter_pages_total",
+                                "Pages the OmniDocs table pre-filter sent to Camelot or skipped, by reason", ["reason"])
+ROUTED_PAGES = Counter("pdf_router_pages_total", "Pages model=auto sent to each model, by reason", ["model", "reason"])
+
+
+def observeStages(model: str, stages: Dict[str, float]):
+    model = model.lower()
+    for stage, seconds in stages.items():
+        STAGE_SECONDS.labels(model, stage).observe(seconds)
+
+
+def observeRequest(model: str, endpoint: str, timer: StageTimer, ownStages: Iterable[str] = ()):
+    """
+    Record a finished request: the stages measured by the endpoint itself
+    (the facade records the per-document ones) and its total duration.
+    """
+    observeStages(model, {stage: timer.stages[stage] for stage in ownStages if stage in timer.stages})
+    REQUEST_SECONDS.labels(model.lower(), endpoint).observe(timer.total)
+
+
+def observeResult(model: str, normalized: Dict, cached: bool):
+    model = model.lower()
+    metadata = normalized.get("metadata", {})
+    PAGES_PROCESSED.labels(model).inc(metadata.get("total_pages", 0))
+    TABLES_FOUND.labels(model).inc(metadata.get("total_tables", 0))
+    DOCUMENTS.labels(model, "true" if cached else "false").inc()
+    if not cached:
+        for reason, pages in metadata.get("table_detection", {}).get("reasons", {}).items():
+            TABLE_PREFILTER_PAGES.labels(reason).inc(pages)
+
+
+class ExecutorCollector:
+    """Pool gauges read from ExtractionExecutor.stats() at scrape time"""
+
+    def __init__(self, statsFn: Callable[[], Dict]):
+        self.statsFn = statsFn
+
+    def collect(self):
+        inFlight = GaugeMetricFamily("pdf_executor_in_flight", "Documents running or queued per model", labels=["model"])
+        queued = GaugeMetricFamily("pdf_executor_queue_depth", "Documents waiting for a worker per model", labels=["model"])
+        workers = GaugeMetricFamily("pdf_executor_workers", "Worker count per model pool", labels=["model"])
+        rss = GaugeMetricFamily("pdf_executor_worker_rss_bytes",
+                                "RSS a process pool worker reported after its last document", labels=["model"])
+        recycles = CounterMetricFamily("pdf_executor_recycles",
+                                       "Times a process pool's workers were replaced for exceeding their RSS budget",
+                                       labels=["model"])
+        for model, stats in self.statsFn().items():
+            inFlight.add_metric([model], stats.get("in_flight", 0))
+            queued.add_metric([model], stats.get("queued", 0))
+            workers.add_metric([model], stats.get("workers", 0))
+            recycles.add_metric([model], stats.get("recycles", 0))
+            if stats.get("worker_rss_bytes") is not None:
+                rss.add_metric([model], stats["worker_rss_bytes"])
+        yield inFlight
+        yield queued
+        yield workers
+        yield rss
+        yield recycles
+
+
+collectors = []
+
+
+def registerExecutor(statsFn: Callable[[], Dict]):
+    collector = ExecutorCollector(statsFn)
+    REGISTRY.register(collector)
+    collectors.append(collector)
+
+
+def renderMetrics():
+    """(body, content type) for the /metrics endpoint"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
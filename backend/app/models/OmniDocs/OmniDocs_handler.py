@@ -1,6 +1,8 @@
 from omnidocs.tasks.text_extraction.extractors.pymupdf import PyMuPDFTextExtractor
 from omnidocs.tasks.table_extraction.extractors.camelot import CamelotExtractor
-from omnidocs.tasks.ocr_extraction.extractors.easy_ocr import EasyOCRExtractor
+from app.models.OmniDocs.omnidocs_parallel import extractDocumentParallel, extractDocumentSequential
+from app.utils.uploads import pdfPath
+from app import config
 from threading import Lock
 
 class SingletonOmniDocs:
@@ -13,8 +15,29 @@ class SingletonOmniDocs:
                 cls.omnidocsInstance = super(SingletonOmniDocs, cls).__new__(cls)
                 cls.omnidocsInstance.text_extractor = PyMuPDFTextExtractor()
                 cls.omnidocsInstance.table_extractor = CamelotExtractor(flavor='stream')
-                cls.omnidocsInstance.ocr_extractor = EasyOCRExtractor(languages=['en'])
+                cls.omnidocsInstance._ocr_extractor = None
+                cls.omnidocsInstance._ocr_reader = None
             return cls.omnidocsInstance
+
+    @property
+    def ocr_extractor(self):
+        """EasyOCR (and torch) is only loaded the first time OCR is actually needed"""
+        if self._ocr_extractor is None:
+            with self.lock:
+                if self._ocr_extractor is None:
+                    from omnidocs.tasks.ocr_extraction.extractors.easy_ocr import EasyOCRExtractor
+                    self._ocr_extractor = EasyOCRExtractor(languages=['en'])
+        return self._ocr_extractor
+
+    @property
+    def ocr_reader(self):
+        """EasyOCR reader for page images; batched calls need it directly, not via EasyOCRExtractor"""
+        if self._ocr_reader is None:
+            with self.lock:
+                if self._ocr_reader is None:
+                    import easyocr
+                    self._ocr_reader = easyocr.Reader(config.OCR_LANGUAGES)
+        return self._ocr_reader
         
     def extract_text(self, pdf_path):
         return self.text_extractor.extract(pdf_path)
@@ -23,4 +46,21 @@ class SingletonOmniDocs:
         return self.table_extractor.extract(pdf_path)
     
     def extract_ocr(self, pdf_path):
-        return self.ocr_extractor.extract(pdf_path)
\ No newline at end of file
+        return self.ocr_extractor.extract(pdf_path)
+
+    def extract_ocr_batch(self, images):
+        """(points, text, confidence) detections per image; images must share one size"""
+        return self.ocr_reader.readtext_batched(images, batch_size=len(images))
+
+    def extract_document(self, source, pageRange=None, stages=("text", "tables")):
+        """
+        Text + tables as the raw {"text", "tables"} dict the normalizer expects.
+
+        pageRange is an inclusive, 1-based (first, last) pair; stages not
+        listed (e.g. "tables", which runs Camelot) are skipped entirely.
+        """
+        # PyMuPDF and Camelot both read from a path, so bytes are written out once here
+        with pdfPath(source) as pdf_path:
+            if config.OMNIDOCS_PARALLEL:
+                return extractDocumentParallel(pdf_path, pageRange=pageRange, stages=stages)
+            return extractDocumentSequential(pdf_path, pageRange=pageRange, stages=stages)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+import numpy as np
+
+from app import config
+from app.cache import ResultCache, cacheKey
+from app.router import inspectPage
+
+# Bump whenever the cached OCR blocks change shape so old entries are ignored
+OCR_VERSION = "1"
+
+ocrCache = None
+ocrCacheLock = Lock()
+
+
+def getOcrCache() -> Optional[ResultCache]:
+    """Per-page OCR results, keyed by the rendered page's hash; shared on disk across workers"""
+    global ocrCache
+    if not config.CACHE_ENABLED:
+        return None
+    with ocrCacheLock:
+        if ocrCache is None:
+            cacheDir = os.path.join(config.CACHE_DIR, "ocr") if config.CACHE_DIR else None
+            ocrCache = ResultCache(cacheDir=cacheDir)
+        return ocrCache
+
+
+def findTextlessPages(pdf_path: str, pageRange: Optional[Tuple[int, int]] = None) -> List[int]:
+    """1-based numbers of pages with images but no usable text layer, i.e. scans"""
+    with fitz.open(pdf_path) as doc:
+        first, last = 1, doc.page_count
+        if pageRange:
+            first, last = pageRange[0], min(pageRange[1], doc.page_count)
+        pages = []
+        for number in range(first, last + 1):
+            profile = inspectPage(doc[number - 1], wantRulings=False)
+            if not profile.hasTextLayer and profile.imageCoverage > 0:
+                pages.append(number)
+    return pages
+
+
+def renderPage(page: fitz.Page, dpi: int) -> np.ndarray:
+    """Grayscale raster of a page as an (height, width) uint8 array"""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+
+def pageCacheKey(image: np.ndarray, dpi: int) -> str:
+    # Hash the pixels, not the PDF objects: every scan page has the same one-image content stream
+    pageHash = hashlib.sha256(image.tobytes()).hexdigest()
+    return cacheKey(pageHash, "ocr", OCR_VERSION, f"dpi={dpi};lang={','.join(config.OCR_LANGUAGES)}")
+
+
+def detectionsToBlocks(detections: List, pageNum: int, dpi: int) -> List[Dict]:
+    """
+    EasyOCR (points, text, confidence) detections as OmniDocs-style text blocks.
+
+    Pixel coordinates are scaled back to PDF points so OCR bboxes line up
+    with PyMuPDF ones.
+    """
+    scale = 72.0 / dpi
+    blocks = []
+    for order, (points, text, confidence) in enumerate(detections):
+        xs = [float(point[0]) for point in points]
+        ys = [float(point[1]) for point in points]
+        blocks.append({
+            "text": text,
+            "bbox": [min(xs) * scale, min(ys) * scale, max(xs) * scale, max(ys) * scale],
+            "page_num": pageNum,
+            "confidence": round(float(confidence), 4),
+            "block_type": "ocr",
+            "reading_order": order,
+        })
+    return blocks
+
+
+def recognizeBatch(images: List[np.ndarray]) -> List[List]:
+    """Detections per image; same-sized images share one batched EasyOCR call"""
+    from app.models.OmniDocs.OmniDocs_handler import SingletonOmniDocs
+
+    extractor = SingletonOmniDocs()
+    results: List[Optional[List]] = [None] * len(images)
+    byShape: Dict[Tuple[int, int], List[int]] = {}
+    for index, image in enumerate(images):
+        byShape.setdefault(image.shape, []).append(index)
+
+    for indexes in byShape.values():
+        detections = extractor.extract_ocr_batch([images[index] for index in indexes])
+        for index, pageDetections in zip(indexes, detections):
+            results[index] = pageDetections
+    return results
+
+
+def ocrPages(pdf_path: str, pages: List[int], dpi: int = None, batchPages: int = None) -> List[Dict]:
+    """
+    OCR the given 1-based pages and return their text blocks.
+
+    Pages are rendered batchPages at a time so memory stays bounded; pages
+    whose pixels were OCRed before (in any document) come from the cache.
+    """
+    dpi = dpi or config.OCR_DPI
+    batchPages = batchPages or config.OCR_BATCH_PAGES
+    minConfidence = config.OCR_MIN_CONFIDENCE_PCT / 100
+    cache = getOcrCache()
+
+    blocks = []
+    with fitz.open(pdf_path) as doc:
+        for start in range(0, len(pages), batchPages):
+            batch = pages[start:start + batchPages]
+            # key -> (image, page numbers sharing it); repeated pages are OCRed once
+            pending: Dict[str, Tuple[np.ndarray, List[int]]] = {}
+            for pageNum in batch:
+                image = renderPage(doc[pageNum - 1], dpi)
+                key = pageCacheKey(image, dpi)
+                if key in pending:
+                    pending[key][1].append(pageNum)
+                    continue
+                cached = cache.get(key) if cache is not None else None
+                if cached is not None:
+                    blocks.extend(dict(block, page_num=pageNum) for block in cached["blocks"])
+                else:
+                    pending[key] = (image, [pageNum])
+
+            if not pending:
+                continue
+            detections = recognizeBatch([image for image, _ in pending.values()])
+            for (key, (_, pageNums)), pageDetections in zip(pending.items(), detections):
+                pageBlocks = detectionsToBlocks(pageDetections, pageNums[0], dpi)
+                if cache is not None:
+                    cache.put(key, {"blocks": pageBlocks})
+                for pageNum in pageNums:
+                    blocks.extend(dict(block, page_num=pageNum) for block in pageBlocks)
+
+    return [block for block in blocks if block["confidence"] >= minConfidence and block["text"].strip()]
@@ -0,0 +1,250 @@
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz
+
+from app import config
+from app.models.OmniDocs.omnidocs_ocr import findTextlessPages, ocrPages
+from app.models.OmniDocs.omnidocs_tables import detectTablePages, writePages
+from app.timing import recordStage, timedStage
+
+STAGES = ("text", "tables")
+
+pagePool = None
+pagePoolLock = Lock()
+
+
+def outputToDict(output: Any) -> Dict:
+    """Convert an OmniDocs Pydantic output model to a plain dictionary"""
+    if isinstance(output, dict):
+        return output
+    if hasattr(output, 'model_dump'):
+        # Pydantic v2
+        return output.model_dump()
+    if hasattr(output, 'dict'):
+        # Pydantic v1
+        return output.dict()
+    # Fallback: try to convert to dict manually
+    return dict(output.__dict__)
+
+
+def getPagePool() -> ProcessPoolExecutor:
+    """Process pool shared by every OmniDocs request in this process"""
+    global pagePool
+    with pagePoolLock:
+        if pagePool is None:
+            workers = config.OMNIDOCS_PAGE_WORKERS or os.cpu_count() or 1
+            # spawn, not fork: the API process runs threads that must not be forked mid-lock
+            pagePool = ProcessPoolExecutor(max_workers=workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+        return pagePool
+
+
+def shutdownPagePool():
+    global pagePool
+    with pagePoolLock:
+        if pagePool is not None:
+            pagePool.shutdown(wait=True)
+            pagePool = None
+
+
+def splitPdf(pdf_path: str, chunkPages: int, outDir: str,
+             firstPage: int = 0, lastPage: int = None) -> List[Tuple[str, int]]:
+    """
+    Split pages firstPage..lastPage (0-based, inclusive) of a PDF into page-range files.
+
+    Returns (chunk_path, page_offset) pairs where page_offset is the number
+    of pages preceding the chunk in the original document.
+    """
+    chunks = []
+    with fitz.open(pdf_path) as src:
+        last = src.page_count - 1 if lastPage is None else min(lastPage, src.page_count - 1)
+        for start in range(firstPage, last + 1, chunkPages):
+            end = min(start + chunkPages - 1, last)
+            chunkPath = os.path.join(outDir, f"pages_{start + 1}_{end + 1}.pdf")
+            with fitz.open() as chunk:
+                chunk.insert_pdf(src, from_page=start, to_page=end)
+                chunk.save(chunkPath)
+            chunks.append((chunkPath, start))
+    return chunks
+
+
+def planChunks(pdf_path: str, chunkPages: int, outDir: str,
+               pageRange: Optional[Tuple[int, int]] = None) -> List[Tuple[str, int]]:
+    """
+    Chunks covering the requested pages (1-based, inclusive pageRange).
+
+    The original file is used as-is when it is a single chunk already;
+    a range past the end of the document yields no chunks.
+    """
+    with fitz.open(pdf_path) as doc:
+        totalPages = doc.page_count
+
+    firstPage, lastPage = 0, totalPages - 1
+    if pageRange:
+        firstPage, lastPage = pageRange[0] - 1, min(pageRange[1], totalPages) - 1
+    if firstPage > lastPage:
+        return []
+    if firstPage == 0 and lastPage == totalPages - 1 and totalPages <= chunkPages:
+        return [(pdf_path, 0)]
+    return splitPdf(pdf_path, chunkPages, outDir, firstPage, lastPage)
+
+
+def extractChunk(stage: str, chunk_path: str, pageOffset: int) -> Dict:
+    """Worker entry point: run one stage over one chunk and remap page numbers"""
+    from app.models.OmniDocs.OmniDocs_handler import SingletonOmniDocs
+
+    extractor = SingletonOmniDocs()
+    if stage == "text":
+        result = outputToDict(extractor.extract_text(chunk_path))
+        items = result.get("text_blocks") or []
+    elif config.TABLE_PREFILTER_ENABLED:
+        result = extractCandidateTables(extractor, chunk_path)
+        items = result.get("tables") or []
+    else:
+        result = outputToDict(extractor.extract_tables(chunk_path))
+        items = result.get("tables") or []
+
+    if pageOffset:
+        for item in items:
+            item["page_num"] = (item.get("page_num") or 1) + pageOffset
+        for decision in result.get("table_detection", []):
+            decision["page"] += pageOffset
+    return result
+
+
+def extractCandidateTables(extractor, chunk_path: str) -> Dict:
+    """
+    Camelot on just the pages of a chunk the table detector picked.
+
+    The detector's per-page decisions are returned under "table_detection"
+    (with the seconds it took) so they end up in the result metadata.
+    """
+    start = time.perf_counter()
+    decisions = detectTablePages(chunk_path)
+    candidates = [decision.page for decision in decisions if decision.candidate]
+    detectSeconds = time.perf_counter() - start
+
+    if len(candidates) == len(decisions):
+        result = outputToDict(extractor.extract_tables(chunk_path))
+    elif not candidates:
+        result = {"tables": []}
+    else:
+        fd, subsetPath = tempfile.mkstemp(prefix="omnidocs_tables_", suffix=".pdf")
+        os.close(fd)
+        try:
+            writePages(chunk_path, candidates, subsetPath)
+            result = outputToDict(extractor.extract_tables(subsetPath))
+        finally:
+            os.remove(subsetPath)
+        # Camelot numbered the subset's pages; map them back to the chunk's
+        for table in result.get("tables") or []:
+            table["page_num"] = candidates[(table.get("page_num") or 1) - 1]
+
+    result["table_detection"] = [decision.toDict() for decision in decisions]
+    result["table_detection_seconds"] = detectSeconds
+    return result
+
+
+def mergeStage(parts: List[Dict], listKey: str) -> Dict:
+    """Concatenate per-chunk outputs of one stage, keeping chunk order"""
+    if not parts:
+        return {listKey: []}
+
+    merged = dict(parts[0])
+    merged[listKey] = []
+    for part in parts:
+        merged[listKey].extend(part.get(listKey) or [])
+
+    if listKey == "text_blocks" and any("full_text" in part for part in parts):
+        merged["full_text"] = "\n".join(part.get("full_text") or "" for part in parts)
+    if any(isinstance(part.get("page_count"), int) for part in parts):
+        merged["page_count"] = sum(part.get("page_count") or 0 for part in parts)
+    if any("table_detection" in part for part in parts):
+        merged["table_detection"] = [decision for part in parts for decision in part.get("table_detection", [])]
+        merged["table_detection_seconds"] = sum(part.get("table_detection_seconds", 0.0) for part in parts)
+    return merged
+
+
+def runOcr(pdf_path: str, pageRange: Optional[Tuple[int, int]] = None) -> Tuple[List[int], List[Dict]]:
+    """Pages in range that have no text layer, and their OCR text blocks"""
+    if not config.OCR_ENABLED:
+        return [], []
+    with timedStage("extract_ocr"):
+        pages = findTextlessPages(pdf_path, pageRange)
+        return pages, ocrPages(pdf_path, pages) if pages else []
+
+
+def withOcr(text: Dict, pages: List[int], blocks: List[Dict]) -> Dict:
+    """Add OCR blocks to a merged text stage; the normalizer sorts them into page order"""
+    if pages:
+        text["text_blocks"] = text["text_blocks"] + blocks
+        text["ocr_pages"] = pages
+    return text
+
+
+def extractDocumentParallel(pdf_path: str, chunkPages: int = None,
+                            pageRange: Optional[Tuple[int, int]] = None,
+                            stages: Tuple[str, ...] = STAGES) -> Dict:
+    """
+    Run text and table extraction concurrently, fanned out over page ranges.
+
+    Returns the {"text": ..., "tables": ...} structure normalizeOmnidocsResult
+    consumes, with page numbers relative to the original document. Only the
+    pages in pageRange are extracted, and stages not listed are skipped.
+    """
+    chunkPages = chunkPages or config.OMNIDOCS_CHUNK_PAGES
+    pool = getPagePool()
+    workDir = tempfile.mkdtemp(prefix="omnidocs_chunks_")
+
+    try:
+        chunks = planChunks(pdf_path, chunkPages, workDir, pageRange)
+
+        # Submit every table chunk first: Camelot is the long pole
+        start = time.perf_counter()
+        futures = {stage: [pool.submit(extractChunk, stage, path, offset) for path, offset in chunks]
+                   for stage in ("tables", "text") if stage in stages}
+        # OCR runs here, on the scanned pages only, while the pool works through the chunks
+        ocrFound, ocrBlocks = runOcr(pdf_path, pageRange) if "text" in stages else ([], [])
+        parts = {}
+        for stage, stageFutures in futures.items():
+            parts[stage] = [future.result() for future in stageFutures]
+            # Stages overlap: each is timed from submission until its last chunk is back
+            recordStage(f"extract_{stage}", time.perf_counter() - start)
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    return {
+        "text": withOcr(mergeStage(parts.get("text", []), "text_blocks"), ocrFound, ocrBlocks),
+        "tables": mergeStage(parts.get("tables", []), "tables")
+    }
+
+
+def extractDocumentSequential(pdf_path: str,
+                              pageRange: Optional[Tuple[int, int]] = None,
+                              stages: Tuple[str, ...] = STAGES) -> Dict:
+    """In-process counterpart of extractDocumentParallel, one stage after the other"""
+    workDir = tempfile.mkdtemp(prefix="omnidocs_pages_")
+    try:
+        chunkPages = sys.maxsize if pageRange is None else pageRange[1] - pageRange[0] + 1
+        chunks = planChunks(pdf_path, chunkPages, workDir, pageRange)
+        parts = {}
+        for stage in ("text", "tables"):
+            if stage in stages:
+                with timedStage(f"extract_{stage}"):
+                    parts[stage] = [extractChunk(stage, path, offset) for path, offset in chunks]
+        ocrFound, ocrBlocks = runOcr(pdf_path, pageRange) if "text" in stages else ([], [])
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    return {
+        "text": withOcr(mergeStage(parts.get("text", []), "text_blocks"), ocrFound, ocrBlocks),
+        "tables": mergeStage(parts.get("tables", []), "tables")
+    }
@@ -0,0 +1,141 @@
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+
+from app import config
+from app.router import rulingSegments
+
+# Cell edges (start, end or centre) of two rows within this many points line up as one column
+COLUMN_TOLERANCE = 4.0
+
+# Words on one row sit within this many points of the row's baseline
+ROW_TOLERANCE = 2.0
+
+Box = Tuple[float, float, float, float]
+
+
+class TableDecision:
+    """Whether Camelot should look at a page, why, and where the candidate tables are"""
+
+    def __init__(self, page: int, reason: str, regions: Optional[List[Box]] = None):
+        self.page = page
+        self.reason = reason
+        self.regions = regions or []
+
+    @property
+    def candidate(self) -> bool:
+        return self.reason in ("ruled", "aligned_columns")
+
+    def toDict(self) -> Dict:
+        return {
+            "page": self.page,
+            "reason": self.reason,
+            "regions": [[round(value, 1) for value in box] for box in self.regions],
+        }
+
+
+def unionBox(boxes: List[Box]) -> Box:
+    return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+
+def textRows(page: fitz.Page) -> List[List[Box]]:
+    """
+    Words grouped into rows by baseline, each row split into cells at gaps
+    wider than TABLE_COLUMN_GAP_PT. Rows are in top-to-bottom order.
+    """
+    words = sorted(page.get_text("words"), key=lambda word: (round(word[3]), word[0]))
+    rows: List[List[Tuple[float, float, float, float]]] = []
+    for x0, y0, x1, y1, *_ in words:
+        if rows and abs(rows[-1][0][3] - y1) <= ROW_TOLERANCE:
+            rows[-1].append((x0, y0, x1, y1))
+        else:
+            rows.append([(x0, y0, x1, y1)])
+
+    cellRows = []
+    for row in rows:
+        row.sort()
+        cells = [list(row[0])]
+        for x0, y0, x1, y1 in row[1:]:
+            if x0 - cells[-1][2] >= config.TABLE_COLUMN_GAP_PT:
+                cells.append([x0, y0, x1, y1])
+            else:
+                cells[-1][1] = min(cells[-1][1], y0)
+                cells[-1][2] = max(cells[-1][2], x1)
+                cells[-1][3] = max(cells[-1][3], y1)
+        cellRows.append([tuple(cell) for cell in cells])
+    return cellRows
+
+
+def alignedColumns(upper: List[Box], lower: List[Box]) -> int:
+    """Cells of the lower row whose left edge, right edge or centre lines up with a cell above"""
+    aligned = 0
+    for cell in lower:
+        for other in upper:
+            if (abs(cell[0] - other[0]) <= COLUMN_TOLERANCE or abs(cell[2] - other[2]) <= COLUMN_TOLERANCE
+                    or abs((cell[0] + cell[2]) - (other[0] + other[2])) <= 2 * COLUMN_TOLERANCE):
+                aligned += 1
+                break
+    return aligned
+
+
+def alignedColumnRegions(page: fitz.Page) -> List[Box]:
+    """
+    Runs of at least TABLE_MIN_ROWS consecutive rows with TABLE_MIN_COLUMNS
+    cells or more, where each row lines up with the one above in at least
+    that many columns: the layout Camelot's stream flavor looks for.
+    """
+    minColumns, minRows = config.TABLE_MIN_COLUMNS, config.TABLE_MIN_ROWS
+    regions: List[Box] = []
+    run: List[List[Box]] = []
+
+    def closeRun():
+        if len(run) >= minRows:
+            regions.append(unionBox([cell for row in run for cell in row]))
+        run.clear()
+
+    for row in textRows(page):
+        # Body text, or a row that does not line up with the one above, ends the run
+        if len(row) < minColumns or (run and alignedColumns(run[-1], row) < minColumns):
+            closeRun()
+        if len(row) >= minColumns:
+            run.append(row)
+    closeRun()
+    return regions
+
+
+def decideTablePage(page: fitz.Page) -> TableDecision:
+    """
+    Cheap look at one page: ruling lines first, then aligned text columns.
+
+    Pages without any text are skipped too: Camelot reads the text layer
+    and finds nothing on scans.
+    """
+    number = page.number + 1
+    if not page.get_text("text").strip():
+        return TableDecision(number, "no_text")
+
+    horizontal, vertical = [], []
+    for orientation, box in rulingSegments(page):
+        (horizontal if orientation == "h" else vertical).append(box)
+    if min(len(horizontal), len(vertical)) >= config.ROUTER_MIN_RULINGS:
+        return TableDecision(number, "ruled", [unionBox(horizontal + vertical)])
+
+    regions = alignedColumnRegions(page)
+    if regions:
+        return TableDecision(number, "aligned_columns", regions)
+    return TableDecision(number, "no_table")
+
+
+def detectTablePages(pdf_path: str) -> List[TableDecision]:
+    """A decision for every page of the PDF, in page order"""
+    with fitz.open(pdf_path) as doc:
+        return [decideTablePage(page) for page in doc]
+
+
+def writePages(pdf_path: str, pages: List[int], outPath: str):
+    """Copy the given 1-based pages of a PDF, in order, into a new file"""
+    with fitz.open(pdf_path) as src, fitz.open() as subset:
+        for page in pages:
+            subset.insert_pdf(src, from_page=page - 1, to_page=page - 1)
+        subset.save(outPath)
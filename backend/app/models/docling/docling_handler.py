@@ -1,16 +1,74 @@
-from docling.document_converter import DocumentConverter
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import AcceleratorOptions, PdfPipelineOptions, TableFormerMode
+from docling.document_converter import DocumentConverter, PdfFormatOption
+from app import config
+from app.schemas.options import DOCLING_PROFILES
 from threading import Lock
+from io import BytesIO
+
+def buildPipelineOptions(profile: str) -> PdfPipelineOptions:
+    """
+    Pipeline options for a named profile.
+
+    "accurate" is Docling's default pipeline (OCR, accurate TableFormer);
+    "balanced" keeps OCR but uses the fast table model; "fast" also skips
+    OCR and never renders page or picture images. Thread counts are not
+    part of a profile: torch's intra-op pool is process-wide, so the last
+    converter built would set it for all of them.
+    """
+    if profile not in DOCLING_PROFILES:
+        raise ValueError(f"Unknown Docling profile: {profile}")
+
+    options = PdfPipelineOptions()
+    options.accelerator_options = AcceleratorOptions(num_threads=config.DOCLING_THREADS)
+    if profile in ("fast", "balanced"):
+        options.table_structure_options.mode = TableFormerMode.FAST
+    if profile == "fast":
+        options.do_ocr = False
+        options.generate_page_images = False
+        options.generate_picture_images = False
+    return options
 
 class SingletonDocling:
     doclingInstance = None
     lock = Lock()
-    
+    converterLock = Lock()
+
     def __new__(cls):
         with cls.lock:
             if cls.doclingInstance is None:
                 cls.doclingInstance = super(SingletonDocling, cls).__new__(cls)
-                cls.doclingInstance.converter = DocumentConverter()
+                cls.doclingInstance.converters = {}
+                for profile in config.DOCLING_PRELOAD_PROFILES:
+                    cls.doclingInstance.getConverter(profile)
             return cls.doclingInstance
-        
-    def convert(self, source):
-        return self.converter.convert(source)
\ No newline at end of file
+
+    @property
+    def converter(self):
+        return self.getConverter(config.DOCLING_PROFILE)
+
+    def getConverter(self, profile: str) -> DocumentConverter:
+        """The profile's converter, built and loaded once and then kept warm"""
+        converter = self.converters.get(profile)
+        if converter is None:
+            with self.converterLock:
+                converter = self.converters.get(profile)
+                if converter is None:
+                    converter = DocumentConverter(format_options={
+                        InputFormat.PDF: PdfFormatOption(pipeline_options=buildPipelineOptions(profile))
+                    })
+                    # Load the layout, table and OCR models now, not on the profile's first document
+                    converter.initialize_pipeline(InputFormat.PDF)
+                    self.converters[profile] = converter
+        return converter
+
+    def convert(self, source, name="document.pdf", pageRange=None, profile=None):
+        converter = self.getConverter(profile or config.DOCLING_PROFILE)
+        # In-memory uploads go straight to Docling without a temp file
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            from docling.datamodel.base_models import DocumentStream
+            source = DocumentStream(name=name, stream=BytesIO(source))
+        if pageRange:
+            # Docling only parses and runs layout/table models on pages in range
+            return converter.convert(source, page_range=pageRange)
+        return converter.convert(source)
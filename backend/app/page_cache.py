@@ -0,0 +1,180 @@
+import hashlib
+import os
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+from .cache import ResultCache, cacheKey
+from .schemas.options import ExtractOptions
+from .utils.normalizerOmin import summarizeTableDetection, tableDecisions
+from .utils.streaming import pagesFromNormalized
+from .utils.uploads import PdfSource
+
+
+def pageHashes(source: PdfSource, pageRange: Optional[Tuple[int, int]] = None) -> Dict[int, str]:
+    """
+    SHA-256 per page (1-based) of what the page draws: its content streams,
+    the images it places, its fonts, size and rotation.
+
+    A revised document keeps the hashes of the pages that did not change,
+    wherever they moved to.
+    """
+    import fitz
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=bytes(source), filetype="pdf")
+    else:
+        doc = fitz.open(source)
+
+    # Images and fonts are usually shared between pages; hash each stream once
+    streamDigests: Dict[int, bytes] = {}
+
+    def streamDigest(xref: int) -> bytes:
+        if xref not in streamDigests:
+            streamDigests[xref] = hashlib.sha256(doc.xref_stream_raw(xref) or b"").digest() if xref else b""
+        return streamDigests[xref]
+
+    hashes = {}
+    with doc:
+        first, last = 1, doc.page_count
+        if pageRange:
+            first, last = pageRange[0], min(pageRange[1], doc.page_count)
+        for number in range(first, last + 1):
+            page = doc[number - 1]
+            digest = hashlib.sha256()
+            digest.update(f"{tuple(page.rect)}:{page.rotation}".encode("utf-8"))
+            digest.update(page.read_contents())
+            for xobject in page.get_xobjects():
+                digest.update(streamDigest(xobject[0]))
+            for image in page.get_images(full=True):
+                digest.update(streamDigest(image[0]))
+            for font in page.get_fonts(full=True):
+                # Subset fonts carry a random prefix (ABCDEF+Name); the embedded program identifies them
+                digest.update(font[3].split("+", 1)[-1].encode("utf-8"))
+                digest.update(streamDigest(font[0]))
+            hashes[number] = digest.hexdigest()
+    return hashes
+
+
+def changedRuns(pages: List[int], maxRuns: int) -> List[Tuple[int, int]]:
+    """
+    Group page numbers into inclusive (first, last) runs of consecutive pages.
+
+    More than maxRuns runs collapse into one spanning them all: a model call
+    per scattered page costs more than re-extracting the pages in between.
+    """
+    runs: List[Tuple[int, int]] = []
+    for page in sorted(pages):
+        if runs and runs[-1][1] == page - 1:
+            runs[-1] = (runs[-1][0], page)
+        else:
+            runs.append((page, page))
+    if len(runs) > maxRuns:
+        return [(runs[0][0], runs[-1][1])]
+    return runs
+
+
+def emptyPage(page: int) -> Dict:
+    return {"page": page, "text_blocks": [], "lines": [], "tables": []}
+
+
+def splitPages(normalized: Dict, pages: List[int]) -> Dict[int, Dict]:
+    """
+    Per-page records for the given pages of a normalized result; pages
+    without content are empty. A page the table pre-filter checked keeps
+    its decision (reason, regions) under "table_detection".
+    """
+    records = {record["page"]: record for record in pagesFromNormalized(normalized)}
+    decisions = tableDecisions(normalized.get("metadata", {}).get("table_detection", {}))
+    split = {}
+    for page in pages:
+        record = records.get(page) or emptyPage(page)
+        if page in decisions:
+            record["table_detection"] = {"reason": decisions[page]["reason"], "regions": decisions[page]["regions"]}
+        split[page] = record
+    return split
+
+
+def movePage(record: Dict, page: int) -> Dict:
+    """A cached page record renumbered to where the page sits in this document"""
+    return {
+        "page": page,
+        "text_blocks": [dict(block, page=page) for block in record["text_blocks"]],
+        "lines": list(record["lines"]),
+        "tables": [dict(table, page=page) for table in record["tables"]],
+        **({"table_detection": record["table_detection"]} if "table_detection" in record else {}),
+    }
+
+
+def assemblePages(model: str, records: Dict[int, Dict], tableDetectionSeconds: float = 0.0) -> Dict:
+    """
+    A normalized result built from page records, matching what the model's
+    normalizer reports for the same pages. tableDetectionSeconds is the
+    pre-filter time spent on the pages extracted for this request.
+    """
+    ordered = [records[page] for page in sorted(records)]
+    normalized = {
+        "model": model,
+        "text_blocks": [block for record in ordered for block in record["text_blocks"]],
+        "tables": [table for record in ordered for table in record["tables"]],
+        "lines": [line for record in ordered for line in record["lines"]],
+    }
+    metadata = {
+        "total_pages": len(ordered),
+        "total_text_blocks": len(normalized["text_blocks"]),
+        "total_tables": len(normalized["tables"]),
+    }
+    if model == "omnidocs":
+        # normalizeOmnidocsResult counts pages with content, and at least one
+        metadata["total_pages"] = sum(1 for record in ordered if record["text_blocks"] or record["tables"]) or 1
+        metadata["total_lines"] = len(normalized["lines"])
+        ocrPages = [record["page"] for record in ordered
+                    if any(block.get("block_type") == "ocr" for block in record["text_blocks"])]
+        if ocrPages:
+            metadata["ocr_pages"] = ocrPages
+        decisions = [{"page": record["page"], **record["table_detection"]}
+                     for record in ordered if "table_detection" in record]
+        if decisions:
+            metadata["table_detection"] = summarizeTableDetection(decisions, tableDetectionSeconds)
+    normalized["metadata"] = metadata
+    return normalized
+
+
+class PageCache:
+    """
+    Normalized page records keyed by page hash, model, normalizer version,
+    the stages extracted and the Docling profile, so a revised document only re-extracts the
+    pages that changed.
+    """
+
+    def __init__(self, cache: ResultCache = None):
+        if cache is None:
+            cacheDir = os.path.join(config.CACHE_DIR, "pages") if config.CACHE_DIR else None
+            cache = ResultCache(cacheDir=cacheDir, maxMemoryEntries=config.PAGE_CACHE_MEMORY_ENTRIES)
+        self.cache = cache
+
+    @staticmethod
+    def key(pageHash: str, model: str, normalizerVersion: str, options: ExtractOptions) -> str:
+        stages = ",".join(stage for stage, needed in (("text", options.needsText), ("tables", options.needsTables))
+                          if needed)
+        variant = f"stages={stages}"
+        if model == "docling":
+            variant += f";profile={options.doclingProfile}"
+        return cacheKey(pageHash, model, normalizerVersion, variant)
+
+    def getMany(self, hashes: Dict[int, str], model: str, normalizerVersion: str,
+                options: ExtractOptions) -> Dict[int, Dict]:
+        """Cached records for the pages that have one, renumbered to their page here"""
+        found = {}
+        for page, pageHash in hashes.items():
+            record = self.cache.get(self.key(pageHash, model, normalizerVersion, options))
+            if record is not None:
+                found[page] = movePage(record, page)
+        return found
+
+    def putMany(self, hashes: Dict[int, str], records: Dict[int, Dict], model: str, normalizerVersion: str,
+                options: ExtractOptions):
+        for page, record in records.items():
+            self.cache.put(self.key(hashes[page], model, normalizerVersion, options), record)
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
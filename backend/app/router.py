@@ -0,0 +1,241 @@
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from . import config
+from .schemas.options import ExtractOptions
+from .utils.uploads import PdfSource
+
+AUTO_MODEL = "auto"
+
+# Cheapest first: a document only goes to a heavier model when a page needs it
+ROUTE_COST = {
+    "omnidocs": 0,
+    "docling": 1,
+}
+
+# Ruling segments shorter than this (in points) are underlines or tick marks, not table borders
+MIN_RULING_LENGTH = 20
+
+
+class PageProfile:
+    """What a cheap look at one page found: text layer, images and ruling lines"""
+
+    def __init__(self, page: int, chars: int, textCoverage: float, imageCoverage: float,
+                 horizontalRulings: int = 0, verticalRulings: int = 0):
+        self.page = page
+        self.chars = chars
+        self.textCoverage = textCoverage
+        self.imageCoverage = imageCoverage
+        self.horizontalRulings = horizontalRulings
+        self.verticalRulings = verticalRulings
+
+    @property
+    def hasTextLayer(self) -> bool:
+        return self.chars >= config.ROUTER_MIN_PAGE_CHARS
+
+    @property
+    def hasRuledTable(self) -> bool:
+        return min(self.horizontalRulings, self.verticalRulings) >= config.ROUTER_MIN_RULINGS
+
+
+def rulingSegments(page: "fitz.Page") -> Iterator[Tuple[str, Tuple[float, float, float, float]]]:
+    """("h" or "v", (x0, y0, x1, y1)) for each table border or cell edge drawn on the page"""
+    for path in page.get_drawings():
+        for item in path["items"]:
+            if item[0] == "l":
+                start, end = item[1], item[2]
+                box = (min(start.x, end.x), min(start.y, end.y), max(start.x, end.x), max(start.y, end.y))
+                if abs(start.y - end.y) < 1 and abs(start.x - end.x) >= MIN_RULING_LENGTH:
+                    yield "h", box
+                elif abs(start.x - end.x) < 1 and abs(start.y - end.y) >= MIN_RULING_LENGTH:
+                    yield "v", box
+            elif item[0] == "re":
+                rect = item[1]
+                box = (rect.x0, rect.y0, rect.x1, rect.y1)
+                if rect.height < 2 and rect.width >= MIN_RULING_LENGTH:
+                    yield "h", box
+                elif rect.width < 2 and rect.height >= MIN_RULING_LENGTH:
+                    yield "v", box
+                elif rect.width >= MIN_RULING_LENGTH and rect.height >= 2:
+                    # A stroked cell box: two borders each way
+                    yield "h", box
+                    yield "h", box
+                    yield "v", box
+                    yield "v", box
+
+
+def countRulings(page: "fitz.Page") -> Tuple[int, int]:
+    """Horizontal and vertical line segments drawn on the page (table borders and cell boxes)"""
+    horizontal = vertical = 0
+    for orientation, _ in rulingSegments(page):
+        if orientation == "h":
+            horizontal += 1
+        else:
+            vertical += 1
+    return horizontal, vertical
+
+
+def inspectPage(page: "fitz.Page", wantRulings: bool = True) -> PageProfile:
+    import fitz
+
+    pageArea = abs(page.rect) or 1.0
+
+    chars = 0
+    textArea = 0.0
+    for x0, y0, x1, y1, text, _, blockType in page.get_text("blocks"):
+        if blockType == 0:
+            chars += len(text.strip())
+            textArea += (x1 - x0) * (y1 - y0)
+
+    imageArea = 0.0
+    for image in page.get_image_info():
+        imageArea += abs(fitz.Rect(image["bbox"]) & page.rect)
+
+    profile = PageProfile(page.number + 1, chars,
+                          textCoverage=min(textArea / pageArea, 1.0),
+                          imageCoverage=min(imageArea / pageArea, 1.0))
+    # Vector drawings are the slow part; scanned pages have none worth reading
+    if wantRulings and profile.hasTextLayer:
+        profile.horizontalRulings, profile.verticalRulings = countRulings(page)
+    return profile
+
+
+def routePage(profile: PageProfile, options: ExtractOptions) -> Tuple[str, str]:
+    """(model, reason) for one page"""
+    mostlyImage = profile.imageCoverage * 100 >= config.ROUTER_IMAGE_COVERAGE_PCT
+    if not profile.hasTextLayer:
+        if mostlyImage:
+            # OmniDocs OCRs just these pages when OCR is on; Docling's pipeline OCRs them otherwise
+            return ("omnidocs" if config.OCR_ENABLED else "docling"), "scanned"
+        return "omnidocs", "blank"
+    if mostlyImage and profile.textCoverage * 100 < config.ROUTER_MIN_TEXT_COVERAGE_PCT:
+        return "docling", "partial_text_layer"
+    if options.needsTables and profile.hasRuledTable:
+        # Camelot's stream flavor misreads ruled grids with spanning cells
+        return "docling", "ruled_table"
+    return "omnidocs", "text_layer"
+
+
+class RouteSegment:
+    """A run of consecutive pages sent to one model"""
+
+    def __init__(self, model: str, firstPage: int, lastPage: int, reasons: Optional[Counter] = None):
+        self.model = model
+        self.firstPage = firstPage
+        self.lastPage = lastPage
+        self.reasons = reasons if reasons is not None else Counter()
+
+    def toDict(self) -> Dict:
+        return {
+            "model": self.model,
+            "pages": [self.firstPage, self.lastPage],
+            "reasons": dict(self.reasons),
+        }
+
+
+class RoutePlan:
+    """Where each page of a document goes, and whether it was split by page"""
+
+    def __init__(self, totalPages: int, segments: List[RouteSegment], mode: str):
+        self.totalPages = totalPages
+        self.segments = segments
+        self.mode = mode
+
+    @property
+    def pageCount(self) -> int:
+        """Pages the segments span: the requested range, blank pages included"""
+        return sum(segment.lastPage - segment.firstPage + 1 for segment in self.segments)
+
+    @property
+    def reasons(self) -> Counter:
+        total = Counter()
+        for segment in self.segments:
+            total.update(segment.reasons)
+        return total
+
+    def toDict(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "segments": [segment.toDict() for segment in self.segments],
+        }
+
+
+def planFromProfiles(profiles: List[PageProfile], totalPages: int, options: ExtractOptions) -> RoutePlan:
+    """
+    Group per-page decisions into segments.
+
+    Short documents, and documents that would split into too many segments,
+    go to a single model: the heaviest one any page needs.
+    """
+    segments: List[RouteSegment] = []
+    for profile in profiles:
+        model, reason = routePage(profile, options)
+        if segments and segments[-1].model == model and segments[-1].lastPage == profile.page - 1:
+            segments[-1].lastPage = profile.page
+        else:
+            segments.append(RouteSegment(model, profile.page, profile.page))
+        segments[-1].reasons[reason] += 1
+
+    if len(segments) <= 1:
+        return RoutePlan(totalPages, segments, "document")
+    if len(profiles) >= config.ROUTER_SPLIT_MIN_PAGES and len(segments) <= config.ROUTER_MAX_SEGMENTS:
+        return RoutePlan(totalPages, segments, "pages")
+
+    model = max((segment.model for segment in segments), key=ROUTE_COST.__getitem__)
+    whole = RouteSegment(model, segments[0].firstPage, segments[-1].lastPage)
+    for segment in segments:
+        whole.reasons.update(segment.reasons)
+    return RoutePlan(totalPages, [whole], "document")
+
+
+def planRoute(source: PdfSource, options: ExtractOptions = None) -> RoutePlan:
+    """
+    Inspect the requested pages of a PDF and decide which model extracts each.
+
+    Only the text layer, image placements and vector drawings are read, so
+    this costs milliseconds per page even on long documents.
+    """
+    # PyMuPDF is only imported once a document is actually routed
+    import fitz
+
+    options = options or ExtractOptions()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=bytes(source), filetype="pdf")
+    else:
+        doc = fitz.open(source)
+
+    with doc:
+        totalPages = doc.page_count
+        first, last = 1, totalPages
+        if options.pages:
+            first, last = options.pages[0], min(options.pages[1], totalPages)
+        profiles = [inspectPage(doc[number - 1], wantRulings=options.needsTables)
+                    for number in range(first, last + 1)]
+    return planFromProfiles(profiles, totalPages, options)
+
+
+def mergeSegments(parts: List[Dict], plan: RoutePlan) -> Dict:
+    """
+    Combine the normalized results of each segment, in page order, and
+    report the plan as metadata["route"].
+    """
+    if len(parts) == 1:
+        merged = dict(parts[0])
+        metadata = dict(merged.get("metadata", {}))
+    else:
+        merged = {
+            "text_blocks": [block for part in parts for block in part.get("text_blocks", [])],
+            "tables": [table for part in parts for table in part.get("tables", [])],
+            "lines": [line for part in parts for line in part.get("lines", [])],
+        }
+        metadata = {
+            # Segments may count only pages with content (OmniDocs); the plan knows every page it routed
+            "total_pages": plan.pageCount,
+            "total_text_blocks": len(merged["text_blocks"]),
+            "total_tables": len(merged["tables"]),
+            "total_lines": len(merged["lines"]),
+        }
+    metadata["route"] = plan.toDict()
+    merged["model"] = AUTO_MODEL
+    merged["metadata"] = metadata
+    return merged
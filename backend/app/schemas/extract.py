@@ -1,12 +1,89 @@
+from typing import List, Optional
 from fastapi import UploadFile, File, Form
 
+from app.schemas.options import ExtractOptions
+from app.utils.formats import columnarContent
+
+
 class ExtractRequest:
-    def __init__(self, model: str, file: UploadFile):
+    def __init__(self, model: str, file: UploadFile, stream: Optional[str] = None,
+                 options: Optional[ExtractOptions] = None,
+                 format: Optional[str] = None, layout: Optional[str] = None):
         self.model = model
         self.file = file
+        # "ndjson" or "sse" to stream the result page by page
+        self.stream = stream.lower() if stream else None
+        # Page range, content types and bbox inclusion
+        self.options = options or ExtractOptions()
+        # "json" or "msgpack" (otherwise negotiated from Accept) and "nested" or "columnar"
+        self.format = format
+        self.layout = layout
 
     @classmethod
     async def from_form(cls, 
                         model: str = Form(...), 
-                        file: UploadFile = File(...)):
-        return cls(model=model, file=file)
+                        file: UploadFile = File(...),
+                        stream: Optional[str] = Form(None),
+                        pages: Optional[str] = Form(None),
+                        content: Optional[str] = Form(None),
+                        bbox: Optional[str] = Form(None),
+                        profile: Optional[str] = Form(None),
+                        fmt: Optional[str] = Form(None, alias="format"),
+                        layout: Optional[str] = Form(None)):
+        return cls(model=model, file=file, stream=stream, options=ExtractOptions.parse(pages, content, bbox, profile),
+                   format=fmt, layout=layout)
+
+
+class BatchExtractRequest:
+    def __init__(self, model: str, files: List[UploadFile], archive: Optional[UploadFile] = None,
+                 options: Optional[ExtractOptions] = None,
+                 format: Optional[str] = None, layout: Optional[str] = None):
+        self.model = model
+        self.files = files
+        # Optional zip of PDFs, expanded alongside any individual files
+        self.archive = archive
+        # Applied to every document in the batch
+        self.options = options or ExtractOptions()
+        self.format = format
+        self.layout = layout
+
+    @classmethod
+    async def from_form(cls,
+                        model: str = Form(...),
+                        files: List[UploadFile] = File(None),
+                        archive: Optional[UploadFile] = File(None),
+                        pages: Optional[str] = Form(None),
+                        content: Optional[str] = Form(None),
+                        bbox: Optional[str] = Form(None),
+                        profile: Optional[str] = Form(None),
+                        fmt: Optional[str] = Form(None, alias="format"),
+                        layout: Optional[str] = Form(None)):
+        return cls(model=model, files=files or [], archive=archive, options=ExtractOptions.parse(pages, content, bbox, profile),
+                   format=fmt, layout=layout)
+
+
+def buildExtractResponse(normalized: dict, model: str, filename: str, layout: str = "nested") -> dict:
+    """Wrap a normalized result in the /extract response envelope"""
+    response = {
+        "success": True,
+        "data": {
+            "model": normalized.get("model", model),
+            "filename": filename,
+            "metadata": normalized.get("metadata", {
+                "total_pages": normalized.get("metadata", {}).get("total_pages", 0),
+                "total_text_blocks": normalized.get("metadata", {}).get("total_text_blocks", 0),
+                "total_tables": normalized.get("metadata", {}).get("total_tables", 0),
+                "total_lines": len(normalized.get("lines", []))
+            }),
+            "content": {
+                "text_blocks": normalized.get("text_blocks", []),
+                "lines": normalized.get("lines", []),
+                "tables": normalized.get("tables", [])
+            }
+        },
+        "message": f"Successfully extracted content from {filename}"
+    }
+    if layout == "columnar":
+        response["data"]["content"] = columnarContent(response["data"]["content"])
+        response["data"]["layout"] = "columnar"
+    return response
@@ -0,0 +1,167 @@
+import sys
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from app import config
+
+CONTENT_TYPES = ("text", "tables", "lines")
+
+# Normalized result key holding each content type
+CONTENT_KEYS = {
+    "text": "text_blocks",
+    "tables": "tables",
+    "lines": "lines",
+}
+
+# Docling pipeline profiles, cheapest first; "accurate" is Docling's default pipeline
+DOCLING_PROFILES = ("fast", "balanced", "accurate")
+
+
+class InvalidOptionsError(ValueError):
+    """Raised when the page range, content or profile options cannot be parsed"""
+
+
+def parsePageRange(pages: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parse "3", "3-5" or "3-" into an inclusive, 1-based (first, last) pair.
+
+    An open end is sys.maxsize, which is also Docling's own default.
+    """
+    if pages is None or not pages.strip():
+        return None
+
+    first, sep, last = pages.strip().partition("-")
+    try:
+        start = int(first)
+        end = (int(last) if last.strip() else sys.maxsize) if sep else start
+    except ValueError:
+        raise InvalidOptionsError(f"Invalid page range: {pages!r}; use e.g. 3, 3-5 or 3-")
+
+    if start < 1 or end < start:
+        raise InvalidOptionsError(f"Invalid page range: {pages!r}")
+    return start, end
+
+
+class ExtractOptions:
+    """
+    What a client asked for: a page range, content types, whether bboxes are
+    kept and, for Docling, a pipeline profile.
+
+    The page range and content types are pushed down into the models so work
+    scales with the request; bbox removal is applied to the normalized result.
+    """
+
+    def __init__(self,
+                 pages: Optional[Tuple[int, int]] = None,
+                 content: Iterable[str] = CONTENT_TYPES,
+                 bboxes: bool = True,
+                 profile: Optional[str] = None):
+        self.pages = pages
+        self.content: FrozenSet[str] = frozenset(content)
+        self.bboxes = bboxes
+        self.profile = profile
+
+    @classmethod
+    def parse(cls, pages: Optional[str] = None, content: Optional[str] = None,
+              bbox: Optional[str] = None, profile: Optional[str] = None) -> "ExtractOptions":
+        """
+        Build options from the raw form fields, e.g. pages="3-5",
+        content="tables", bbox="false", profile="fast"
+        """
+        if content and content.strip():
+            selected = {part.strip().lower() for part in content.split(",") if part.strip()}
+            unknown = selected - set(CONTENT_TYPES)
+            if unknown or not selected:
+                raise InvalidOptionsError(
+                    f"Unknown content type(s): {', '.join(sorted(unknown))}; choose from {', '.join(CONTENT_TYPES)}"
+                )
+        else:
+            selected = set(CONTENT_TYPES)
+
+        keepBboxes = True
+        if bbox is not None and bbox.strip():
+            keepBboxes = bbox.strip().lower() not in ("0", "false", "no", "off")
+
+        selectedProfile = None
+        if profile is not None and profile.strip():
+            selectedProfile = profile.strip().lower()
+            if selectedProfile not in DOCLING_PROFILES:
+                raise InvalidOptionsError(
+                    f"Unknown profile: {profile!r}; choose from {', '.join(DOCLING_PROFILES)}"
+                )
+
+        return cls(pages=parsePageRange(pages), content=selected, bboxes=keepBboxes, profile=selectedProfile)
+
+    def forPages(self, first: int, last: int) -> "ExtractOptions":
+        """The same content, bbox and profile choices, limited to pages first..last"""
+        return ExtractOptions(pages=(first, last), content=self.content, bboxes=self.bboxes, profile=self.profile)
+
+    def wants(self, contentType: str) -> bool:
+        return contentType in self.content
+
+    @property
+    def needsText(self) -> bool:
+        # Lines are derived from the same text extraction as text blocks
+        return self.wants("text") or self.wants("lines")
+
+    @property
+    def needsTables(self) -> bool:
+        return self.wants("tables")
+
+    @property
+    def doclingProfile(self) -> str:
+        return self.profile or config.DOCLING_PROFILE
+
+    @property
+    def isComplete(self) -> bool:
+        """Every page and content type, with bboxes: the whole document, whatever the profile"""
+        return self.pages is None and len(self.content) == len(CONTENT_TYPES) and self.bboxes
+
+    @property
+    def isDefault(self) -> bool:
+        return self.isComplete and self.profile is None
+
+    def cacheVariant(self, model: Optional[str] = None) -> str:
+        """
+        The part of the options that changes what the models produce (bboxes
+        do not). The profile only matters to Docling, and "accurate" keeps
+        the keys results were cached under before profiles existed.
+        """
+        parts = []
+        if not (self.pages is None and self.needsText and self.needsTables):
+            pages = f"{self.pages[0]}-{self.pages[1]}" if self.pages else "all"
+            stages = ",".join(stage for stage, needed in (("text", self.needsText), ("tables", self.needsTables))
+                              if needed)
+            parts.append(f"pages={pages};stages={stages}")
+        if model == "docling" and self.doclingProfile != "accurate":
+            parts.append(f"profile={self.doclingProfile}")
+        return ";".join(parts)
+
+    def applyToPage(self, record: Dict) -> Dict:
+        """Drop unrequested content and bboxes from a page record or a normalized result"""
+        if len(self.content) == len(CONTENT_TYPES) and self.bboxes:
+            return record
+
+        # Never mutate the input: it may be a cached result shared between requests
+        result = dict(record)
+        for contentType, key in CONTENT_KEYS.items():
+            if key in result and not self.wants(contentType):
+                result[key] = []
+        if not self.bboxes:
+            for key in ("text_blocks", "tables"):
+                if key in result:
+                    result[key] = [{k: v for k, v in item.items() if k != "bbox"} for item in result[key]]
+        return result
+
+    def apply(self, normalized: Dict) -> Dict:
+        """applyToPage for a whole normalized result, with its metadata totals recounted"""
+        result = self.applyToPage(normalized)
+        if result is normalized:
+            return normalized
+
+        metadata = dict(result.get("metadata", {}))
+        metadata["total_text_blocks"] = len(result.get("text_blocks", []))
+        metadata["total_tables"] = len(result.get("tables", []))
+        if "total_lines" in metadata:
+            metadata["total_lines"] = len(result.get("lines", []))
+        result["metadata"] = metadata
+        return result
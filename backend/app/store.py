@@ -0,0 +1,209 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config
+from .utils.formats import bboxCorners
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    model TEXT NOT NULL,
+    filename TEXT,
+    total_pages INTEGER,
+    indexed_at REAL NOT NULL,
+    UNIQUE (sha256, model)
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    page INTEGER,
+    kind TEXT NOT NULL,
+    table_index INTEGER,
+    row_index INTEGER,
+    col_index INTEGER,
+    x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_document ON blocks(document_id, page);
+CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+    content, content='blocks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# (page, kind, table_index, row_index, col_index, x0, y0, x1, y1, content)
+BlockRow = Tuple[Optional[int], str, Optional[int], Optional[int], Optional[int],
+                 Optional[float], Optional[float], Optional[float], Optional[float], str]
+
+
+class InvalidQueryError(ValueError):
+    """Raised for an empty search query or one FTS5 cannot parse"""
+
+
+def blockRows(normalized: Dict) -> Iterator[BlockRow]:
+    """
+    One row per text block and per non-empty table cell of a normalized result.
+
+    Cells carry their table's bbox: neither normalizer keeps per-cell coordinates.
+    """
+    for block in normalized.get("text_blocks", []):
+        content = block.get("content")
+        if content:
+            corners = bboxCorners(block.get("bbox")) or [None] * 4
+            yield (block.get("page"), "text", None, None, None, *corners, content)
+
+    for tableIndex, table in enumerate(normalized.get("tables", [])):
+        corners = bboxCorners(table.get("bbox")) or [None] * 4
+        for rowIndex, row in enumerate(table.get("rows") or []):
+            for colIndex, cell in enumerate(row):
+                if cell:
+                    yield (table.get("page"), "table_cell", tableIndex, rowIndex, colIndex, *corners, str(cell))
+
+
+def ftsQuery(query: str, phrase: bool) -> str:
+    """
+    The FTS5 MATCH expression for a user query.
+
+    Every term is quoted, so operators and punctuation in the query are
+    searched for literally. Terms must all match; with phrase they must
+    also be adjacent and in order.
+    """
+    terms = [term.replace('"', '""') for term in query.split()]
+    if not terms:
+        raise InvalidQueryError("Empty search query")
+    if phrase:
+        return '"' + " ".join(terms) + '"'
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class DocumentStore:
+    """
+    Normalized results indexed for full-text search, in one SQLite file.
+
+    A document is identified by its SHA-256 and the model that extracted it;
+    indexing it again replaces its blocks. Text blocks and table cells are
+    searchable through an FTS5 index and come back with page and bbox.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # One connection per thread: WAL lets searches read while a document is being indexed
+        self.local = threading.local()
+        self.writeLock = threading.Lock()
+        with self.writeLock:
+            self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self.local.connection = connection
+        return connection
+
+    def ingest(self, documents: Iterable[Tuple[str, str, str, Dict]]) -> int:
+        """
+        Index (sha256, model, filename, normalized) documents in one transaction.
+
+        Blocks are bulk-inserted and added to the FTS index with a single
+        INSERT ... SELECT per document. Returns the number of blocks indexed.
+        """
+        connection = self.connection()
+        indexed = 0
+        with self.writeLock, connection:
+            for sha256, model, filename, normalized in documents:
+                documentId = self._replaceDocument(connection, sha256, model.lower(), filename, normalized)
+                rows = list(blockRows(normalized))
+                connection.executemany(
+                    "INSERT INTO blocks (document_id, page, kind, table_index, row_index, col_index,"
+                    " x0, y0, x1, y1, content) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(documentId, *row) for row in rows]
+                )
+                connection.execute(
+                    "INSERT INTO blocks_fts (rowid, content) SELECT id, content FROM blocks WHERE document_id = ?",
+                    (documentId,)
+                )
+                indexed += len(rows)
+        return indexed
+
+    @staticmethod
+    def _replaceDocument(connection: sqlite3.Connection, sha256: str, model: str, filename: str,
+                         normalized: Dict) -> int:
+        existing = connection.execute("SELECT id FROM documents WHERE sha256 = ? AND model = ?",
+                                      (sha256, model)).fetchone()
+        if existing is not None:
+            # External-content FTS rows must be deleted with their original text
+            connection.execute(
+                "INSERT INTO blocks_fts (blocks_fts, rowid, content)"
+                " SELECT 'delete', id, content FROM blocks WHERE document_id = ?",
+                (existing["id"],)
+            )
+            connection.execute("DELETE FROM documents WHERE id = ?", (existing["id"],))
+        cursor = connection.execute(
+            "INSERT INTO documents (sha256, model, filename, total_pages, indexed_at) VALUES (?, ?, ?, ?, ?)",
+            (sha256, model, filename, normalized.get("metadata", {}).get("total_pages"), time.time())
+        )
+        return cursor.lastrowid
+
+    def search(self, query: str, phrase: bool = False, document: str = None, filename: str = None,
+               model: str = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Best-ranked (BM25) hits for the query, optionally within one document, filename or model"""
+        sql = [
+            "SELECT d.sha256, d.filename, d.model, b.page, b.kind, b.table_index, b.row_index, b.col_index,"
+            " b.x0, b.y0, b.x1, b.y1, b.content,"
+            " snippet(blocks_fts, 0, '[', ']', '...', 16) AS snippet"
+            " FROM blocks_fts JOIN blocks b ON b.id = blocks_fts.rowid JOIN documents d ON d.id = b.document_id"
+            " WHERE blocks_fts MATCH ?"
+        ]
+        params: List = [ftsQuery(query, phrase)]
+        for column, value in (("d.sha256", document), ("d.filename", filename), ("d.model", model)):
+            if value:
+                sql.append(f" AND {column} = ?")
+                params.append(value.lower() if column == "d.model" else value)
+        sql.append(" ORDER BY rank LIMIT ? OFFSET ?")
+        params.extend([limit, offset])
+
+        try:
+            rows = self.connection().execute("".join(sql), params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise InvalidQueryError(f"Invalid search query: {e}")
+
+        hits = []
+        for row in rows:
+            hit = {
+                "document": row["sha256"],
+                "filename": row["filename"],
+                "model": row["model"],
+                "page": row["page"],
+                "kind": row["kind"],
+                "content": row["content"],
+                "snippet": row["snippet"],
+                "bbox": [row["x0"], row["y0"], row["x1"], row["y1"]] if row["x0"] is not None else None,
+            }
+            if row["kind"] == "table_cell":
+                hit["table"] = {"index": row["table_index"], "row": row["row_index"], "col": row["col_index"]}
+            hits.append(hit)
+        return hits
+
+    def stats(self) -> Dict:
+        connection = self.connection()
+        return {
+            "enabled": True,
+            "documents": connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0],
+            "blocks": connection.execute("SELECT COUNT(*) FROM blocks").fetchone()[0],
+        }
+
+
+def createDocumentStore() -> Optional[DocumentStore]:
+    """The configured store, or None when STORE_PATH is unset"""
+    if not config.STORE_PATH:
+        return None
+    return DocumentStore(config.STORE_PATH)
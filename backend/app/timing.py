@@ -0,0 +1,67 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the named stages of one request.
+
+    Stages are kept in the order they were first recorded; recording a stage
+    twice adds up (e.g. one "extract" per page window).
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @property
+    def total(self) -> float:
+        """Seconds since the timer was created"""
+        return time.perf_counter() - self.started
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, stages: Optional[Dict[str, float]]):
+        for name, seconds in (stages or {}).items():
+            self.record(name, seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def toDict(self) -> Dict[str, float]:
+        """Milliseconds per stage, rounded for responses and logs"""
+        return {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+
+    def serverTiming(self) -> str:
+        """Server-Timing header value, e.g. "upload;dur=1.2, extract;dur=840.5" """
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+
+# Timer of the extraction running in the current thread or worker process.
+# Model handlers record their internal stages here without taking a timer argument.
+currentTimer: ContextVar[Optional[StageTimer]] = ContextVar("currentTimer", default=None)
+
+
+def recordStage(name: str, seconds: float):
+    """Record onto the current timer, if one is active"""
+    timer = currentTimer.get()
+    if timer is not None:
+        timer.record(name, seconds)
+
+
+@contextmanager
+def timedStage(name: str) -> Iterator[None]:
+    """Time a block onto the current timer, if one is active"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recordStage(name, time.perf_counter() - start)
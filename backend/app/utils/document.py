@@ -0,0 +1,206 @@
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class Origin(str, Enum):
+    """Where a bbox's y axis starts"""
+    TOPLEFT = "TOPLEFT"
+    BOTTOMLEFT = "BOTTOMLEFT"
+
+    @classmethod
+    def parse(cls, value: Any) -> "Origin":
+        # Docling passes its own CoordOrigin enum; member names match ours
+        name = getattr(value, "name", None) or str(value or "").rsplit(".", 1)[-1]
+        return cls.__members__.get(name.upper(), cls.TOPLEFT)
+
+
+class BBox:
+    """
+    An axis-aligned box as four floats and an origin.
+
+    Subclasses change the dict shape it serializes to, so responses keep
+    each model's bbox layout without storing it per block.
+    """
+    __slots__ = ("x0", "y0", "x1", "y1", "origin")
+
+    def __init__(self, x0: float, y0: float, x1: float, y1: float, origin: Origin = Origin.TOPLEFT):
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.origin = origin
+
+    def toDict(self) -> Dict:
+        return {"l": self.x0, "t": self.y0, "r": self.x1, "b": self.y1, "coord_origin": self.origin.value}
+
+
+class QuadBBox(BBox):
+    """
+    Docling's BoundingRectangle: four corners counter-clockwise from (x0, y0).
+
+    All eight values are kept, so rotated cells come out as Docling reports them.
+    """
+    __slots__ = ("x2", "y2", "x3", "y3")
+
+    def __init__(self, x0: float, y0: float, x1: float, y1: float,
+                 x2: float, y2: float, x3: float, y3: float, origin: Origin = Origin.TOPLEFT):
+        super().__init__(x0, y0, x1, y1, origin)
+        self.x2 = x2
+        self.y2 = y2
+        self.x3 = x3
+        self.y3 = y3
+
+    def toDict(self) -> Dict:
+        return {
+            "r_x0": self.x0, "r_y0": self.y0,
+            "r_x1": self.x1, "r_y1": self.y1,
+            "r_x2": self.x2, "r_y2": self.y2,
+            "r_x3": self.x3, "r_y3": self.y3,
+            "coord_origin": self.origin.value,
+        }
+
+
+class SizedBBox(BBox):
+    """OmniDocs layout: edges plus width and height"""
+    __slots__ = ()
+
+    def toDict(self) -> Dict:
+        return {
+            "l": self.x0, "t": self.y0, "r": self.x1, "b": self.y1,
+            "width": self.x1 - self.x0, "height": self.y1 - self.y0,
+            "coord_origin": self.origin.value,
+        }
+
+
+def bboxDict(bbox: Optional[BBox]) -> Optional[Dict]:
+    return bbox.toDict() if bbox is not None else None
+
+
+class Font:
+    __slots__ = ("name", "size", "bold", "italic", "color")
+
+    def __init__(self, name: Optional[str] = None, size: Optional[float] = None, bold: bool = False,
+                 italic: bool = False, color: Any = None):
+        self.name = name
+        self.size = size
+        self.bold = bold
+        self.italic = italic
+        self.color = color
+
+    def toDict(self) -> Dict:
+        return {"font_name": self.name, "font_size": self.size, "bold": self.bold, "italic": self.italic,
+                "color": self.color}
+
+
+class TextBlock:
+    __slots__ = ("page", "content", "bbox")
+
+    def __init__(self, page: int, content: str, bbox: Optional[BBox] = None):
+        self.page = page
+        self.content = content
+        self.bbox = bbox
+
+    def toDict(self) -> Dict:
+        return {"page": self.page, "content": self.content, "bbox": bboxDict(self.bbox)}
+
+
+class OmniTextBlock(TextBlock):
+    """A text block with the layout details OmniDocs reports"""
+    __slots__ = ("blockType", "confidence", "readingOrder", "font", "language")
+
+    def __init__(self, page: int, content: str, bbox: Optional[BBox], blockType: str, confidence: Any,
+                 readingOrder: Optional[int], font: Font, language: Optional[str] = None):
+        super().__init__(page, content, bbox)
+        self.blockType = blockType
+        self.confidence = confidence
+        self.readingOrder = readingOrder
+        self.font = font
+        self.language = language
+
+    def toDict(self) -> Dict:
+        return {
+            "page": self.page,
+            "content": self.content,
+            "bbox": bboxDict(self.bbox),
+            "block_type": self.blockType,
+            "confidence": self.confidence,
+            "reading_order": self.readingOrder,
+            "font_info": self.font.toDict(),
+            "language": self.language,
+        }
+
+
+class Table:
+    __slots__ = ("page", "rows", "numCols", "bbox")
+
+    def __init__(self, page: int, rows: List[List[str]], numCols: int, bbox: Optional[BBox] = None):
+        self.page = page
+        self.rows = rows
+        self.numCols = numCols
+        self.bbox = bbox
+
+    def toDict(self) -> Dict:
+        return {"page": self.page, "rows": self.rows, "num_rows": len(self.rows), "num_cols": self.numCols,
+                "bbox": bboxDict(self.bbox)}
+
+
+class OmniTable(Table):
+    __slots__ = ("confidence", "tableType", "hasHeader")
+
+    def __init__(self, page: int, rows: List[List[str]], numCols: int, bbox: Optional[BBox], confidence: Any,
+                 tableType: str, hasHeader: bool):
+        super().__init__(page, rows, numCols, bbox)
+        self.confidence = confidence
+        self.tableType = tableType
+        self.hasHeader = hasHeader
+
+    def toDict(self) -> Dict:
+        table = super().toDict()
+        table["confidence"] = self.confidence
+        table["table_type"] = self.tableType
+        table["has_header"] = self.hasHeader
+        return table
+
+
+def pageRecord(page: int, textBlocks: Iterable[TextBlock], tables: Iterable[Table]) -> Dict:
+    """The streamed per-page record: page, text_blocks, lines and tables"""
+    blocks = [block.toDict() for block in textBlocks]
+    return {
+        "page": page,
+        "text_blocks": blocks,
+        "lines": [block["content"] for block in blocks],
+        "tables": [table.toDict() for table in tables],
+    }
+
+
+class Document:
+    """
+    What both normalizers produce: typed text blocks and tables plus metadata.
+
+    Blocks hold four-float bboxes and no per-block dicts; the normalized
+    dict (and with it the response) is only built by toDict, once.
+    lines is not stored: it is always the text blocks' content.
+    """
+    __slots__ = ("model", "textBlocks", "tables", "metadata")
+
+    def __init__(self, model: str, textBlocks: List[TextBlock] = None, tables: List[Table] = None,
+                 metadata: Dict = None):
+        self.model = model
+        self.textBlocks = textBlocks if textBlocks is not None else []
+        self.tables = tables if tables is not None else []
+        self.metadata = metadata if metadata is not None else {}
+
+    @property
+    def lines(self) -> List[str]:
+        return [block.content for block in self.textBlocks]
+
+    def toDict(self) -> Dict:
+        textBlocks = [block.toDict() for block in self.textBlocks]
+        return {
+            "model": self.model,
+            "text_blocks": textBlocks,
+            "tables": [table.toDict() for table in self.tables],
+            # Same string objects as the blocks' content, not copies
+            "lines": [block["content"] for block in textBlocks],
+            "metadata": self.metadata,
+        }
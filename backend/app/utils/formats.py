@@ -0,0 +1,185 @@
+import asyncio
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.responses import Response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RESPONSE_FORMATS = ("json", "msgpack")
+RESPONSE_LAYOUTS = ("nested", "columnar")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+}
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# Bodies smaller than this are sent uncompressed; the headers would outweigh the gain
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised for an unknown format/layout, or msgpack requested without msgpack installed"""
+
+
+def acceptedTokens(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept or Accept-Encoding header into {token: q}"""
+    tokens = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        tokens[name.strip().lower()] = q
+    return tokens
+
+
+def bboxCorners(bbox: Optional[Dict]) -> Optional[List[float]]:
+    """[x0, y0, x1, y1] for either bbox shape the normalizers produce"""
+    if not bbox:
+        return None
+    if "l" in bbox:
+        return [bbox["l"], bbox["t"], bbox["r"], bbox["b"]]
+    # Docling quad: take the axis-aligned box around its four corners
+    xs = [bbox.get(f"r_x{i}", 0) for i in range(4)]
+    ys = [bbox.get(f"r_y{i}", 0) for i in range(4)]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def bboxColumns(items: List[Dict]) -> Optional[Dict]:
+    """Parallel x0/y0/x1/y1 arrays (null where an item has no bbox); None when bboxes were dropped"""
+    if not any("bbox" in item for item in items):
+        return None
+
+    columns = {"x0": [], "y0": [], "x1": [], "y1": [], "coord_origin": None}
+    for item in items:
+        bbox = item.get("bbox")
+        corners = bboxCorners(bbox)
+        for name, value in zip(("x0", "y0", "x1", "y1"), corners or (None,) * 4):
+            columns[name].append(value)
+        if bbox and columns["coord_origin"] is None:
+            columns["coord_origin"] = bbox.get("coord_origin")
+    return columns
+
+
+def columnarContent(content: Dict) -> Dict:
+    """
+    Re-lay /extract content as parallel arrays.
+
+    Text blocks become page/content columns plus bbox coordinate columns.
+    lines is omitted: it always equals the text block content column.
+    Tables keep their rows, with the per-table fields as columns.
+    """
+    textBlocks = content.get("text_blocks", [])
+    tables = content.get("tables", [])
+
+    columnar = {
+        "text_blocks": {
+            "page": [block.get("page") for block in textBlocks],
+            "content": [block.get("content", "") for block in textBlocks],
+        },
+        "tables": {
+            "page": [table.get("page") for table in tables],
+            "rows": [table.get("rows", []) for table in tables],
+            "num_rows": [table.get("num_rows") for table in tables],
+            "num_cols": [table.get("num_cols") for table in tables],
+        },
+    }
+
+    textBboxes = bboxColumns(textBlocks)
+    if textBboxes is not None:
+        columnar["text_blocks"]["bbox"] = textBboxes
+    tableBboxes = bboxColumns(tables)
+    if tableBboxes is not None:
+        columnar["tables"]["bbox"] = tableBboxes
+    return columnar
+
+
+class OutputFormat:
+    """
+    Body format, content layout and compression for one response.
+
+    The format comes from an explicit form/query value or the Accept header;
+    compression from Accept-Encoding (zstd preferred over gzip).
+    """
+
+    def __init__(self, fmt: str = "json", layout: str = "nested", encoding: Optional[str] = None):
+        self.fmt = fmt
+        self.layout = layout
+        self.encoding = encoding
+
+    @classmethod
+    def negotiate(cls, fmt: Optional[str] = None, layout: Optional[str] = None,
+                  accept: Optional[str] = None, acceptEncoding: Optional[str] = None) -> "OutputFormat":
+        fmt = (fmt or "").strip().lower()
+        if not fmt:
+            accepted = acceptedTokens(accept)
+            wantsMsgpack = any(accepted.get(mediaType, 0) > 0 for mediaType in MSGPACK_MEDIA_TYPES)
+            fmt = "msgpack" if wantsMsgpack and msgpack is not None else "json"
+        if fmt not in RESPONSE_FORMATS:
+            raise UnsupportedFormatError(f"Unsupported format: {fmt}; choose from {', '.join(RESPONSE_FORMATS)}")
+        if fmt == "msgpack" and msgpack is None:
+            raise UnsupportedFormatError("msgpack output is not available on this server")
+
+        layout = (layout or "nested").strip().lower()
+        if layout not in RESPONSE_LAYOUTS:
+            raise UnsupportedFormatError(f"Unsupported layout: {layout}; choose from {', '.join(RESPONSE_LAYOUTS)}")
+
+        encodings = acceptedTokens(acceptEncoding)
+        wildcard = encodings.get("*", 0)
+        encoding = None
+        if zstandard is not None and encodings.get("zstd", wildcard) > 0:
+            encoding = "zstd"
+        elif encodings.get("gzip", wildcard) > 0:
+            encoding = "gzip"
+
+        return cls(fmt, layout, encoding)
+
+    @property
+    def mediaType(self) -> str:
+        return MEDIA_TYPES[self.fmt]
+
+    def encode(self, payload: Any) -> Tuple[bytes, Optional[str]]:
+        """
+        Serialize and compress a payload, returning (body, content encoding or None).
+
+        Blocking, so callers run it off the event loop.
+        """
+        if self.fmt == "msgpack":
+            body = msgpack.packb(payload, use_bin_type=True, default=str)
+        else:
+            # Same settings as JSONResponse, so default responses are byte-for-byte unchanged
+            body = json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None,
+                              separators=(",", ":"), default=str).encode("utf-8")
+
+        if self.encoding is None or len(body) < COMPRESS_MIN_BYTES:
+            return body, None
+        if self.encoding == "zstd":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body), "zstd"
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+
+    async def render(self, payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+        body, encoding = await asyncio.to_thread(self.encode, payload)
+        responseHeaders = {**(headers or {}), "Vary": "Accept, Accept-Encoding"}
+        if encoding is not None:
+            responseHeaders["Content-Encoding"] = encoding
+        return Response(content=body, status_code=status_code, media_type=self.mediaType, headers=responseHeaders)
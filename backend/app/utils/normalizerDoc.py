@@ -1,277 +1,260 @@
-import json
-import re
+import logging
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from .document import BBox, Document, Origin, QuadBBox, Table, TextBlock, pageRecord
+from .textCleaner import cleanText
 
-def normalizeResultEnhanced(modelName: str, rawResult: Any) -> Dict:
+logger = logging.getLogger(__name__)
+
+# Bump whenever normalizeResultEnhanced output changes so cached results are invalidated
+NORMALIZER_VERSION = "3"
+
+
+def groupCellsIntoBlocks(y_positions: List[float],
+                         x_starts: List[float],
+                         x_ends: List[float],
+                         max_y_diff: float = 3.0,
+                         max_x_gap: float = 30.0) -> Tuple[List[int], List[int]]:
     """
-    Enhanced normalization with better text segmentation and cleaning for Docling output.
+    Order character cells into reading order and find merged block boundaries.
+    
+    Cells are sorted by (y, x) with ties kept in input order. A cell joins the
+    current block when it sits within max_y_diff of the block's first cell and
+    starts between 5 units left of and max_x_gap right of the block's right edge
+    (the running max over the block's cells).
+    
+    The block a cell is compared against depends on every earlier decision,
+    so the rule is a sequential scan. It is not run cell by cell: a cell that
+    sits more than max_y_diff below its predecessor, or starts more than 5
+    units left of the predecessor's right edge, breaks whatever block that
+    predecessor is in. Those breaks are found in bulk and cut the cells into
+    segments. A segment whose cells all pass the test against the segment's
+    first y and its cumulative right edge is one block; only the other
+    segments are scanned cell by cell.
     
     Args:
-        modelName: Name of the model used for extraction
-        rawResult: Raw result object from Docling with pages, char_cells, and tables
+        y_positions: Rounded y-coordinate per cell
+        x_starts: Left edge per cell
+        x_ends: Right edge per cell
+        max_y_diff: Maximum vertical difference to consider same line
+        max_x_gap: Maximum horizontal gap to merge
         
     Returns:
-        Normalized dictionary with text_blocks, tables, and lines
+        (order, starts): cell indices in reading order, and the positions in
+        that order where each block begins
     """
-    normalized = {
-        "model": modelName,
-        "text_blocks": [],
-        "tables": [],
-        "lines": [],
-        "metadata": {
-            "total_pages": 0,
-            "total_text_blocks": 0,
-            "total_tables": 0
-        }
-    }
-
-    def clean_text(text: str) -> str:
-        """Clean and normalize text content"""
-        if not text:
-            return ""
-        
-        # Remove excessive pipe characters
-        text = re.sub(r'\|{2,}', ' | ', text)
-        
-        # Add space after email addresses before capital letters
-        text = re.sub(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})([A-Z])', r'\1 \2', text)
-        
-        # Add space after phone numbers before letters
-        text = re.sub(r'(\+\d{10,15})([A-Za-z])', r'\1 \2', text)
-        
-        # Add space between lowercase and uppercase (camelCase splitting)
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-        
-        # Add space after common concatenated words
-        text = re.sub(r'(and)([A-Z])', r'\1 \2', text)
-        text = re.sub(r'(with)([A-Z])', r'\1 \2', text)
-        
-        # Clean up multiple spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+    # Imported here so the API process can start without loading numpy
+    import numpy as np
 
-    def should_merge_cells(cell1: Dict, cell2: Dict, 
-                          max_y_diff: float = 3.0, 
-                          max_x_gap: float = 30.0) -> bool:
-        """
-        Determine if two cells should be merged based on proximity.
-        
-        Args:
-            cell1: First cell with bbox and page info
-            cell2: Second cell with bbox and page info
-            max_y_diff: Maximum vertical difference to consider same line
-            max_x_gap: Maximum horizontal gap to merge
-        """
-        if cell1["page"] != cell2["page"]:
-            return False
-        
-        # Check if on same horizontal line (similar y-coordinates)
-        y_diff = abs(cell1["y_pos"] - cell2["y_pos"])
-        if y_diff > max_y_diff:
-            return False
+    y = np.asarray(y_positions, dtype=np.float64)
+    x0 = np.asarray(x_starts, dtype=np.float64)
+    x1 = np.asarray(x_ends, dtype=np.float64)
+    
+    # lexsort is stable and sorts by the last key first: y, then x
+    order = np.lexsort((x0, y))
+    y, x0, x1 = y[order], x0[order], x1[order]
+    
+    # The block always holds the previous cell, whose y is >= the block's first y
+    # and whose right edge is <= the block's running max
+    breaks = np.flatnonzero((y[1:] - y[:-1] > max_y_diff) | (x0[1:] - x1[:-1] < -5)) + 1
+    bounds = [0, *breaks.tolist(), len(y)]
+    
+    starts = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        starts.append(start)
+        if end - start < 2:
+            continue
+        x_end = np.maximum.accumulate(x1[start:end - 1])
+        x_gap = x0[start + 1:end] - x_end
+        joins = (np.abs(y[start] - y[start + 1:end]) <= max_y_diff) & (x_gap <= max_x_gap) & (x_gap >= -5)
+        if joins.all():
+            continue
         
-        # Check horizontal gap
-        x_gap = cell2["x_start"] - cell1["x_end"]
-        if x_gap > max_x_gap or x_gap < -5:  # Allow small overlap
-            return False
-            
-        return True
+        # Some cell splits this segment: same test as the pairwise merge, one cell at a time
+        ys, x0s, x1s = y[start:end].tolist(), x0[start:end].tolist(), x1[start:end].tolist()
+        block_y = ys[0]
+        block_x_end = x1s[0]
+        for i in range(1, end - start):
+            gap = x0s[i] - block_x_end
+            if not (abs(block_y - ys[i]) > max_y_diff or gap > max_x_gap or gap < -5):
+                if x1s[i] > block_x_end:
+                    block_x_end = x1s[i]
+            else:
+                starts.append(start + i)
+                block_y = ys[i]
+                block_x_end = x1s[i]
+    
+    return order.tolist(), starts
 
-    def get_safe_attr(obj: Any, attr: str, default: Any = None) -> Any:
-        """Safely get attribute from object"""
-        try:
-            return getattr(obj, attr, default)
-        except (AttributeError, TypeError):
-            return default
 
-    def extract_bbox_dict(rect_obj: Any) -> Optional[Dict]:
-        """Extract bounding box as dictionary"""
-        if not rect_obj:
-            return None
-        
-        try:
-            if hasattr(rect_obj, '__dict__'):
-                return rect_obj.__dict__
-            elif hasattr(rect_obj, 'l') and hasattr(rect_obj, 't'):
-                # BoundingBox format
-                return {
-                    "l": rect_obj.l,
-                    "t": rect_obj.t,
-                    "r": rect_obj.r,
-                    "b": rect_obj.b,
-                    "coord_origin": str(get_safe_attr(rect_obj, 'coord_origin', 'TOPLEFT'))
-                }
-            elif hasattr(rect_obj, 'r_x0'):
-                # BoundingRectangle format
-                return {
-                    "r_x0": rect_obj.r_x0,
-                    "r_y0": rect_obj.r_y0,
-                    "r_x1": rect_obj.r_x1,
-                    "r_y1": rect_obj.r_y1,
-                    "r_x2": rect_obj.r_x2,
-                    "r_y2": rect_obj.r_y2,
-                    "r_x3": rect_obj.r_x3,
-                    "r_y3": rect_obj.r_y3,
-                    "coord_origin": str(get_safe_attr(rect_obj, 'coord_origin', 'TOPLEFT'))
-                }
-        except Exception as e:
-            print(f"Warning: Failed to extract bbox: {e}")
-        
+def doclingBBox(obj: Any) -> Optional[BBox]:
+    """Four-float bbox for a Docling BoundingBox (l, t, r, b) or BoundingRectangle (r_x0 ... r_y3)"""
+    if not obj:
         return None
+    origin = Origin.parse(getattr(obj, "coord_origin", None))
+    if hasattr(obj, "l") and hasattr(obj, "t"):
+        return BBox(obj.l, obj.t, obj.r, obj.b, origin)
+    if hasattr(obj, "r_x0"):
+        return QuadBBox(obj.r_x0, obj.r_y0, obj.r_x1, obj.r_y1, obj.r_x2, obj.r_y2, obj.r_x3, obj.r_y3, origin)
+    return None
+
 
+def doclingPages(rawResult: Any, firstPage: int = 1) -> Iterator[Tuple[int, List[TextBlock], List[Table]]]:
+    """
+    Normalize Docling output one page at a time.
+    
+    Args:
+        rawResult: Raw result object from Docling with pages, char_cells, and tables
+        firstPage: Page number of the first converted page (the start of the page range)
+        
+    Yields:
+        (page number, text blocks, tables) for every Docling page
+    """
     # Process pages
-    pages = get_safe_attr(rawResult, "pages", [])
+    pages = getattr(rawResult, "pages", None) or []
     
-    for page_idx, page in enumerate(pages, start=1):
-        parsed_page = get_safe_attr(page, "parsed_page")
+    for page_idx, page in enumerate(pages, start=firstPage):
+        textBlocks: List[TextBlock] = []
+        tables: List[Table] = []
+
+        parsed_page = getattr(page, "parsed_page", None)
         if not parsed_page:
+            yield page_idx, textBlocks, tables
             continue
 
         # Extract text cells
-        char_cells = get_safe_attr(parsed_page, "char_cells", [])
+        char_cells = getattr(parsed_page, "char_cells", None) or []
         
-        # Group cells by approximate line (using y-coordinate)
-        lines_data = defaultdict(list)
+        # Load cell coordinates into flat columns; one pass, no per-cell objects
+        texts = []
+        y_positions = []
+        corners = []
+        x_starts = []
+        x_ends = []
+        origins = []
         
+        # Plain getattr with a default in this loop: it runs once per character
         for cell in char_cells:
-            text_val = get_safe_attr(cell, "text", "")
-            rect = get_safe_attr(cell, "rect")
+            text_val = getattr(cell, "text", "")
+            rect = getattr(cell, "rect", None)
             
             if not text_val or not rect:
                 continue
             
             # Skip whitespace-only cells
-            if text_val.strip() == "":
+            if text_val.isspace():
                 continue
                 
             # Use y-coordinate to group into lines (round to reduce sensitivity)
-            y_pos = round(get_safe_attr(rect, "r_y0", 0), 1)
-            x_start = get_safe_attr(rect, "r_x0", 0)
-            x_end = get_safe_attr(rect, "r_x1", 0)
-            
-            lines_data[(page_idx, y_pos)].append({
-                "text": text_val,
-                "x_start": x_start,
-                "x_end": x_end,
-                "y_pos": y_pos,
-                "bbox": extract_bbox_dict(rect),
-                "page": page_idx
-            })
-
-        # Process and merge cells into text blocks
-        all_cells = []
-        for cells_group in lines_data.values():
-            # Sort by x-position (left to right)
-            cells_group.sort(key=lambda c: c["x_start"])
-            all_cells.extend(cells_group)
-        
-        # Sort all cells by y-position (top to bottom) then x-position
-        all_cells.sort(key=lambda c: (c["y_pos"], c["x_start"]))
+            x0 = getattr(rect, "r_x0", 0)
+            y0 = getattr(rect, "r_y0", 0)
+            x1 = getattr(rect, "r_x1", 0)
+            y_positions.append(round(y0, 1))
+            corners.append((x0, y0, x1, getattr(rect, "r_y1", 0), getattr(rect, "r_x2", 0),
+                            getattr(rect, "r_y2", 0), getattr(rect, "r_x3", 0), getattr(rect, "r_y3", 0)))
+            x_starts.append(x0)
+            x_ends.append(x1)
+            origins.append(getattr(rect, "coord_origin", None))
+            texts.append(text_val)
         
-        if not all_cells:
+        if not texts:
+            yield page_idx, textBlocks, tables
             continue
         
-        # Merge adjacent cells
-        merged_blocks = []
-        current_block = all_cells[0].copy()
-        
-        for next_cell in all_cells[1:]:
-            if should_merge_cells(current_block, next_cell):
-                # Merge cells
-                current_block["text"] += next_cell["text"]
-                current_block["x_end"] = max(current_block["x_end"], next_cell["x_end"])
-                
-                # Expand bounding box
-                if current_block["bbox"] and next_cell["bbox"]:
-                    bbox = current_block["bbox"]
-                    next_bbox = next_cell["bbox"]
-                    bbox["r_x1"] = max(bbox.get("r_x1", 0), next_bbox.get("r_x1", 0))
-                    bbox["r_x2"] = max(bbox.get("r_x2", 0), next_bbox.get("r_x2", 0))
-            else:
-                # Save current block and start new one
-                merged_blocks.append(current_block)
-                current_block = next_cell.copy()
-        
-        # Add the last block
-        merged_blocks.append(current_block)
+        # Sort top to bottom, then left to right, and find merged block boundaries
+        order, starts = groupCellsIntoBlocks(y_positions, x_starts, x_ends)
+        ends = starts[1:] + [len(order)]
         
         # Create final text blocks with cleaned content
-        for block in merged_blocks:
-            cleaned_content = clean_text(block["text"])
+        for start, end in zip(starts, ends):
+            cells = order[start:end]
+            first = cells[0]
+            
+            cleaned_content = cleanText("".join(texts[i] for i in cells))
             if cleaned_content:  # Only add non-empty blocks
-                text_block = {
-                    "page": block["page"],
-                    "content": cleaned_content,
-                    "bbox": block["bbox"]
-                }
-                normalized["text_blocks"].append(text_block)
-                normalized["lines"].append(cleaned_content)
+                # The first cell's corners, with its right-hand ones moved out to the furthest merged cell's
+                x0, y0, x1, y1, x2, y2, x3, y3 = corners[first]
+                if len(cells) > 1:
+                    x1 = max(x_ends[i] for i in cells)
+                    x2 = max(corners[i][4] for i in cells)
+                bbox = QuadBBox(x0, y0, x1, y1, x2, y2, x3, y3, Origin.parse(origins[first]))
+                textBlocks.append(TextBlock(page_idx, cleaned_content, bbox))
 
         # Extract tables
-        tables = get_safe_attr(page, "tables", [])
-        
-        for table in tables:
-            table_data = get_safe_attr(table, "data")
+        for table in getattr(page, "tables", None) or []:
+            table_data = getattr(table, "data", None)
             if not table_data:
                 continue
             
-            table_cells = get_safe_attr(table_data, "table_cells", [])
+            table_cells = getattr(table_data, "table_cells", None) or []
             
             # Organize cells into grid
             row_dict = defaultdict(list)
             max_col = 0
             
             for cell in table_cells:
-                row_idx = get_safe_attr(cell, "start_row_offset_idx", 0)
-                col_idx = get_safe_attr(cell, "start_col_offset_idx", 0)
-                text = get_safe_attr(cell, "text", "")
+                row_idx = getattr(cell, "start_row_offset_idx", 0)
+                col_idx = getattr(cell, "start_col_offset_idx", 0)
+                text = getattr(cell, "text", "")
                 
-                row_dict[row_idx].append({
-                    "col": col_idx,
-                    "text": clean_text(text)
-                })
+                row_dict[row_idx].append((col_idx, cleanText(text)))
                 max_col = max(max_col, col_idx)
             
-            # Convert to rows array
-            rows = []
-            for row_idx in sorted(row_dict.keys()):
-                # Sort cells by column
-                cells = sorted(row_dict[row_idx], key=lambda c: c["col"])
-                row = [cell["text"] for cell in cells]
-                rows.append(row)
+            # Convert to rows array, each row sorted by column
+            rows = [[text for _, text in sorted(row_dict[row_idx], key=lambda c: c[0])]
+                    for row_idx in sorted(row_dict.keys())]
             
             # Get table bounding box
-            prov = get_safe_attr(table, "prov", [])
-            table_bbox = None
-            if prov and len(prov) > 0:
-                bbox_obj = get_safe_attr(prov[0], "bbox")
-                table_bbox = extract_bbox_dict(bbox_obj)
+            prov = getattr(table, "prov", None) or []
+            table_bbox = doclingBBox(getattr(prov[0], "bbox", None)) if prov else None
             
-            normalized["tables"].append({
-                "page": page_idx,
-                "rows": rows,
-                "num_rows": len(rows),
-                "num_cols": max_col + 1,
-                "bbox": table_bbox
-            })
+            tables.append(Table(page_idx, rows, max_col + 1, table_bbox))
+
+        yield page_idx, textBlocks, tables
+
+
+def normalizeDoclingPages(rawResult: Any, firstPage: int = 1) -> Iterator[Dict]:
+    """One page record (page, text_blocks, lines, tables) per Docling page, for streaming"""
+    for page, textBlocks, tables in doclingPages(rawResult, firstPage):
+        yield pageRecord(page, textBlocks, tables)
+
+
+def normalizeDoclingDocument(modelName: str, rawResult: Any, firstPage: int = 1) -> Document:
+    """
+    Enhanced normalization with better text segmentation and cleaning for Docling output.
+    
+    Args:
+        modelName: Name of the model used for extraction
+        rawResult: Raw result object from Docling with pages, char_cells, and tables
+        firstPage: Page number of the first converted page (the start of the page range)
+        
+    Returns:
+        Typed Document with text blocks and tables
+    """
+    document = Document(modelName)
+    total_pages = 0
+    for _, textBlocks, tables in doclingPages(rawResult, firstPage):
+        total_pages += 1
+        document.textBlocks.extend(textBlocks)
+        document.tables.extend(tables)
 
     # Update metadata
-    normalized["metadata"]["total_pages"] = len(pages)
-    normalized["metadata"]["total_text_blocks"] = len(normalized["text_blocks"])
-    normalized["metadata"]["total_tables"] = len(normalized["tables"])
+    document.metadata = {
+        "total_pages": total_pages,
+        "total_text_blocks": len(document.textBlocks),
+        "total_tables": len(document.tables)
+    }
+
+    logger.debug("Normalized Docling result", extra={
+        "pages": total_pages,
+        "text_blocks": len(document.textBlocks),
+        "tables": len(document.tables)
+    })
+
+    return document
 
-    # Write to file
-    try:
-        with open("normalized_docling_output.json", "w", encoding="utf-8") as f:
-            json.dump(normalized, f, indent=2, ensure_ascii=False)
-        print(f"✓ Normalized result written to normalized_docling_output.json")
-        print(f"  Pages: {normalized['metadata']['total_pages']}")
-        print(f"  Text blocks: {normalized['metadata']['total_text_blocks']}")
-        print(f"  Tables: {normalized['metadata']['total_tables']}")
-    except Exception as e:
-        print(f"✗ Failed to write normalized result: {e}")
 
-    return normalized
\ No newline at end of file
+def normalizeResultEnhanced(modelName: str, rawResult: Any, firstPage: int = 1) -> Dict:
+    """normalizeDoclingDocument as the normalized dict: text_blocks, tables, lines and metadata"""
+    return normalizeDoclingDocument(modelName, rawResult, firstPage).toDict()
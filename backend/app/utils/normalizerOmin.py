@@ -1,114 +1,66 @@
-import json
-import re
-from typing import Any, Dict, List, Optional
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from .document import Document, Font, OmniTable, OmniTextBlock, Origin, SizedBBox, pageRecord
+from .textCleaner import cleanText
 
-def normalizeOmnidocsResult(rawResult: Dict[str, Any]) -> Dict:
+logger = logging.getLogger(__name__)
+
+# Bump whenever normalizeOmnidocsResult output changes so cached results are invalidated
+NORMALIZER_VERSION = "5"
+
+
+def sizedBBox(bbox: Optional[List[float]]) -> Optional[SizedBBox]:
+    """[left, top, right, bottom] coordinates as a top-left origin bbox"""
+    if not bbox or len(bbox) < 4:
+        return None
+    return SizedBBox(bbox[0], bbox[1], bbox[2], bbox[3], Origin.TOPLEFT)
+
+
+def collectOmnidocsBlocks(rawResult: Dict[str, Any]) -> Document:
     """
-    Normalize Omnidocs output format with text blocks and tables.
+    Clean and convert Omnidocs text blocks and tables, sorted by page.
     
     Args:
         rawResult: Dictionary with 'text' and 'tables' keys from Omnidocs
         
     Returns:
-        Normalized dictionary matching the standard format
+        Document with the text blocks and tables; metadata is left empty
     """
-    normalized = {
-        "model": "omnidocs",
-        "text_blocks": [],
-        "tables": [],
-        "lines": [],
-        "metadata": {
-            "total_pages": 0,
-            "total_text_blocks": 0,
-            "total_tables": 0,
-            "total_lines": 0
-        }
-    }
-
-    def clean_text(text: str) -> str:
-        """Clean and normalize text content"""
-        if not text:
-            return ""
-        
-        # Remove excessive pipe characters but preserve single ones
-        text = re.sub(r'\|{2,}', ' | ', text)
-        
-        # Add space after email addresses before capital letters
-        text = re.sub(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})([A-Z])', r'\1 \2', text)
-        
-        # Add space after phone numbers before letters
-        text = re.sub(r'(\+\d{10,15})([A-Za-z])', r'\1 \2', text)
-        
-        # Add space between lowercase and uppercase (camelCase splitting)
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-        
-        # Clean up multiple spaces
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
-
-    def convert_bbox_format(bbox: List[float]) -> Dict:
-        """
-        Convert [x0, y0, x1, y1] bbox to standard format.
-        
-        Args:
-            bbox: [left, top, right, bottom] coordinates
-        """
-        if not bbox or len(bbox) < 4:
-            return None
-        
-        return {
-            "l": bbox[0],
-            "t": bbox[1],
-            "r": bbox[2],
-            "b": bbox[3],
-            "width": bbox[2] - bbox[0],
-            "height": bbox[3] - bbox[1],
-            "coord_origin": "TOPLEFT"
-        }
+    document = Document("omnidocs")
 
     # Process text blocks
     text_data = rawResult.get("text", {})
     text_blocks = text_data.get("text_blocks", [])
     
-    page_numbers = set()
-    
     for block in text_blocks:
         text_content = block.get("text", "")
         if not text_content or not text_content.strip():
             continue
         
-        cleaned_text = clean_text(text_content)
+        cleaned_text = cleanText(text_content)
         if not cleaned_text:
             continue
         
-        page_num = block.get("page_num", 1)
-        page_numbers.add(page_num)
-        
         # Extract font information
         font_info = block.get("font_info", {})
         
-        # Build normalized text block
-        text_block = {
-            "page": page_num,
-            "content": cleaned_text,
-            "bbox": convert_bbox_format(block.get("bbox")),
-            "block_type": block.get("block_type", "paragraph"),
-            "confidence": block.get("confidence", 1.0),
-            "reading_order": block.get("reading_order"),
-            "font_info": {
-                "font_name": font_info.get("font_name"),
-                "font_size": font_info.get("font_size"),
-                "bold": font_info.get("bold", False),
-                "italic": font_info.get("italic", False),
-                "color": font_info.get("color")
-            },
-            "language": block.get("language")
-        }
-        
-        normalized["text_blocks"].append(text_block)
-        normalized["lines"].append(cleaned_text)
+        document.textBlocks.append(OmniTextBlock(
+            page=block.get("page_num", 1),
+            content=cleaned_text,
+            bbox=sizedBBox(block.get("bbox")),
+            blockType=block.get("block_type", "paragraph"),
+            confidence=block.get("confidence", 1.0),
+            readingOrder=block.get("reading_order"),
+            font=Font(
+                name=font_info.get("font_name"),
+                size=font_info.get("font_size"),
+                bold=font_info.get("bold", False),
+                italic=font_info.get("italic", False),
+                color=font_info.get("color")
+            ),
+            language=block.get("language")
+        ))
 
     # Process tables
     tables_data = rawResult.get("tables", {})
@@ -121,9 +73,6 @@ def normalizeOmnidocsResult(rawResult: Dict[str, Any]) -> Dict:
         tables_list = []
     
     for table in tables_list:
-        page_num = table.get("page_num", 1)
-        page_numbers.add(page_num)
-        
         # Extract table data
         table_data = table.get("data", [])
         
@@ -131,54 +80,129 @@ def normalizeOmnidocsResult(rawResult: Dict[str, Any]) -> Dict:
         cleaned_rows = []
         for row in table_data:
             if isinstance(row, list):
-                cleaned_row = [clean_text(str(cell)) if cell else "" for cell in row]
+                cleaned_row = [cleanText(str(cell)) if cell else "" for cell in row]
                 cleaned_rows.append(cleaned_row)
             else:
                 cleaned_rows.append([str(row)])
         
-        # Calculate dimensions
-        num_rows = len(cleaned_rows)
-        num_cols = max((len(row) for row in cleaned_rows), default=0)
-        
-        # Build normalized table
-        table_block = {
-            "page": page_num,
-            "rows": cleaned_rows,
-            "num_rows": num_rows,
-            "num_cols": num_cols,
-            "bbox": convert_bbox_format(table.get("bbox")),
-            "confidence": table.get("confidence"),
-            "table_type": table.get("table_type", "standard"),
-            "has_header": table.get("has_header", False)
-        }
-        
-        normalized["tables"].append(table_block)
+        document.tables.append(OmniTable(
+            page=table.get("page_num", 1),
+            rows=cleaned_rows,
+            numCols=max((len(row) for row in cleaned_rows), default=0),
+            bbox=sizedBBox(table.get("bbox")),
+            confidence=table.get("confidence"),
+            tableType=table.get("table_type", "standard"),
+            hasHeader=table.get("has_header", False)
+        ))
 
     # Sort text blocks by page and reading order
-    normalized["text_blocks"].sort(
-        key=lambda x: (x["page"], x.get("reading_order", 999999))
+    document.textBlocks.sort(
+        key=lambda block: (block.page, block.readingOrder if block.readingOrder is not None else 999999)
     )
     
     # Sort tables by page
-    normalized["tables"].sort(key=lambda x: x["page"])
+    document.tables.sort(key=lambda table: table.page)
+
+    return document
+
+
+def normalizeOmnidocsPages(rawResult: Dict[str, Any]) -> Iterator[Dict]:
+    """
+    Normalize Omnidocs output grouped by page, in page order.
+    
+    Args:
+        rawResult: Dictionary with 'text' and 'tables' keys from Omnidocs
+        
+    Yields:
+        One record per page that has content, with page, text_blocks, lines and tables
+    """
+    document = collectOmnidocsBlocks(rawResult)
+
+    pages: Dict[int, Tuple[List[OmniTextBlock], List[OmniTable]]] = {}
+    for page_num in sorted({block.page for block in document.textBlocks} | {table.page for table in document.tables}):
+        pages[page_num] = ([], [])
+
+    for text_block in document.textBlocks:
+        pages[text_block.page][0].append(text_block)
+
+    for table_block in document.tables:
+        pages[table_block.page][1].append(table_block)
+
+    for page_num in list(pages):
+        yield pageRecord(page_num, *pages.pop(page_num))
+
+
+def summarizeTableDetection(decisions: List[Dict], seconds: float) -> Dict:
+    """
+    What the table pre-filter decided: the pages Camelot ran on, with the
+    candidate regions and why, and the pages it skipped, by reason.
+    """
+    candidates = [decision for decision in decisions if decision["reason"] in ("ruled", "aligned_columns")]
+    reasons: Dict[str, int] = {}
+    skipped: Dict[str, List[int]] = {}
+    for decision in decisions:
+        reasons[decision["reason"]] = reasons.get(decision["reason"], 0) + 1
+        if decision["reason"] not in ("ruled", "aligned_columns"):
+            skipped.setdefault(decision["reason"], []).append(decision["page"])
+    return {
+        "pages_checked": len(decisions),
+        "camelot_pages": [decision["page"] for decision in candidates],
+        "skipped_pages": len(decisions) - len(candidates),
+        "reasons": reasons,
+        "candidates": candidates,
+        "skipped": skipped,
+        "detect_ms": round(seconds * 1000, 1),
+    }
+
+
+def tableDecisions(summary: Dict) -> Dict[int, Dict]:
+    """Every checked page's decision (page, reason, regions), recovered from a summary"""
+    decisions = {decision["page"]: decision for decision in summary.get("candidates", [])}
+    for reason, pages in summary.get("skipped", {}).items():
+        for page in pages:
+            decisions[page] = {"page": page, "reason": reason, "regions": []}
+    return decisions
+
+
+def normalizeOmnidocsDocument(rawResult: Dict[str, Any]) -> Document:
+    """
+    Normalize Omnidocs output format with text blocks and tables.
+    
+    Args:
+        rawResult: Dictionary with 'text' and 'tables' keys from Omnidocs
+        
+    Returns:
+        Typed Document with text blocks, tables and metadata
+    """
+    document = collectOmnidocsBlocks(rawResult)
+    page_numbers = {block.page for block in document.textBlocks} | {table.page for table in document.tables}
 
     # Update metadata
-    normalized["metadata"]["total_pages"] = len(page_numbers) if page_numbers else 1
-    normalized["metadata"]["total_text_blocks"] = len(normalized["text_blocks"])
-    normalized["metadata"]["total_tables"] = len(normalized["tables"])
-    normalized["metadata"]["total_lines"] = len(normalized["lines"])
-
-    # Write to file
-    try:
-        with open("normalized_omnidocs_output.json", "w", encoding="utf-8") as f:
-            json.dump(normalized, f, indent=2, ensure_ascii=False)
-        print(f"✓ Normalized Omnidocs result written to normalized_omnidocs_output.json")
-        print(f"  Pages: {normalized['metadata']['total_pages']}")
-        print(f"  Text blocks: {normalized['metadata']['total_text_blocks']}")
-        print(f"  Tables: {normalized['metadata']['total_tables']}")
-        print(f"  Lines: {normalized['metadata']['total_lines']}")
-    except Exception as e:
-        print(f"✗ Failed to write normalized result: {e}")
-
-    return normalized
+    document.metadata = {
+        "total_pages": len(page_numbers) if page_numbers else 1,
+        "total_text_blocks": len(document.textBlocks),
+        "total_tables": len(document.tables),
+        "total_lines": len(document.textBlocks)
+    }
+    ocrPages = rawResult.get("text", {}).get("ocr_pages")
+    if ocrPages:
+        # Pages without a text layer whose text_blocks came from OCR
+        document.metadata["ocr_pages"] = ocrPages
+    tableData = rawResult.get("tables", {})
+    if "table_detection" in tableData:
+        document.metadata["table_detection"] = summarizeTableDetection(
+            tableData["table_detection"], tableData.get("table_detection_seconds", 0.0))
+
+    logger.debug("Normalized Omnidocs result", extra={
+        "pages": document.metadata["total_pages"],
+        "text_blocks": document.metadata["total_text_blocks"],
+        "tables": document.metadata["total_tables"],
+        "lines": document.metadata["total_lines"]
+    })
 
+    return document
+
+
+def normalizeOmnidocsResult(rawResult: Dict[str, Any]) -> Dict:
+    """normalizeOmnidocsDocument as the normalized dict matching the standard format"""
+    return normalizeOmnidocsDocument(rawResult).toDict()
@@ -0,0 +1,42 @@
+import json
+from typing import Dict, Iterator
+
+STREAM_FORMATS = ("ndjson", "sse")
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def pagesFromNormalized(normalized: Dict) -> Iterator[Dict]:
+    """
+    Split an already-normalized result back into per-page records.
+
+    Used when a streamed request is served from the result cache.
+    """
+    pageRecords = {}
+
+    def record(page):
+        if page not in pageRecords:
+            pageRecords[page] = {"page": page, "text_blocks": [], "lines": [], "tables": []}
+        return pageRecords[page]
+
+    for text_block in normalized.get("text_blocks", []):
+        pageRecord = record(text_block.get("page"))
+        pageRecord["text_blocks"].append(text_block)
+        pageRecord["lines"].append(text_block.get("content", ""))
+
+    for table in normalized.get("tables", []):
+        record(table.get("page"))["tables"].append(table)
+
+    for page in sorted(pageRecords, key=lambda p: (p is None, p or 0)):
+        yield pageRecords[page]
+
+
+def encodeRecord(record: Dict, fmt: str) -> bytes:
+    """Encode one stream record as an NDJSON line or a Server-Sent Event"""
+    payload = json.dumps(record, ensure_ascii=False, default=str)
+    if fmt == "sse":
+        return f"event: {record.get('type', 'message')}\ndata: {payload}\n\n".encode("utf-8")
+    return (payload + "\n").encode("utf-8")
@@ -0,0 +1,54 @@
+import re
+from functools import lru_cache
+
+# Patterns are compiled once at import instead of on every clean_text call
+PIPE_RUN = re.compile(r'\|{2,}')
+EMAIL_BEFORE_CAPITAL = re.compile(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})([A-Z])')
+PHONE_BEFORE_LETTER = re.compile(r'(\+\d{10,15})([A-Za-z])')
+CAMEL_CASE_BOUNDARY = re.compile(r'(?<=[a-z])(?=[A-Z])')
+
+# Strings up to this length (table headers, repeated footers, short lines) are memoized
+MEMO_MAX_LENGTH = 64
+MEMO_SIZE = 8192
+
+
+def cleanTextUncached(text: str) -> str:
+    """Clean one string without consulting the memo"""
+    # Remove excessive pipe characters but preserve single ones
+    if "||" in text:
+        text = PIPE_RUN.sub(' | ', text)
+
+    # Add space after email addresses before capital letters
+    if "@" in text:
+        text = EMAIL_BEFORE_CAPITAL.sub(r'\1 \2', text)
+
+    # Add space after phone numbers before letters
+    if "+" in text:
+        text = PHONE_BEFORE_LETTER.sub(r'\1 \2', text)
+
+    # Add space between lowercase and uppercase (camelCase splitting).
+    # This also covers the old "and"/"with" + capital passes, which only
+    # ever matched a lowercase letter followed by an uppercase one.
+    text = CAMEL_CASE_BOUNDARY.sub(' ', text)
+
+    # Collapse whitespace runs and strip in one pass
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def cleanShortText(text: str) -> str:
+    return cleanTextUncached(text)
+
+
+def cleanText(text: str) -> str:
+    """
+    Clean and normalize extracted text content.
+
+    Shared by the Docling and Omnidocs normalizers; short strings are
+    memoized since headers and footers repeat on every page.
+    """
+    if not text:
+        return ""
+    if len(text) <= MEMO_MAX_LENGTH:
+        return cleanShortText(text)
+    return cleanTextUncached(text)
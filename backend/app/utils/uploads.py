@@ -0,0 +1,361 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Coroutine, Iterator, List, Optional, Union
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.routing import APIRoute
+from multipart.multipart import parse_options_header
+from starlette.datastructures import FormData, Headers
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import config
+
+PdfSource = Union[str, bytes, bytearray, memoryview]
+
+
+class UploadTooLargeError(ValueError):
+    """Raised while spooling once an upload exceeds the configured limit"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit} byte limit")
+        self.limit = limit
+
+
+# Multipart framing a request body may add on top of UPLOAD_MAX_BYTES of files
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class BodyLimitMiddleware:
+    """
+    Caps POST bodies at maxBytes (plus multipart framing) while they are received.
+
+    A declared Content-Length over the limit is refused before anything is
+    read. Bodies without one (chunked transfer) are counted as the ASGI
+    server hands them over: the first chunk past the limit stops the read,
+    so SpoolingMultiPartParser never spools more than maxBytes. Either way the
+    response comes from onTooLarge.
+    """
+
+    def __init__(self, app: ASGIApp, maxBytes: int,
+                 onTooLarge: Callable[[Request, UploadTooLargeError], Awaitable[Response]]):
+        self.app = app
+        self.maxBytes = maxBytes
+        self.limit = maxBytes + MULTIPART_OVERHEAD_BYTES
+        self.onTooLarge = onTooLarge
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        contentLength = Headers(scope=scope).get("content-length")
+        if contentLength and contentLength.isdigit() and int(contentLength) > self.limit:
+            await self.reject(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limitedReceive() -> Message:
+            nonlocal received, exceeded
+            if exceeded:
+                raise UploadTooLargeError(self.maxBytes)
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    exceeded = True
+                    raise UploadTooLargeError(self.maxBytes)
+            return message
+
+        async def guardedSend(message: Message):
+            nonlocal started
+            # Whatever the app makes of the aborted body is replaced by the 413
+            if exceeded and not started:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limitedReceive, guardedSend)
+        except Exception:
+            if not exceeded or started:
+                raise
+        if exceeded and not started:
+            await self.reject(scope, receive, send)
+
+    async def reject(self, scope: Scope, receive: Receive, send: Send):
+        response = await self.onTooLarge(Request(scope, receive), UploadTooLargeError(self.maxBytes))
+        await response(scope, receive, send)
+
+
+class SpooledUpload:
+    """
+    An uploaded PDF held either in memory (data) or in a unique temp file (path).
+
+    The SHA-256 is computed while spooling so the result cache never has to
+    read the document a second time.
+    """
+
+    def __init__(self, filename: str, size: int, sha256: str,
+                 path: Optional[str] = None, data: Optional[bytes] = None):
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.path = path
+        self.data = data
+
+    @property
+    def source(self) -> PdfSource:
+        return self.data if self.data is not None else self.path
+
+    def cleanup(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+        self.data = None
+
+
+class SpoolWriter:
+    """
+    Accumulates one document's chunks, hashing as it goes.
+
+    Data stays in memory up to memoryMaxBytes and then moves to a unique
+    file in uploadDir, so concurrent uploads with the same name never collide.
+    """
+
+    def __init__(self, filename: str, memoryMaxBytes: int = 0,
+                 uploadDir: str = config.UPLOAD_DIR):
+        self.filename = filename
+        self.memoryMaxBytes = memoryMaxBytes
+        self.uploadDir = uploadDir
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.buffer = bytearray()
+        self.path: Optional[str] = None
+        self.out = None
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self.digest.update(chunk)
+
+        if self.out is None and self.size <= self.memoryMaxBytes:
+            self.buffer += chunk
+            return
+
+        if self.out is None:
+            os.makedirs(self.uploadDir, exist_ok=True)
+            suffix = os.path.splitext(self.filename or "")[1] or ".pdf"
+            fd, self.path = tempfile.mkstemp(prefix="upload_", suffix=suffix, dir=self.uploadDir)
+            self.out = os.fdopen(fd, "wb")
+            if self.buffer:
+                self.out.write(self.buffer)
+                self.buffer = bytearray()
+        self.out.write(chunk)
+
+    def finish(self) -> SpooledUpload:
+        if self.out is not None:
+            self.out.close()
+            return SpooledUpload(self.filename, self.size, self.digest.hexdigest(), path=self.path)
+        return SpooledUpload(self.filename, self.size, self.digest.hexdigest(), data=bytes(self.buffer))
+
+    def discard(self):
+        if self.out is not None:
+            self.out.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class FormSpool(SpoolWriter):
+    """
+    The file object the multipart parser writes each uploaded part into.
+
+    Parts are hashed and spooled once, as the body is parsed, and
+    spoolUpload takes the result over as it is. A part nobody takes over is
+    discarded when the form is closed at the end of the request.
+    """
+
+    def __init__(self, filename: str, memoryMaxBytes: int = config.UPLOAD_MEMORY_MAX_BYTES,
+                 uploadDir: str = config.UPLOAD_DIR):
+        super().__init__(filename, memoryMaxBytes, uploadDir)
+        self.taken = False
+
+    @property
+    def _rolled(self) -> bool:
+        # UploadFile writes in a threadpool once this is True, and inline while the part is in memory
+        return self.out is not None
+
+    def seek(self, offset: int, whence: int = 0):
+        # The parser rewinds a part once it is complete: nothing more will be written
+        if self.out is not None:
+            self.out.close()
+
+    def take(self, maxBytes: int, memoryMaxBytes: int) -> SpooledUpload:
+        self.taken = True
+        upload = self.finish()
+        if upload.size > maxBytes:
+            upload.cleanup()
+            raise UploadTooLargeError(maxBytes)
+        if upload.data is not None and upload.size > memoryMaxBytes:
+            # Held in memory for a consumer that wants a path: its only write to disk
+            os.makedirs(self.uploadDir, exist_ok=True)
+            suffix = os.path.splitext(self.filename or "")[1] or ".pdf"
+            fd, upload.path = tempfile.mkstemp(prefix="upload_", suffix=suffix, dir=self.uploadDir)
+            with os.fdopen(fd, "wb") as out:
+                out.write(upload.data)
+            upload.data = None
+        return upload
+
+    def close(self):
+        if not self.taken:
+            self.discard()
+        self.taken = True
+
+
+class SpoolingMultiPartParser(MultiPartParser):
+    """Starlette's multipart parser, writing file parts into a FormSpool instead of a SpooledTemporaryFile"""
+
+    def on_headers_finished(self):
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is not None:
+            # Swap out the (still empty) temp file before any data reaches it
+            upload.file.close()
+            upload.file = FormSpool(upload.filename)
+            self._files_to_close_on_error[-1] = upload.file
+
+    async def parse(self) -> FormData:
+        try:
+            return await super().parse()
+        except BaseException:
+            # An aborted body (cut off by BodyLimitMiddleware, or a disconnect) leaves no spooled parts behind
+            for spool in self._files_to_close_on_error:
+                spool.close()
+            raise
+
+
+class SpoolingRequest(Request):
+    # Starlette builds its parser inside _get_form; a parsed form is returned from there as is
+    async def _get_form(self, *, max_files: Union[int, float] = 1000,
+                        max_fields: Union[int, float] = 1000) -> FormData:
+        if self._form is None and parse_options_header(self.headers.get("Content-Type"))[0] == b"multipart/form-data":
+            parser = SpoolingMultiPartParser(self.headers, self.stream(), max_files=max_files, max_fields=max_fields)
+            try:
+                self._form = await parser.parse()
+            except MultiPartException as exc:
+                raise HTTPException(status_code=400, detail=exc.message)
+        return await super()._get_form(max_files=max_files, max_fields=max_fields)
+
+
+class SpoolingRoute(APIRoute):
+    """Route class that parses multipart bodies with SpoolingMultiPartParser"""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def spoolingHandler(request: Request) -> Response:
+            return await handler(SpoolingRequest(request.scope, request.receive))
+
+        return spoolingHandler
+
+
+async def spoolUpload(file: UploadFile,
+                      maxBytes: int = config.UPLOAD_MAX_BYTES,
+                      memoryMaxBytes: int = 0,
+                      uploadDir: str = config.UPLOAD_DIR) -> SpooledUpload:
+    """
+    Take over an upload SpoolingRoute has already hashed and spooled.
+
+    Nothing is read or copied again: the request body is capped while it
+    is received, by BodyLimitMiddleware, and maxBytes here bounds each
+    file (or what is left of a batch's allowance). The parser keeps parts
+    up to UPLOAD_MEMORY_MAX_BYTES in memory; those larger than
+    memoryMaxBytes are written once to a unique file in uploadDir.
+    """
+    spool: FormSpool = file.file
+    spool.uploadDir = uploadDir
+    return await asyncio.to_thread(spool.take, maxBytes, memoryMaxBytes)
+
+
+class ArchiveError(ValueError):
+    """Raised for unreadable archives or ones holding too many documents"""
+
+
+def expandArchive(archive: SpooledUpload,
+                  maxFiles: int,
+                  maxBytes: int = config.UPLOAD_MAX_BYTES,
+                  memoryMaxBytes: int = 0,
+                  uploadDir: str = config.UPLOAD_DIR,
+                  chunkSize: int = config.UPLOAD_CHUNK_BYTES) -> List[SpooledUpload]:
+    """
+    Spool every .pdf member of a zip upload, as spoolUpload does for files.
+
+    Sizes are enforced on the decompressed stream rather than the declared
+    member sizes, so a crafted archive cannot expand past maxBytes in total.
+    """
+    source = archive.path if archive.path else io.BytesIO(archive.data)
+    uploads: List[SpooledUpload] = []
+    total = 0
+
+    try:
+        with zipfile.ZipFile(source) as zf:
+            members = [info for info in zf.infolist()
+                       if not info.is_dir() and info.filename.lower().endswith(".pdf")
+                       and not os.path.basename(info.filename).startswith(".")]
+            if len(members) > maxFiles:
+                raise ArchiveError(f"Archive holds {len(members)} PDFs; the limit is {maxFiles}")
+
+            for info in members:
+                writer = SpoolWriter(os.path.basename(info.filename), memoryMaxBytes, uploadDir)
+                try:
+                    with zf.open(info) as member:
+                        while True:
+                            chunk = member.read(chunkSize)
+                            if not chunk:
+                                break
+                            total += len(chunk)
+                            if total > maxBytes:
+                                raise UploadTooLargeError(maxBytes)
+                            writer.write(chunk)
+                except BaseException:
+                    writer.discard()
+                    raise
+                uploads.append(writer.finish())
+    except BaseException as e:
+        for upload in uploads:
+            upload.cleanup()
+        if isinstance(e, zipfile.BadZipFile):
+            raise ArchiveError(f"Not a valid zip archive: {e}") from e
+        raise
+
+    return uploads
+
+
+@contextmanager
+def pdfPath(source: PdfSource) -> Iterator[str]:
+    """Yield a filesystem path for a source, writing in-memory bytes to a temp file"""
+    if isinstance(source, str):
+        yield source
+        return
+
+    fd, path = tempfile.mkstemp(prefix="source_", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        yield path
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def hashSource(source: PdfSource) -> str:
+    """SHA-256 of an in-memory source; paths go through cache.hashFile"""
+    return hashlib.sha256(source).hexdigest()
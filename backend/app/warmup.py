@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from .executor import ExtractionExecutor
+from .extractor_factory import ExtractorFactory
+
+logger = logging.getLogger(__name__)
+
+
+def writeWarmupPdf(path: str):
+    """One small page with a heading, a paragraph and a ruled 3x3 table"""
+    import fitz
+
+    with fitz.open() as doc:
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 80), "Warm-up document", fontsize=16)
+        page.insert_text((72, 110), "This page exercises text, layout and table extraction.", fontsize=10)
+
+        top, left, cellW, cellH = 150, 72, 120, 24
+        for row in range(3):
+            for col in range(3):
+                x, y = left + col * cellW, top + row * cellH
+                page.draw_rect(fitz.Rect(x, y, x + cellW, y + cellH), color=(0, 0, 0), width=0.5)
+                label = "Header" if row == 0 else f"R{row}C{col}"
+                page.insert_text((x + 6, y + 16), label, fontsize=9)
+        doc.save(path)
+
+
+def loadModel(model: str, warmup: bool = False) -> Dict:
+    """
+    Construct a model's extractor and optionally run one document through it.
+
+    Module level so it can run on a process pool worker.
+    """
+    from .facade import runExtraction
+
+    start = time.perf_counter()
+    ExtractorFactory.getExtractor(model)
+    timings = {"load_seconds": round(time.perf_counter() - start, 3), "warmup_seconds": None}
+
+    if warmup:
+        workDir = tempfile.mkdtemp(prefix="warmup_")
+        try:
+            pdfPath = os.path.join(workDir, "warmup.pdf")
+            writeWarmupPdf(pdfPath)
+            start = time.perf_counter()
+            runExtraction(model, pdfPath)
+            timings["warmup_seconds"] = round(time.perf_counter() - start, 3)
+        finally:
+            shutil.rmtree(workDir, ignore_errors=True)
+
+    return timings
+
+
+class ModelState:
+    def __init__(self, model: str):
+        self.model = model
+        self.status = "pending"
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def toDict(self) -> Dict:
+        return {
+            "status": self.status,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+
+class ModelReadiness:
+    """Tracks startup preload of the configured models for /ready"""
+
+    def __init__(self, models: List[str]):
+        self.states = {model: ModelState(model) for model in models}
+
+    async def preload(self, executor: ExtractionExecutor, warmup: bool = False):
+        """Load every model on its own pool, concurrently"""
+        await asyncio.gather(*(self._preloadOne(executor, state, warmup)
+                               for state in self.states.values()))
+
+    async def _preloadOne(self, executor: ExtractionExecutor, state: ModelState, warmup: bool):
+        state.status = "loading"
+        try:
+            timings = await executor.run(state.model, loadModel, state.model, warmup)
+        except Exception as e:
+            state.status = "failed"
+            state.error = f"{type(e).__name__}: {e}"
+            logger.error("Failed to preload model", extra={"model": state.model, "error": state.error})
+            return
+
+        state.load_seconds = timings["load_seconds"]
+        state.warmup_seconds = timings["warmup_seconds"]
+        state.status = "ready"
+        logger.info("Preloaded model", extra={"model": state.model, "load_seconds": state.load_seconds,
+                                              "warmup_seconds": state.warmup_seconds})
+
+    @property
+    def ready(self) -> bool:
+        return all(state.status == "ready" for state in self.states.values())
+
+    def report(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "models": {model: state.toDict() for model, state in self.states.items()},
+        }
@@ -0,0 +1,62 @@
+from typing import List, Optional, Tuple
+
+from . import config
+from .schemas.options import ExtractOptions
+from .utils.uploads import PdfSource
+
+
+def countPages(source: PdfSource) -> int:
+    # PyMuPDF only reads the page tree here, not page content
+    import fitz
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=bytes(source), filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    with doc:
+        return doc.page_count
+
+
+def pageWindows(totalPages: int, pageRange: Optional[Tuple[int, int]], windowPages: int) -> List[Tuple[int, int]]:
+    """Inclusive (first, last) windows of at most windowPages pages covering the requested pages"""
+    first, last = 1, totalPages
+    if pageRange:
+        first, last = pageRange[0], min(pageRange[1], totalPages)
+    return [(start, min(start + windowPages - 1, last)) for start in range(first, last + 1, windowPages)]
+
+
+def windowsOf(source: PdfSource, options: ExtractOptions, windowPages: int) -> List[Tuple[int, int]]:
+    """windowPages-page windows over the requested pages, or [] when one window would cover them"""
+    if windowPages <= 0:
+        return []
+    if options.pages and options.pages[1] - options.pages[0] < windowPages:
+        return []
+    windows = pageWindows(countPages(source), options.pages, windowPages)
+    return windows if len(windows) > 1 else []
+
+
+def documentWindows(model: str, source: PdfSource, options: ExtractOptions) -> List[Tuple[int, int]]:
+    """
+    The windows a request is extracted in, or [] when it is extracted in one go.
+
+    Only Docling is windowed: its raw result keeps every page's character
+    cells alive, so memory grows with the document. OmniDocs already works
+    through page chunks.
+    """
+    if model.lower() != "docling":
+        return []
+    return windowsOf(source, options, config.DOCLING_WINDOW_PAGES)
+
+
+def streamWindows(model: str, source: PdfSource, options: ExtractOptions) -> List[Tuple[int, int]]:
+    """
+    The windows a streamed request is extracted in, or [] when it is extracted in one go.
+
+    Both models are windowed here, so the first pages go out after one
+    window instead of after the whole document. Docling keeps its smaller
+    DOCLING_WINDOW_PAGES when that is set lower.
+    """
+    windowPages = config.STREAM_WINDOW_PAGES
+    if model.lower() == "docling" and config.DOCLING_WINDOW_PAGES > 0:
+        windowPages = min(windowPages, config.DOCLING_WINDOW_PAGES) if windowPages > 0 else config.DOCLING_WINDOW_PAGES
+    return windowsOf(source, options, windowPages)
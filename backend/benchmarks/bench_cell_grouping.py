@@ -0,0 +1,150 @@
+"""
+Micro-benchmark for Docling cell grouping.
+
+Compares app.utils.normalizerDoc.groupCellsIntoBlocks against the
+should_merge_cells path normalizeResultEnhanced used before (cells grouped
+into per-line dicts, sorted, then merged pairwise), and checks both produce
+the same blocks, in the same order, on fixture pages and on randomized
+pages built around the merge thresholds (overlaps, ties, gaps of exactly
+max_x_gap, lines max_y_diff apart).
+
+Usage (from backend/):
+    python -m benchmarks.bench_cell_grouping
+    python -m benchmarks.bench_cell_grouping --pages 200 --random-pages 2000 --repeat 5
+"""
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from typing import List, Tuple
+
+from app.utils.normalizerDoc import groupCellsIntoBlocks
+from benchmarks.synthetic import doclingFixture
+
+Cells = Tuple[List[float], List[float], List[float]]
+
+
+def legacyGroupCells(y_positions: List[float], x_starts: List[float], x_ends: List[float],
+                     max_y_diff: float = 3.0, max_x_gap: float = 30.0) -> List[List[int]]:
+    """The per-cell dict grouping and pairwise merge previously inside normalizeResultEnhanced"""
+    def should_merge_cells(cell1, cell2):
+        if abs(cell1["y_pos"] - cell2["y_pos"]) > max_y_diff:
+            return False
+        x_gap = cell2["x_start"] - cell1["x_end"]
+        if x_gap > max_x_gap or x_gap < -5:
+            return False
+        return True
+
+    lines_data = defaultdict(list)
+    for index, (y_pos, x_start, x_end) in enumerate(zip(y_positions, x_starts, x_ends)):
+        lines_data[y_pos].append({"cells": [index], "x_start": x_start, "x_end": x_end, "y_pos": y_pos})
+
+    all_cells = []
+    for cells_group in lines_data.values():
+        cells_group.sort(key=lambda c: c["x_start"])
+        all_cells.extend(cells_group)
+    all_cells.sort(key=lambda c: (c["y_pos"], c["x_start"]))
+    if not all_cells:
+        return []
+
+    merged_blocks = []
+    current_block = dict(all_cells[0], cells=list(all_cells[0]["cells"]))
+    for next_cell in all_cells[1:]:
+        if should_merge_cells(current_block, next_cell):
+            current_block["cells"] += next_cell["cells"]
+            current_block["x_end"] = max(current_block["x_end"], next_cell["x_end"])
+        else:
+            merged_blocks.append(current_block)
+            current_block = dict(next_cell, cells=list(next_cell["cells"]))
+    merged_blocks.append(current_block)
+    return [block["cells"] for block in merged_blocks]
+
+
+def groupedBlocks(cells: Cells) -> List[List[int]]:
+    if not cells[0]:
+        return []
+    order, starts = groupCellsIntoBlocks(*cells)
+    ends = starts[1:] + [len(order)]
+    return [order[start:end] for start, end in zip(starts, ends)]
+
+
+def fixturePages(pages: int) -> List[Cells]:
+    """Non-whitespace char cells of doclingFixture pages, as the normalizer loads them"""
+    result = []
+    for page in doclingFixture(pages, "high", 1).pages:
+        cells = [cell for cell in page.parsed_page.char_cells if not cell.text.isspace()]
+        result.append(([round(cell.rect.r_y0, 1) for cell in cells],
+                       [cell.rect.r_x0 for cell in cells],
+                       [cell.rect.r_x1 for cell in cells]))
+    return result
+
+
+def randomPages(pages: int, seed: int = 11) -> List[Cells]:
+    """Cells placed on and around the merge thresholds, in shuffled input order"""
+    rnd = random.Random(seed)
+    steps = [0.0, 0.5, 2.9, 3.0, 3.1, 12.0]
+    gaps = [-6.0, -5.1, -5.0, -1.0, 0.0, 0.0, 2.0, 29.9, 30.0, 30.1, 45.0]
+    result = []
+    for _ in range(pages):
+        ys, x0s, x1s = [], [], []
+        y = 700.0
+        for _ in range(rnd.randint(0, 12)):
+            y = round(y - rnd.choice(steps), 1)
+            x = rnd.uniform(40, 80)
+            for _ in range(rnd.randint(1, 25)):
+                width = rnd.choice([0.0, 4.0, 5.2, 8.0, -1.0])
+                ys.append(round(y + rnd.choice([0.0, 0.0, 0.1, -0.1]), 1))
+                x0s.append(round(x, 2))
+                x1s.append(round(x + width, 2))
+                x = x + width + rnd.choice(gaps)
+        cells = list(zip(ys, x0s, x1s))
+        rnd.shuffle(cells)
+        result.append(([c[0] for c in cells], [c[1] for c in cells], [c[2] for c in cells]))
+    return result
+
+
+def timeGrouping(grouping, pages: List[Cells], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for cells in pages:
+            grouping(cells)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="fixture pages (high density)")
+    parser.add_argument("--random-pages", type=int, default=1000, help="randomized threshold pages")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per implementation; best run is reported")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    fixture = fixturePages(args.pages)
+    for name, pages in (("fixture", fixture), ("random", randomPages(args.random_pages))):
+        mismatches = sum(1 for cells in pages if legacyGroupCells(*cells) != groupedBlocks(cells))
+        if mismatches:
+            raise SystemExit(f"groupCellsIntoBlocks differs from the legacy merge on {mismatches} {name} pages")
+
+    cellCount = sum(len(cells[0]) for cells in fixture)
+    results = {"pages": len(fixture), "cells": cellCount}
+    for name, grouping in (("legacy", lambda cells: legacyGroupCells(*cells)), ("vectorized", groupedBlocks)):
+        seconds = timeGrouping(grouping, fixture, args.repeat)
+        results[name] = {"seconds": round(seconds, 4), "cells_per_sec": round(cellCount / seconds)}
+    results["speedup"] = round(results["legacy"]["seconds"] / results["vectorized"]["seconds"], 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Fixture: {results['pages']} pages, {results['cells']} cells (identical blocks on fixture and random pages)")
+    for name in ("legacy", "vectorized"):
+        r = results[name]
+        print(f"  {name:<10} {r['seconds']:>8.3f}s  {r['cells_per_sec']:>12,} cells/s")
+    print(f"  speedup {results['speedup']}x")
+
+
+if __name__ == "__main__":
+    main()
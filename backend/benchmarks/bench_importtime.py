@@ -0,0 +1,110 @@
+"""
+Startup import budget for the API process.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter,
+summarizes the slowest top-level packages, and fails when the total import
+time exceeds --budget-ms or when a model library (docling, torch, PyMuPDF,
+...) is imported at startup. Model backends must only load on first use
+or preload, through ExtractorFactory.
+
+Usage (from backend/):
+    python -m benchmarks.bench_importtime
+    python -m benchmarks.bench_importtime --budget-ms 1500 --top 15
+    python -m benchmarks.bench_importtime --module app.facade --json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+# Packages that must not be imported just to start the API
+FORBIDDEN = ("docling", "docling_core", "docling_parse", "torch", "easyocr", "camelot", "fitz", "omnidocs",
+             "transformers", "cv2", "numpy")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parseImportTime(stderr: str) -> List[Dict]:
+    """One entry per imported module: name, depth, self and cumulative microseconds"""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            selfUs, cumulativeUs, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "depth": (len(indent) - 1) // 2,
+                "self_us": int(selfUs),
+                "cumulative_us": int(cumulativeUs),
+            })
+    return entries
+
+
+def measureImport(module: str, runs: int) -> Dict:
+    """Best of `runs` cold imports, so one slow filesystem read does not fail the budget"""
+    env = dict(os.environ)
+    # Importing must not depend on (or create) cache and upload directories
+    env.setdefault("CACHE_DIR", "")
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        entries = parseImportTime(proc.stderr)
+        total = sum(entry["self_us"] for entry in entries)
+        if best is None or total < best["total_us"]:
+            best = {"total_us": total, "entries": entries}
+    return best
+
+
+def summarize(entries: List[Dict], top: int) -> Dict:
+    topLevel: Dict[str, int] = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        topLevel[package] = topLevel.get(package, 0) + entry["self_us"]
+    slowest = sorted(topLevel.items(), key=lambda item: item[1], reverse=True)[:top]
+    imported = {entry["module"].split(".")[0] for entry in entries}
+    return {
+        "modules": len(entries),
+        "slowest_packages": [{"package": name, "ms": round(us / 1000, 1)} for name, us in slowest],
+        "forbidden_imported": sorted(imported & set(FORBIDDEN)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="module whose import is measured")
+    parser.add_argument("--budget-ms", type=float, default=2000, help="fail above this total import time")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level packages to list")
+    parser.add_argument("--runs", type=int, default=3, help="cold imports to take the best of")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    measured = measureImport(args.module, args.runs)
+    report = {
+        "module": args.module,
+        "total_ms": round(measured["total_us"] / 1000, 1),
+        "budget_ms": args.budget_ms,
+        **summarize(measured["entries"], args.top),
+    }
+    report["ok"] = report["total_ms"] <= args.budget_ms and not report["forbidden_imported"]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {args.module}: {report['total_ms']} ms over {report['modules']} modules "
+              f"(budget {args.budget_ms:g} ms)")
+        for row in report["slowest_packages"]:
+            print(f"  {row['package']:<24} {row['ms']:>8.1f} ms")
+        if report["forbidden_imported"]:
+            print(f"Model libraries imported at startup: {', '.join(report['forbidden_imported'])}")
+        print("OK" if report["ok"] else "FAIL")
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
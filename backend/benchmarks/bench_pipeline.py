@@ -0,0 +1,337 @@
+"""
+Throughput benchmark for the extraction pipeline, stage by stage.
+
+Stages:
+    upload     spoolUpload of a synthetic PDF (chunked copy + SHA-256)
+    extract    the real model on the synthetic PDF (only with --extract)
+    document   extract + normalize through runExtraction, as a pool worker runs it, once per
+               --window-pages value (Docling windows; 0 converts at once; only with --extract)
+    normalize  normalizeResultEnhanced / normalizeOmnidocsResult on fixture raw results
+    serialize  /extract response envelope encoded as JSON, and as columnar msgpack + zstd
+
+Every (scenario, model, stage) runs in a fresh process so peak RSS belongs to
+that stage alone. Results report pages/sec, p50/p95 latency and peak RSS
+(for the document stage, compare peak RSS across window sizes);
+--output writes them as JSON, and --compare diffs against an earlier file.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --pages 1,10,100 --density low,high --tables 0,3 --output bench.json
+    python -m benchmarks.bench_pipeline --compare bench.json
+    python -m benchmarks.bench_pipeline --extract --models docling --stages document --pages 500 --window-pages 0,25,50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import DENSITY_LINES, FIXTURES, writeSyntheticPdf
+
+MODELS = ("docling", "omnidocs")
+STAGES = ("upload", "extract", "document", "normalize", "serialize")
+# Stages that need the models installed
+MODEL_STAGES = ("extract", "document")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile, q in [0, 100]"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def currentRssMb() -> Optional[float]:
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1e6
+
+
+def peakRssMb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == "darwin" else peak * 1024 / 1e6
+
+
+def prepareStage(stage: str, model: str, scenario: Dict, workDir: str) -> Optional[Callable[[], int]]:
+    """
+    Build the inputs for one stage and return the callable to time.
+
+    The callable returns the number of bytes it produced (or 0). None means
+    the stage cannot run here.
+    """
+    pages, density, tables = scenario["pages"], scenario["density"], scenario["tables_per_page"]
+
+    if stage in ("upload",) + MODEL_STAGES:
+        pdfPath = os.path.join(workDir, "synthetic.pdf")
+        writeSyntheticPdf(pdfPath, pages, density, tables)
+
+    if stage == "upload":
+        from starlette.datastructures import UploadFile
+        from app import config
+        from app.utils.uploads import spoolUpload
+
+        with open(pdfPath, "rb") as f:
+            pdfBytes = f.read()
+        memoryMax = config.UPLOAD_MEMORY_MAX_BYTES if model == "docling" else 0
+        uploadDir = os.path.join(workDir, "uploads")
+
+        def upload():
+            file = UploadFile(file=io.BytesIO(pdfBytes), filename="synthetic.pdf")
+            spooled = asyncio.run(spoolUpload(file, memoryMaxBytes=memoryMax, uploadDir=uploadDir))
+            spooled.cleanup()
+            return spooled.size
+        return upload
+
+    if stage == "extract":
+        try:
+            from app.facade import runRawExtraction
+            from app.extractor_factory import ExtractorFactory
+            ExtractorFactory.getExtractor(model)
+        except ImportError:
+            return None
+
+        def extract():
+            runRawExtraction(model, pdfPath)
+            return 0
+        return extract
+
+    if stage == "document":
+        try:
+            from app import config
+            from app.facade import runExtraction
+            from app.extractor_factory import ExtractorFactory
+            ExtractorFactory.getExtractor(model)
+        except ImportError:
+            return None
+        config.DOCLING_WINDOW_PAGES = scenario.get("window_pages") or 0
+
+        def document():
+            runExtraction(model, pdfPath)
+            return 0
+        return document
+
+    from app.utils.normalizerDoc import normalizeResultEnhanced
+    from app.utils.normalizerOmin import normalizeOmnidocsResult
+
+    def normalize(raw):
+        if model == "docling":
+            return normalizeResultEnhanced(model, raw)
+        return normalizeOmnidocsResult(raw)
+
+    raw = FIXTURES[model](pages, density, tables)
+    if stage == "normalize":
+        def normalizeFixture():
+            normalize(raw)
+            return 0
+        return normalizeFixture
+
+    from app.schemas.extract import buildExtractResponse
+    from app.utils.formats import OutputFormat, msgpack, zstandard
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        normalized = normalize(raw)
+    del raw
+    formats = [OutputFormat("json")]
+    if msgpack is not None:
+        formats.append(OutputFormat("msgpack", "columnar", "zstd" if zstandard is not None else "gzip"))
+
+    def serialize():
+        size = 0
+        for output in formats:
+            response = buildExtractResponse(normalized, model, "synthetic.pdf", output.layout)
+            body, _ = output.encode(response)
+            size += len(body)
+        return size
+    return serialize
+
+
+def measureStage(stage: str, model: str, scenario: Dict, repeat: int) -> Dict:
+    """Process entry point: time one stage `repeat` times after one warm-up run"""
+    workDir = tempfile.mkdtemp(prefix="bench_")
+    result = {"model": model, "stage": stage, **scenario}
+    try:
+        fn = prepareStage(stage, model, scenario, workDir)
+        if fn is None:
+            return {**result, "skipped": "model not installed"}
+
+        # Keep stray output from the models out of the benchmark report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            fn()
+            baseline = currentRssMb()
+            timings = []
+            outputBytes = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                outputBytes = fn()
+                timings.append(time.perf_counter() - start)
+        peak = peakRssMb()
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    p50 = percentile(timings, 50)
+    return {
+        **result,
+        "runs": repeat,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 3),
+        "pages_per_sec": round(scenario["pages"] / p50, 2) if p50 else None,
+        "output_bytes": outputBytes or None,
+        "baseline_rss_mb": round(baseline, 1) if baseline is not None else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+    }
+
+
+def runIsolated(stage: str, model: str, scenario: Dict, repeat: int) -> Dict:
+    # A fresh spawned process per measurement: ru_maxrss never resets within a process
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(measureStage, stage, model, scenario, repeat).result()
+
+
+def gitCommit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def resultKey(result: Dict) -> tuple:
+    return (result["model"], result["stage"], result["pages"], result["density"], result["tables_per_page"],
+            result.get("window_pages"))
+
+
+def compareResults(previous: Dict, current: Dict) -> List[Dict]:
+    """p50 and peak RSS changes for every measurement present in both runs"""
+    before = {resultKey(r): r for r in previous.get("results", []) if "p50_ms" in r}
+    rows = []
+    for result in current["results"]:
+        old = before.get(resultKey(result))
+        if old is None or "p50_ms" not in result:
+            continue
+        rows.append({
+            "model": result["model"],
+            "stage": result["stage"],
+            "pages": result["pages"],
+            "density": result["density"],
+            "tables_per_page": result["tables_per_page"],
+            "window_pages": result.get("window_pages"),
+            "p50_ratio": round(result["p50_ms"] / old["p50_ms"], 3) if old["p50_ms"] else None,
+            "peak_rss_delta_mb": (round(result["peak_rss_mb"] - old["peak_rss_mb"], 1)
+                                  if result.get("peak_rss_mb") is not None and old.get("peak_rss_mb") is not None
+                                  else None),
+        })
+    return rows
+
+
+def csvInts(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def csvChoices(choices):
+    def parse(value: str) -> List[str]:
+        parts = [part.strip() for part in value.split(",") if part.strip()]
+        unknown = [part for part in parts if part not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown value(s) {', '.join(unknown)}; choose from {', '.join(choices)}")
+        return parts
+    return parse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=csvInts, default=[1, 10, 50], help="page counts, comma separated")
+    parser.add_argument("--density", type=csvChoices(tuple(DENSITY_LINES)), default=["medium"],
+                        help=f"text density levels: {', '.join(DENSITY_LINES)}")
+    parser.add_argument("--tables", type=csvInts, default=[1], help="tables per page, comma separated")
+    parser.add_argument("--models", type=csvChoices(MODELS), default=list(MODELS))
+    parser.add_argument("--stages", type=csvChoices(STAGES), default=[s for s in STAGES if s not in MODEL_STAGES])
+    parser.add_argument("--extract", action="store_true", help="also run the real models (must be installed)")
+    parser.add_argument("--window-pages", type=csvInts, default=[0, 50],
+                        help="document stage: DOCLING_WINDOW_PAGES values to compare, comma separated")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per measurement")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier --output file to diff against")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    stages = list(args.stages)
+    if args.extract:
+        stages = [stage for stage in STAGES if stage in stages or stage in MODEL_STAGES]
+
+    report = {
+        "meta": {
+            "commit": gitCommit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+
+    measurements = []
+    for pages, density, tables, model, stage in product(args.pages, args.density, args.tables, args.models, stages):
+        scenario = {"pages": pages, "density": density, "tables_per_page": tables}
+        if stage == "document" and model == "docling":
+            measurements.extend((stage, model, dict(scenario, window_pages=window)) for window in args.window_pages)
+        else:
+            measurements.append((stage, model, scenario))
+
+    for stage, model, scenario in measurements:
+        pages, density, tables = scenario["pages"], scenario["density"], scenario["tables_per_page"]
+        window = f" w{scenario['window_pages']}" if "window_pages" in scenario else ""
+        result = runIsolated(stage, model, scenario, args.repeat)
+        report["results"].append(result)
+        if not args.json:
+            if "skipped" in result:
+                print(f"{model:<9} {stage:<10} {pages:>4}p {density:<6} {tables}t{window}  skipped: {result['skipped']}")
+            else:
+                print(f"{model:<9} {stage:<10} {pages:>4}p {density:<6} {tables}t{window}  "
+                      f"p50 {result['p50_ms']:>9.1f}ms  p95 {result['p95_ms']:>9.1f}ms  "
+                      f"{result['pages_per_sec']:>9.1f} pages/s  peak {result['peak_rss_mb']} MB")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = {"against": args.compare, "rows": compareResults(json.load(f), report)}
+        if not args.json:
+            print(f"\nCompared with {args.compare} (p50 ratio < 1 is faster):")
+            for row in report["comparison"]["rows"]:
+                rssDelta = row["peak_rss_delta_mb"]
+                window = f" w{row['window_pages']}" if row["window_pages"] is not None else ""
+                print(f"{row['model']:<9} {row['stage']:<10} {row['pages']:>4}p {row['density']:<6} "
+                      f"{row['tables_per_page']}t{window}  p50 x{row['p50_ratio']}  "
+                      f"peak {'n/a' if rssDelta is None else f'{rssDelta:+} MB'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
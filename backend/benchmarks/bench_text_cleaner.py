@@ -0,0 +1,121 @@
+"""
+Micro-benchmark for the shared text cleaner.
+
+Compares app.utils.textCleaner.cleanText against the per-call closure the
+normalizers used to define (uncompiled patterns, one re.sub per rule), and
+checks both produce identical output on the corpus.
+
+Usage (from backend/):
+    python -m benchmarks.bench_text_cleaner
+    python -m benchmarks.bench_text_cleaner --corpus normalized_docling_output.json --repeat 5
+"""
+import argparse
+import json
+import random
+import re
+import time
+from typing import List
+
+from app.utils.textCleaner import cleanText, cleanShortText
+
+
+def legacyCleanText(text: str) -> str:
+    """The cleaner previously redefined inside normalizeResultEnhanced"""
+    if not text:
+        return ""
+    text = re.sub(r'\|{2,}', ' | ', text)
+    text = re.sub(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(\+\d{10,15})([A-Za-z])', r'\1 \2', text)
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(and)([A-Z])', r'\1 \2', text)
+    text = re.sub(r'(with)([A-Z])', r'\1 \2', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+WORDS = [
+    "Invoice", "Total", "amount", "due", "Description", "Quantity", "UnitPrice",
+    "andTax", "withVAT", "billing@example.comAccounts", "+14155550123Phone",
+    "Net", "30", "days", "||", "Page", "Subtotal", "Shipping", "Customer",
+]
+HEADERS = ["Item | Qty | Price", "Confidential", "Page 1 of 12", "Acme Corp — Annual Report"]
+
+
+def syntheticCorpus(blocks: int, seed: int = 7) -> List[str]:
+    """Mix of repeated short headers/cells and longer concatenated text runs"""
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(blocks):
+        roll = rnd.random()
+        if roll < 0.3:
+            corpus.append(rnd.choice(HEADERS))
+        elif roll < 0.7:
+            corpus.append(rnd.choice(WORDS))
+        else:
+            corpus.append(" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 40))))
+    return corpus
+
+
+def corpusFromNormalized(path: str) -> List[str]:
+    """Text blocks and table cells from a saved normalized result"""
+    with open(path, "r", encoding="utf-8") as f:
+        normalized = json.load(f)
+    if "data" in normalized:
+        normalized = normalized["data"].get("content", normalized["data"])
+
+    corpus = [block.get("content", "") for block in normalized.get("text_blocks", [])]
+    for table in normalized.get("tables", []):
+        for row in table.get("rows", []):
+            corpus.extend(str(cell) for cell in row)
+    return corpus
+
+
+def timeCleaner(cleaner, corpus: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        cleanShortText.cache_clear()
+        start = time.perf_counter()
+        for text in corpus:
+            cleaner(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="normalized JSON output to take text from (default: synthetic)")
+    parser.add_argument("--blocks", type=int, default=200_000, help="synthetic corpus size")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per cleaner; best run is reported")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    corpus = corpusFromNormalized(args.corpus) if args.corpus else syntheticCorpus(args.blocks)
+    totalBytes = sum(len(text.encode("utf-8")) for text in corpus)
+
+    mismatches = sum(1 for text in corpus if legacyCleanText(text) != cleanText(text))
+    if mismatches:
+        raise SystemExit(f"cleanText differs from the legacy cleaner on {mismatches} strings")
+
+    results = {"blocks": len(corpus), "bytes": totalBytes}
+    for name, cleaner in (("legacy", legacyCleanText), ("shared", cleanText)):
+        seconds = timeCleaner(cleaner, corpus, args.repeat)
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "blocks_per_sec": round(len(corpus) / seconds),
+            "mb_per_sec": round(totalBytes / seconds / 1e6, 2),
+        }
+    results["speedup"] = round(results["legacy"]["seconds"] / results["shared"]["seconds"], 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Corpus: {results['blocks']} blocks, {results['bytes'] / 1e6:.1f} MB")
+    for name in ("legacy", "shared"):
+        r = results[name]
+        print(f"  {name:<7} {r['seconds']:>8.3f}s  {r['blocks_per_sec']:>10,} blocks/s  {r['mb_per_sec']:>7.2f} MB/s")
+    print(f"  speedup {results['speedup']}x")
+
+
+if __name__ == "__main__":
+    main()
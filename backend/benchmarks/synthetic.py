@@ -0,0 +1,157 @@
+"""
+Synthetic inputs for the benchmarks.
+
+writeSyntheticPdf renders real PDFs for the upload and model stages;
+doclingFixture and omnidocsFixture build raw results shaped like the model
+outputs, so the normalizers can be measured without loading any model.
+All generators are seeded and deterministic.
+"""
+import random
+from types import SimpleNamespace
+from typing import Dict, List
+
+WORDS = [
+    "Invoice", "Total", "amount", "due", "Description", "Quantity", "UnitPrice",
+    "andTax", "withVAT", "billing@example.comAccounts", "+14155550123Phone",
+    "Net", "30", "days", "Page", "Subtotal", "Shipping", "Customer", "the",
+    "of", "and", "report", "quarter", "revenue", "growth", "2024", "margin",
+]
+
+# Lines of body text per page for each density level
+DENSITY_LINES = {
+    "low": 12,
+    "medium": 35,
+    "high": 60,
+}
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+LEFT_MARGIN, TOP_MARGIN = 50, 60
+LINE_HEIGHT = 12
+CHAR_WIDTH = 5.2
+TABLE_ROWS, TABLE_COLS = 5, 4
+
+
+def sentence(rnd: random.Random, minWords: int = 6, maxWords: int = 14) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(minWords, maxWords)))
+
+
+def tableCells(rnd: random.Random) -> List[List[str]]:
+    header = ["Item", "Qty", "Price", "Total"][:TABLE_COLS]
+    rows = [[f"{rnd.choice(WORDS)}", str(rnd.randint(1, 99)), f"{rnd.uniform(1, 500):.2f}",
+             f"{rnd.uniform(1, 5000):.2f}"][:TABLE_COLS] for _ in range(TABLE_ROWS - 1)]
+    return [header] + rows
+
+
+def writeSyntheticPdf(path: str, pages: int, density: str = "medium", tablesPerPage: int = 0, seed: int = 7):
+    """A PDF with `pages` pages of body text and ruled tables below it"""
+    import fitz
+
+    rnd = random.Random(seed)
+    lines = DENSITY_LINES[density]
+    with fitz.open() as doc:
+        for _ in range(pages):
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            y = TOP_MARGIN
+            for _ in range(lines):
+                page.insert_text((LEFT_MARGIN, y), sentence(rnd), fontsize=9)
+                y += LINE_HEIGHT
+
+            cellW, cellH = 110, 18
+            for _ in range(tablesPerPage):
+                y += 14
+                if y + TABLE_ROWS * cellH > PAGE_HEIGHT - TOP_MARGIN:
+                    break
+                for row, cells in enumerate(tableCells(rnd)):
+                    for col, text in enumerate(cells):
+                        x, top = LEFT_MARGIN + col * cellW, y + row * cellH
+                        page.draw_rect(fitz.Rect(x, top, x + cellW, top + cellH), color=(0, 0, 0), width=0.5)
+                        page.insert_text((x + 4, top + 12), text, fontsize=8)
+                y += TABLE_ROWS * cellH
+        doc.save(path)
+
+
+def doclingRect(x0: float, y0: float, x1: float, y1: float) -> SimpleNamespace:
+    return SimpleNamespace(r_x0=x0, r_y0=y0, r_x1=x1, r_y1=y0, r_x2=x1, r_y2=y1,
+                           r_x3=x0, r_y3=y1, coord_origin="BOTTOMLEFT")
+
+
+def doclingFixture(pages: int, density: str = "medium", tablesPerPage: int = 0, seed: int = 7) -> SimpleNamespace:
+    """
+    A raw Docling ConversionResult stand-in for normalizeResultEnhanced.
+
+    One char cell per character, as docling-parse reports them, laid out on
+    the same lines as writeSyntheticPdf.
+    """
+    rnd = random.Random(seed)
+    lines = DENSITY_LINES[density]
+    pageObjects = []
+
+    for _ in range(pages):
+        cells = []
+        y = PAGE_HEIGHT - TOP_MARGIN
+        for _ in range(lines):
+            x = LEFT_MARGIN
+            for char in sentence(rnd):
+                cells.append(SimpleNamespace(text=char, rect=doclingRect(x, y, x + CHAR_WIDTH, y + 9)))
+                x += CHAR_WIDTH
+            y -= LINE_HEIGHT
+
+        tables = []
+        for _ in range(tablesPerPage):
+            tableCellObjects = [
+                SimpleNamespace(start_row_offset_idx=row, start_col_offset_idx=col, text=text)
+                for row, cellsInRow in enumerate(tableCells(rnd))
+                for col, text in enumerate(cellsInRow)
+            ]
+            tables.append(SimpleNamespace(
+                data=SimpleNamespace(table_cells=tableCellObjects),
+                prov=[SimpleNamespace(bbox=doclingRect(LEFT_MARGIN, y - 90, LEFT_MARGIN + 440, y))]
+            ))
+            y -= 104
+
+        pageObjects.append(SimpleNamespace(parsed_page=SimpleNamespace(char_cells=cells), tables=tables))
+
+    return SimpleNamespace(pages=pageObjects)
+
+
+def omnidocsFixture(pages: int, density: str = "medium", tablesPerPage: int = 0, seed: int = 7) -> Dict:
+    """A raw {"text", "tables"} OmniDocs result for normalizeOmnidocsResult"""
+    rnd = random.Random(seed)
+    lines = DENSITY_LINES[density]
+    textBlocks = []
+    tables = []
+
+    for pageNum in range(1, pages + 1):
+        y = TOP_MARGIN
+        # PyMuPDF groups a few lines into each block
+        for order in range(0, lines, 3):
+            text = "\n".join(sentence(rnd) for _ in range(min(3, lines - order)))
+            textBlocks.append({
+                "text": text,
+                "page_num": pageNum,
+                "bbox": [LEFT_MARGIN, y, LEFT_MARGIN + 480, y + 3 * LINE_HEIGHT],
+                "block_type": "paragraph",
+                "confidence": 1.0,
+                "reading_order": order // 3,
+                "font_info": {"font_name": "Helvetica", "font_size": 9.0, "bold": False, "italic": False},
+            })
+            y += 3 * LINE_HEIGHT
+
+        for _ in range(tablesPerPage):
+            tables.append({
+                "page_num": pageNum,
+                "data": tableCells(rnd),
+                "bbox": [LEFT_MARGIN, y, LEFT_MARGIN + 440, y + 90],
+                "confidence": 0.9,
+                "table_type": "stream",
+                "has_header": True,
+            })
+            y += 104
+
+    return {"text": {"text_blocks": textBlocks}, "tables": {"tables": tables}}
+
+
+FIXTURES = {
+    "docling": doclingFixture,
+    "omnidocs": omnidocsFixture,
+}
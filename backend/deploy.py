@@ -48,6 +48,13 @@ image = (
         "scikit-image==0.25.2",
         "matplotlib==3.10.6",
         "seaborn==0.13.2",
+        # Optional response formats: format=msgpack and zstd Content-Encoding
+        "msgpack==1.1.0",
+        "zstandard==0.25.0",
+        # GET /metrics; app.metrics imports it unconditionally
+        "prometheus_client==0.26.0",
+        # Worker memory budgets (app.executor)
+        "psutil==7.1.0",
 
         # 🔑 Docling packages
         "docling==2.41.0",
@@ -60,6 +67,25 @@ image = (
         "mkdir -p /root/uploads",
         "mkdir -p /root/.cache"
     ])
+    .env({
+        # Load both models and run a warm-up page before /ready reports ready
+        "PRELOAD_MODELS": "docling,omnidocs",
+        "MODEL_WARMUP": "1",
+        # Each model in its own worker processes, so one model's memory never takes down the API.
+        # Workers only ever return normalized results; raw model output stays in the worker
+        "EXECUTOR_KIND_DOCLING": "process",
+        "EXECUTOR_KIND_OMNIDOCS": "process",
+        "EXECUTOR_WORKERS_DOCLING": "1",
+        "EXECUTOR_WORKERS_OMNIDOCS": "2",
+        # Each OmniDocs worker runs its own page pool: 2 x 1 page processes for the instance
+        "OMNIDOCS_PAGE_WORKERS": "1",
+        # A budget covers a worker's whole process tree (page pool, EasyOCR and torch included) and is
+        # enforced while documents run: 4 GB + 2 x 2.5 GB of workers, plus the API process, within 12 GB
+        "EXECUTOR_MAX_RSS_MB_DOCLING": "4096",
+        "EXECUTOR_MAX_RSS_MB_OMNIDOCS": "2560",
+        "EXECUTOR_RECYCLE_DOCS_DOCLING": "200",
+        "EXECUTOR_RECYCLE_DOCS_OMNIDOCS": "500",
+    })
     .add_local_dir("app", "/root/app")
 )
 
@@ -68,7 +94,7 @@ image = (
     image=image,
     gpu="A10G",
     timeout=600,
-    memory=2048
+    memory=12288
 )
 @modal.asgi_app()
 def create_app():
@@ -0,0 +1,128 @@
+import sys
+
+import pytest
+
+from app.schemas.options import CONTENT_TYPES, ExtractOptions, InvalidOptionsError, parsePageRange
+
+
+@pytest.mark.parametrize("pages, expected", [
+    (None, None),
+    ("", None),
+    ("  ", None),
+    ("3", (3, 3)),
+    ("3-5", (3, 5)),
+    (" 3 - 5 ", (3, 5)),
+    ("3-", (3, sys.maxsize)),
+    ("1-1", (1, 1)),
+])
+def test_parsePageRange(pages, expected):
+    assert parsePageRange(pages) == expected
+
+
+@pytest.mark.parametrize("pages", ["0", "-3", "5-3", "a", "3-b", "1-2-3", "0-2"])
+def test_parsePageRange_rejects(pages):
+    with pytest.raises(InvalidOptionsError):
+        parsePageRange(pages)
+
+
+def test_parse_defaults():
+    options = ExtractOptions.parse()
+    assert options.pages is None
+    assert options.content == frozenset(CONTENT_TYPES)
+    assert options.bboxes
+    assert options.profile is None
+    assert options.isComplete and options.isDefault
+    assert options.cacheVariant("docling") == ""
+    assert options.cacheVariant("omnidocs") == ""
+
+
+def test_parse_fields():
+    options = ExtractOptions.parse(pages="2-4", content=" Tables, lines ", bbox="false", profile=" FAST ")
+    assert options.pages == (2, 4)
+    assert options.content == frozenset({"tables", "lines"})
+    assert not options.bboxes
+    assert options.profile == "fast"
+    assert options.needsText and options.needsTables
+    assert not options.isComplete
+
+
+@pytest.mark.parametrize("bbox, expected", [
+    (None, True), ("", True), ("1", True), ("true", True), ("yes", True),
+    ("0", False), ("false", False), ("No", False), (" off ", False),
+])
+def test_parse_bbox(bbox, expected):
+    assert ExtractOptions.parse(bbox=bbox).bboxes is expected
+
+
+@pytest.mark.parametrize("fields", [
+    {"content": "images"},
+    {"content": "text,images"},
+    {"content": " , "},
+    {"profile": "fastest"},
+    {"pages": "9-1"},
+])
+def test_parse_rejects(fields):
+    with pytest.raises(InvalidOptionsError):
+        ExtractOptions.parse(**fields)
+
+
+def test_needs():
+    assert not ExtractOptions.parse(content="tables").needsText
+    assert ExtractOptions.parse(content="lines").needsText
+    assert not ExtractOptions.parse(content="lines").needsTables
+
+
+def test_cacheVariant():
+    assert ExtractOptions.parse(pages="3-5").cacheVariant("omnidocs") == "pages=3-5;stages=text,tables"
+    assert ExtractOptions.parse(content="tables").cacheVariant("omnidocs") == "pages=all;stages=tables"
+    # Lines come from the text stage, so they share its results
+    assert ExtractOptions.parse(content="lines").cacheVariant() == ExtractOptions.parse(content="text").cacheVariant()
+    # Bboxes are dropped after extraction and never change the key
+    assert ExtractOptions.parse(bbox="false").cacheVariant("docling") == ""
+    # The profile only matters to Docling; "accurate" keeps the keys from before profiles
+    assert ExtractOptions.parse(profile="fast").cacheVariant("docling") == "profile=fast"
+    assert ExtractOptions.parse(profile="fast").cacheVariant("omnidocs") == ""
+    assert ExtractOptions.parse(profile="accurate").cacheVariant("docling") == ""
+
+
+def test_forPages_keeps_choices():
+    options = ExtractOptions.parse(content="text", bbox="0", profile="balanced").forPages(4, 6)
+    assert options.pages == (4, 6)
+    assert options.content == frozenset({"text"})
+    assert not options.bboxes
+    assert options.profile == "balanced"
+
+
+def normalized():
+    return {
+        "model": "omnidocs",
+        "text_blocks": [{"page": 1, "content": "a", "bbox": {"l": 0}}, {"page": 2, "content": "b", "bbox": {"l": 1}}],
+        "tables": [{"page": 2, "rows": [["x"]], "bbox": {"l": 2}}],
+        "lines": ["a", "b"],
+        "metadata": {"total_pages": 2, "total_text_blocks": 2, "total_tables": 1, "total_lines": 2},
+    }
+
+
+def test_apply_complete_is_identity():
+    result = normalized()
+    assert ExtractOptions().apply(result) is result
+
+
+def test_apply_drops_content_and_recounts():
+    result = normalized()
+    applied = ExtractOptions.parse(content="tables").apply(result)
+    assert applied["text_blocks"] == [] and applied["lines"] == []
+    assert applied["tables"] == result["tables"]
+    assert applied["metadata"]["total_text_blocks"] == 0
+    assert applied["metadata"]["total_lines"] == 0
+    assert applied["metadata"]["total_tables"] == 1
+    # Cached results are shared between requests and must not change
+    assert result == normalized()
+
+
+def test_apply_drops_bboxes():
+    result = normalized()
+    applied = ExtractOptions.parse(bbox="false").apply(result)
+    assert all("bbox" not in item for item in applied["text_blocks"] + applied["tables"])
+    assert [block["content"] for block in applied["text_blocks"]] == ["a", "b"]
+    assert result == normalized()
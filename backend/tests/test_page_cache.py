@@ -0,0 +1,192 @@
+import asyncio
+from types import SimpleNamespace
+
+import fitz
+import pytest
+
+from app import facade as facadeModule
+from app.cache import ResultCache
+from app.executor import ExtractionExecutor
+from app.page_cache import PageCache, assemblePages, changedRuns, movePage, splitPages
+from app.schemas.options import ExtractOptions
+from app.utils.normalizerOmin import summarizeTableDetection
+
+
+@pytest.mark.parametrize("pages, maxRuns, expected", [
+    ([], 4, []),
+    ([5], 4, [(5, 5)]),
+    ([3, 1, 2, 7, 8], 4, [(1, 3), (7, 8)]),
+    ([1, 3, 5], 3, [(1, 1), (3, 3), (5, 5)]),
+    # Past maxRuns, one run spans them all
+    ([1, 3, 5, 9], 3, [(1, 9)]),
+])
+def test_changedRuns(pages, maxRuns, expected):
+    assert changedRuns(pages, maxRuns) == expected
+
+
+def omnidocsResult():
+    decisions = [
+        {"page": 1, "reason": "no_text", "regions": []},
+        {"page": 2, "reason": "ruled", "regions": [[10, 20, 300, 400]]},
+        {"page": 3, "reason": "no_alignment", "regions": []},
+    ]
+    return {
+        "model": "omnidocs",
+        "text_blocks": [
+            {"page": 2, "content": "Totals", "bbox": {"l": 1}, "block_type": "text"},
+            {"page": 3, "content": "Scanned", "bbox": {"l": 2}, "block_type": "ocr"},
+        ],
+        "tables": [{"page": 2, "rows": [["a", "b"]], "bbox": {"l": 3}}],
+        "lines": ["Totals", "Scanned"],
+        "metadata": {
+            "total_pages": 2,
+            "total_text_blocks": 2,
+            "total_tables": 1,
+            "total_lines": 2,
+            "ocr_pages": [3],
+            "table_detection": summarizeTableDetection(decisions, 0.004),
+        },
+    }
+
+
+def test_splitPages():
+    records = splitPages(omnidocsResult(), [1, 2, 3, 4])
+    assert sorted(records) == [1, 2, 3, 4]
+    # Pages without content still get a record, so they are cached as empty
+    assert records[4] == {"page": 4, "text_blocks": [], "lines": [], "tables": []}
+    assert [block["content"] for block in records[2]["text_blocks"]] == ["Totals"]
+    assert records[2]["lines"] == ["Totals"]
+    assert len(records[2]["tables"]) == 1
+    assert records[1]["table_detection"] == {"reason": "no_text", "regions": []}
+    assert records[2]["table_detection"] == {"reason": "ruled", "regions": [[10, 20, 300, 400]]}
+    assert "table_detection" not in records[4]
+
+
+def test_movePage():
+    record = splitPages(omnidocsResult(), [2])[2]
+    moved = movePage(record, 7)
+    assert moved["page"] == 7
+    assert all(item["page"] == 7 for item in moved["text_blocks"] + moved["tables"])
+    assert moved["lines"] == record["lines"]
+    assert moved["table_detection"] == record["table_detection"]
+    # The cached record is shared and keeps its own numbering
+    assert all(item["page"] == 2 for item in record["text_blocks"] + record["tables"])
+
+
+def test_assemblePages_round_trip():
+    original = omnidocsResult()
+    assembled = assemblePages("omnidocs", splitPages(original, [1, 2, 3]), 0.004)
+    assert assembled == original
+
+
+def test_assemblePages_renumbered():
+    records = splitPages(omnidocsResult(), [1, 2, 3])
+    # Page 2 moved to the end behind a new empty page
+    moved = {1: records[1], 2: {"page": 2, "text_blocks": [], "lines": [], "tables": []},
+             3: movePage(records[3], 3), 4: movePage(records[2], 4)}
+    assembled = assemblePages("omnidocs", moved)
+    assert [block["page"] for block in assembled["text_blocks"]] == [3, 4]
+    assert assembled["lines"] == ["Scanned", "Totals"]
+    assert assembled["metadata"]["total_pages"] == 2
+    assert assembled["metadata"]["ocr_pages"] == [3]
+    detection = assembled["metadata"]["table_detection"]
+    assert detection["camelot_pages"] == [4]
+    assert detection["skipped"] == {"no_text": [1], "no_alignment": [3]}
+
+
+def writePdf(path, texts):
+    with fitz.open() as doc:
+        for text in texts:
+            page = doc.new_page(width=595, height=842)
+            for index, line in enumerate(text.split("\n")):
+                page.insert_text((72, 80 + 14 * index), line, fontsize=11)
+        doc.save(str(path))
+    return str(path)
+
+
+def fakeDocling(calls):
+    """runRawExtraction for Docling, reading words with PyMuPDF: only the requested pages, as Docling would"""
+
+    def convert(model, source, options=None):
+        options = options or ExtractOptions()
+        calls.append(options.pages)
+        pages = []
+        with fitz.open(source) as doc:
+            first, last = options.pages or (1, doc.page_count)
+            for number in range(first, min(last, doc.page_count) + 1):
+                cells = [SimpleNamespace(text=word[4] + " ", rect=SimpleNamespace(
+                    r_x0=word[0], r_y0=word[1], r_x1=word[2], r_y1=word[1],
+                    r_x2=word[2], r_y2=word[3], r_x3=word[0], r_y3=word[3], coord_origin="TOPLEFT"))
+                    for word in doc[number - 1].get_text("words")]
+                pages.append(SimpleNamespace(parsed_page=SimpleNamespace(char_cells=cells), tables=[]))
+        return SimpleNamespace(pages=pages)
+
+    return convert
+
+
+def createFacade():
+    return facadeModule.PDFExtractorFacade(
+        executor=ExtractionExecutor(kinds={"docling": "thread", "omnidocs": "thread"}),
+        cache=ResultCache(cacheDir=None),
+        pageCache=PageCache(ResultCache(cacheDir=None)),
+    )
+
+
+def extract(facade, path, options=None):
+    # A fresh loop per call: asyncio.run waits for the page cache's background writes
+    return asyncio.run(facade.extract("docling", path, options=options))
+
+
+CLAUSES = [f"Clause {number}\nThe parties agree to term {number} of this contract." for number in range(1, 9)]
+
+
+@pytest.mark.parametrize("revise", [
+    # A cover page inserted in front and clause 5 removed: every other page moves
+    lambda clauses: ["Cover letter\nPlease find the revised contract."] + clauses[:4] + clauses[5:],
+    # Clause 3 amended and an annex appended
+    lambda clauses: clauses[:2] + ["Clause 3\nThe parties agree to an amended term."] + clauses[3:] + ["Annex\nSchedule of fees."],
+    # Pages removed from the end and the middle
+    lambda clauses: clauses[:2] + clauses[4:6],
+])
+def test_revised_document_matches_full_extraction(tmp_path, monkeypatch, revise):
+    calls = []
+    monkeypatch.setattr(facadeModule, "runRawExtraction", fakeDocling(calls))
+    original = writePdf(tmp_path / "original.pdf", CLAUSES)
+    revised = writePdf(tmp_path / "revised.pdf", revise(CLAUSES))
+
+    primed = createFacade()
+    fresh = createFacade()
+    try:
+        extract(primed, original)
+        calls.clear()
+        spliced = extract(primed, revised)
+        changed = calls[:]
+        assert extract(fresh, revised) == spliced
+    finally:
+        primed.shutdown()
+        fresh.shutdown()
+
+    # Only the pages that are new in the revision went back to the model
+    newPages = [number for number, text in enumerate(revise(CLAUSES), start=1) if text not in CLAUSES]
+    extracted = [page for first, last in changed for page in range(first, last + 1)]
+    assert extracted == newPages
+
+
+def test_page_range_reuses_cached_pages(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(facadeModule, "runRawExtraction", fakeDocling(calls))
+    original = writePdf(tmp_path / "original.pdf", CLAUSES)
+
+    primed = createFacade()
+    fresh = createFacade()
+    options = ExtractOptions.parse(pages="3-5")
+    try:
+        extract(primed, original)
+        calls.clear()
+        spliced = extract(primed, original, options)
+        assert calls == []
+        assert extract(fresh, original, options) == spliced
+    finally:
+        primed.shutdown()
+        fresh.shutdown()
+    assert sorted({block["page"] for block in spliced["text_blocks"]}) == [3, 4, 5]
@@ -0,0 +1,106 @@
+import pytest
+
+from app.store import DocumentStore, InvalidQueryError, ftsQuery
+
+
+@pytest.mark.parametrize("query, phrase, expected", [
+    ("invoice", False, '"invoice"'),
+    ("  net   total ", False, '"net" "total"'),
+    ("net total", True, '"net total"'),
+    ('say "hi"', False, '"say" """hi"""'),
+    ('say "hi"', True, '"say ""hi"""'),
+    ("a OR b", False, '"a" "OR" "b"'),
+    ("NOT x*", False, '"NOT" "x*"'),
+])
+def test_ftsQuery(query, phrase, expected):
+    assert ftsQuery(query, phrase) == expected
+
+
+@pytest.mark.parametrize("query", ["", "   ", "\t\n"])
+def test_ftsQuery_rejects_empty(query):
+    with pytest.raises(InvalidQueryError):
+        ftsQuery(query, False)
+
+
+def result(*texts, tables=()):
+    return {
+        "text_blocks": [{"page": page, "content": content, "bbox": {"l": 1, "t": 2, "r": 3, "b": 4}}
+                        for page, content in texts],
+        "tables": [{"page": page, "rows": rows, "bbox": {"r_x0": 10, "r_y0": 20, "r_x1": 30, "r_y1": 20,
+                                                          "r_x2": 30, "r_y2": 40, "r_x3": 10, "r_y3": 40}}
+                   for page, rows in tables],
+        "metadata": {"total_pages": 2},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DocumentStore(str(tmp_path / "store.db"))
+    store.ingest([
+        ("aaa", "Docling", "invoice.pdf", result(
+            (1, "Invoice total: 42 EUR (net) - see note*"),
+            (2, 'The "early payment" discount AND the late fee'),
+            tables=[(2, [["Item", "Price"], ["Widget", ""]])],
+        )),
+        ("bbb", "omnidocs", "report.pdf", result((1, "Quarterly report: net revenue"))),
+    ])
+    return store
+
+
+@pytest.mark.parametrize("query", [
+    "AND", "OR", "NOT", "NEAR", "net AND", "(net", "net)", "total:", "note*", "*", "^net", "-", "42-EUR",
+    '"', '"early', 'payment"', "col:net", "{net}", "[net]", "a + b",
+])
+def test_operators_and_punctuation_are_literal(store, query):
+    # FTS5 syntax in a user query is searched for, never parsed
+    store.search(query)
+
+
+def test_search(store):
+    hits = store.search("net")
+    assert {hit["filename"] for hit in hits} == {"invoice.pdf", "report.pdf"}
+    hit = next(hit for hit in hits if hit["document"] == "aaa")
+    assert hit["page"] == 1
+    assert hit["kind"] == "text"
+    assert hit["bbox"] == [1, 2, 3, 4]
+    assert "[net]" in hit["snippet"]
+
+
+def test_operator_words_match_as_terms(store):
+    # "AND" is a word in the second block, not a conjunction
+    assert [hit["page"] for hit in store.search("AND")] == [2]
+    assert store.search("OR") == []
+
+
+def test_phrase(store):
+    assert [hit["page"] for hit in store.search('"early payment"', phrase=True)] == [2]
+    assert [hit["page"] for hit in store.search("early payment", phrase=True)] == [2]
+    assert store.search("payment early", phrase=True) == []
+    assert [hit["page"] for hit in store.search("payment early")] == [2]
+
+
+def test_table_cells(store):
+    hits = store.search("widget")
+    assert len(hits) == 1
+    assert hits[0]["kind"] == "table_cell"
+    assert hits[0]["table"] == {"index": 0, "row": 1, "col": 0}
+    # Cells carry their table's bbox
+    assert hits[0]["bbox"] == [10, 20, 30, 40]
+
+
+def test_filters(store):
+    assert {hit["document"] for hit in store.search("net", document="bbb")} == {"bbb"}
+    assert {hit["document"] for hit in store.search("net", filename="invoice.pdf")} == {"aaa"}
+    assert {hit["document"] for hit in store.search("net", model="DOCLING")} == {"aaa"}
+
+
+def test_reindex_replaces_blocks(store):
+    store.ingest([("aaa", "docling", "invoice.pdf", result((1, "Credit note")))])
+    assert store.search("invoice") == []
+    assert [hit["document"] for hit in store.search("credit")] == ["aaa"]
+    assert store.stats()["documents"] == 2
+
+
+def test_empty_query(store):
+    with pytest.raises(InvalidQueryError):
+        store.search("  ")
@@ -86,7 +86,7 @@ export default function ExtractionArea() {
                   {/* Ref is used to open file picker from external button */}
                   <UploadBox ref={uploadBoxRef} onFilesSelect={setSelectedFiles} />
                 </div>
-                {/* Model Selector (simple mapping to omnidocs/docling) */}
+                {/* Model Selector (simple mapping to omnidocs/docling, or auto to let the backend route) */}
                 <div className="w-full p-4 bg-white border rounded shadow">
                   <div className="text-sm font-semibold mb-2">Choose Model</div>
                   <div className="flex gap-3">
@@ -102,6 +102,12 @@ export default function ExtractionArea() {
                     >
                       docling
                     </button>
+                    <button
+                      className={`px-3 py-1 rounded border ${selectedModel === "auto" ? "bg-blue-600 text-white border-blue-600" : "bg-white text-gray-700"}`}
+                      onClick={() => setSelectedModel("auto")}
+                    >
+                      auto
+                    </button>
                   </div>
                 </div>
                 {/* Allowed File Types & Upload Button */}
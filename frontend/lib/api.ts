@@ -1,4 +1,4 @@
-export type ExtractModel = "omnidocs" | "docling";
+export type ExtractModel = "omnidocs" | "docling" | "auto";
 
 export interface ExtractResponseItem {
   fileName: string;